@@ -1,15 +1,65 @@
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
 import os
 
+from app.database.pool_conexiones import opciones_pool
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **opciones_pool())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+Base = declarative_base()
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+# ==========================
+# Motor async (asyncpg) para los endpoints de lectura
+# Misma base que DATABASE_URL; ASYNC_DATABASE_URL permite otra URL
+# ==========================
+def _url_async(url: str):
+    url = make_url(url)
+    if url.get_backend_name() == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _url_async(DATABASE_URL)
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **opciones_pool(asincrono=True))
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# ==========================
+# Réplica de solo lectura para reportes (opcional)
+# Sin READ_DATABASE_URL todo lee de la primaria; la elección por
+# petición (y el chequeo de rezago) está en app.database.replica
+# ==========================
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+
+ASYNC_READ_DATABASE_URL = os.getenv("ASYNC_READ_DATABASE_URL") or (
+    _url_async(READ_DATABASE_URL) if READ_DATABASE_URL else None
+)
+
+read_engine = None
+ReadSessionLocal = None
+if READ_DATABASE_URL:
+    read_engine = create_engine(READ_DATABASE_URL, **opciones_pool())
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+async_read_engine = None
+AsyncReadSessionLocal = None
+if ASYNC_READ_DATABASE_URL:
+    async_read_engine = create_async_engine(ASYNC_READ_DATABASE_URL, **opciones_pool(asincrono=True))
+    AsyncReadSessionLocal = async_sessionmaker(async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
@@ -0,0 +1,52 @@
+"""
+Tablas y columnas que usa el ETL: archivos ya cargados (deduplicación
+por hash), errores ligados a su carga y el resumen mensual.
+"""
+
+VERSION = 1
+DESCRIPCION = "Tablas del ETL: archivos_cargados, errores_etl por carga, resumen_mensual"
+TRANSACCIONAL = True
+
+SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS archivos_cargados (
+        id UUID PRIMARY KEY,
+        empresa_id UUID NOT NULL REFERENCES empresas(id),
+        tipo_archivo VARCHAR NOT NULL,
+        hash_contenido VARCHAR(64) NOT NULL,
+        archivo_nombre VARCHAR,
+        carga_id VARCHAR,
+        creado_en TIMESTAMP DEFAULT now(),
+        CONSTRAINT uq_archivos_cargados_hash UNIQUE (empresa_id, tipo_archivo, hash_contenido)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS errores_etl (
+        id UUID PRIMARY KEY,
+        empresa_id UUID NOT NULL REFERENCES empresas(id),
+        tipo_archivo VARCHAR NOT NULL,
+        descripcion VARCHAR,
+        contenido JSON,
+        creado_en TIMESTAMP DEFAULT now()
+    )
+    """,
+    "ALTER TABLE errores_etl ADD COLUMN IF NOT EXISTS carga_id UUID REFERENCES cargas_log(id)",
+    "ALTER TABLE errores_etl ADD COLUMN IF NOT EXISTS fila INTEGER",
+    "CREATE INDEX IF NOT EXISTS ix_errores_etl_carga_fila ON errores_etl (carga_id, fila)",
+    """
+    CREATE TABLE IF NOT EXISTS resumen_mensual (
+        empresa_id UUID NOT NULL REFERENCES empresas(id),
+        periodo VARCHAR(7) NOT NULL,
+        fuente VARCHAR NOT NULL,
+        categoria_general VARCHAR NOT NULL,
+        abreviatura_general VARCHAR NOT NULL,
+        tipo_reporte VARCHAR NOT NULL,
+        estado VARCHAR NOT NULL,
+        movimientos INTEGER NOT NULL DEFAULT 0,
+        valor NUMERIC NOT NULL DEFAULT 0,
+        actualizado_en TIMESTAMP DEFAULT now(),
+        PRIMARY KEY (empresa_id, periodo, fuente, categoria_general,
+                     abreviatura_general, tipo_reporte, estado)
+    )
+    """,
+]
@@ -0,0 +1,26 @@
+"""
+Índices únicos de llave natural usados por ON CONFLICT DO NOTHING en
+las re-cargas. Se crean CONCURRENTLY para no bloquear las tablas.
+
+Si ya hay filas repetidas la creación falla y el índice queda INVALID:
+hay que depurar los duplicados, borrar el índice y volver a migrar.
+"""
+
+VERSION = 2
+DESCRIPCION = "Índices únicos de llave natural en movimientos"
+TRANSACCIONAL = False
+
+SQL = [
+    """
+    CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_movimientos_siigo_llave
+        ON movimientos_siigo (empresa_id, comprobante, secuencia, codigo_contable)
+    """,
+    """
+    CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_movimientos_dian_cufe
+        ON movimientos_dian (empresa_id, cufe_cude)
+    """,
+    """
+    CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_movimientos_banco_llave
+        ON movimientos_banco (empresa_id, fecha, valor, descripcion, saldo)
+    """,
+]
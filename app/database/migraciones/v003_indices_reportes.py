@@ -0,0 +1,63 @@
+"""
+Índices para los filtros A–G de los reportes.
+
+- (empresa_id, fecha, id): filtro de empresa + periodo/rango y el orden
+  (fecha, id) de la paginación por cursor. El INCLUDE deja los resúmenes
+  de ingresos/egresos como index-only scan.
+- (empresa_id, categoria_general, fecha): filtro E dentro del periodo.
+- DIAN (empresa_id, tipo_documento, fecha): filtro G.
+- SIIGO PNI: índice parcial para las cuentas 1110 / 1120.
+"""
+
+VERSION = 3
+DESCRIPCION = "Índices compuestos y de cobertura para los reportes"
+TRANSACCIONAL = False
+
+SQL = [
+    # SIIGO
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_movimientos_siigo_empresa_fecha
+        ON movimientos_siigo (empresa_id, fecha_elaboracion, id)
+        INCLUDE (categoria_general, abreviatura_general, tipo_reporte, valor)
+    """,
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_movimientos_siigo_empresa_categoria_fecha
+        ON movimientos_siigo (empresa_id, categoria_general, fecha_elaboracion)
+    """,
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_movimientos_siigo_pni
+        ON movimientos_siigo (empresa_id, fecha_elaboracion)
+        INCLUDE (categoria_general, comprobante, secuencia, valor)
+        WHERE codigo_contable LIKE '1110%' OR codigo_contable LIKE '1120%'
+    """,
+
+    # DIAN
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_movimientos_dian_empresa_fecha
+        ON movimientos_dian (empresa_id, fecha_emision, id)
+        INCLUDE (categoria_general, abreviatura_general, tipo_reporte, total_bruto)
+    """,
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_movimientos_dian_empresa_categoria_fecha
+        ON movimientos_dian (empresa_id, categoria_general, fecha_emision)
+    """,
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_movimientos_dian_empresa_documento_fecha
+        ON movimientos_dian (empresa_id, tipo_documento, fecha_emision)
+    """,
+
+    # BANCO
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_movimientos_banco_empresa_fecha
+        ON movimientos_banco (empresa_id, fecha, id)
+        INCLUDE (categoria_general, abreviatura_general, tipo_reporte, valor)
+    """,
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_movimientos_banco_empresa_categoria_fecha
+        ON movimientos_banco (empresa_id, categoria_general, fecha)
+    """,
+
+    "ANALYZE movimientos_siigo",
+    "ANALYZE movimientos_dian",
+    "ANALYZE movimientos_banco",
+]
@@ -0,0 +1,20 @@
+"""
+Versión de datos por (empresa, periodo) para invalidar el cache de
+reportes cuando el ETL carga movimientos.
+"""
+
+VERSION = 4
+DESCRIPCION = "Tabla versiones_datos"
+TRANSACCIONAL = True
+
+SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS versiones_datos (
+        empresa_id UUID NOT NULL REFERENCES empresas(id),
+        periodo VARCHAR(7) NOT NULL,
+        version INTEGER NOT NULL DEFAULT 0,
+        actualizado_en TIMESTAMP DEFAULT now(),
+        PRIMARY KEY (empresa_id, periodo)
+    )
+    """,
+]
@@ -0,0 +1,46 @@
+"""
+Las llaves naturales de v002 tienen columnas opcionales (secuencia y
+codigo_contable en SIIGO, cufe_cude en DIAN, saldo en BANCO). Con el
+índice por defecto dos NULL son distintos, así que una re-carga de una
+fila con alguna de esas columnas vacía no choca con ON CONFLICT DO
+NOTHING y se duplica. NULLS NOT DISTINCT (PostgreSQL 15+) las iguala.
+El ETL de DIAN rechaza los documentos sin CUFE/CUDE, que si no se
+tomarían todos como el mismo.
+
+Cada índice se recrea CONCURRENTLY con un nombre temporal, se borra el
+anterior y se renombra. Si ya hay filas repetidas con NULL en la llave
+la creación falla y el índice temporal queda INVALID: hay que depurar
+los duplicados, borrar el índice *_nnd y volver a migrar.
+
+BANCO conserva saldo en la llave: el extracto no trae un id por
+movimiento y dos movimientos del mismo día con igual valor y
+descripción (dos retiros de cajero, dos pagos iguales) solo se
+distinguen por el saldo que deja cada uno. Sin saldo se perderían en
+cada carga; con NULLS NOT DISTINCT, en archivos sin saldo se toman como
+uno solo, que es lo mismo que ocurriría sin la columna en la llave.
+"""
+
+VERSION = 5
+DESCRIPCION = "Llaves naturales con NULLS NOT DISTINCT"
+TRANSACCIONAL = False
+
+SQL = [
+    """
+    CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_movimientos_siigo_llave_nnd
+        ON movimientos_siigo (empresa_id, comprobante, secuencia, codigo_contable) NULLS NOT DISTINCT
+    """,
+    "DROP INDEX CONCURRENTLY IF EXISTS uq_movimientos_siigo_llave",
+    "ALTER INDEX uq_movimientos_siigo_llave_nnd RENAME TO uq_movimientos_siigo_llave",
+    """
+    CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_movimientos_dian_cufe_nnd
+        ON movimientos_dian (empresa_id, cufe_cude) NULLS NOT DISTINCT
+    """,
+    "DROP INDEX CONCURRENTLY IF EXISTS uq_movimientos_dian_cufe",
+    "ALTER INDEX uq_movimientos_dian_cufe_nnd RENAME TO uq_movimientos_dian_cufe",
+    """
+    CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_movimientos_banco_llave_nnd
+        ON movimientos_banco (empresa_id, fecha, valor, descripcion, saldo) NULLS NOT DISTINCT
+    """,
+    "DROP INDEX CONCURRENTLY IF EXISTS uq_movimientos_banco_llave",
+    "ALTER INDEX uq_movimientos_banco_llave_nnd RENAME TO uq_movimientos_banco_llave",
+]
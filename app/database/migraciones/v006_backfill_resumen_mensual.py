@@ -0,0 +1,44 @@
+"""
+Llena resumen_mensual con los movimientos cargados antes de que el ETL
+lo mantuviera (v001 crea la tabla vacía). Con REPORTES_DESDE_RESUMEN
+encendido, sin este backfill los reportes leían 0 para todo el
+histórico.
+
+Recalcula el resumen de todas las empresas desde las tablas de
+movimientos con la misma consulta que reconstruir_resumen, y sube la
+versión de datos de cada (empresa, periodo) para invalidar el cache
+de reportes y el chequeo de la réplica. Corre en una transacción:
+conviene aplicarla sin cargas del ETL en curso.
+"""
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.resumen_mensual_service import (
+    FUENTES_RESUMEN,
+    LLAVE_RESUMEN,
+    consulta_reconstruccion,
+)
+
+VERSION = 6
+DESCRIPCION = "Backfill del resumen mensual desde los movimientos"
+TRANSACCIONAL = True
+
+
+def _sql(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+SQL = [
+    "DELETE FROM resumen_mensual",
+    *(
+        f"INSERT INTO resumen_mensual ({', '.join(LLAVE_RESUMEN)}, movimientos, valor)\n"
+        + _sql(consulta_reconstruccion(fuente))
+        for fuente in FUENTES_RESUMEN
+    ),
+    """
+    INSERT INTO versiones_datos (empresa_id, periodo, version)
+    SELECT DISTINCT empresa_id, periodo, 1 FROM resumen_mensual
+    ON CONFLICT (empresa_id, periodo)
+    DO UPDATE SET version = versiones_datos.version + 1, actualizado_en = now()
+    """,
+]
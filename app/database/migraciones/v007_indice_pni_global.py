@@ -0,0 +1,23 @@
+"""
+Índice para los PNI del reporte global (obtener_pni_por_empresa).
+
+Esa consulta agrupa todas las empresas de un periodo: filtra solo por
+fecha_elaboracion y las cuentas 1110 / 1120, así que
+ix_movimientos_siigo_pni (que empieza por empresa_id) no le sirve
+para el rango. Este índice parcial empieza por la fecha y con el
+INCLUDE (empresa_id, categoria_general, valor) la consulta queda como
+index-only scan.
+"""
+
+VERSION = 7
+DESCRIPCION = "Índice parcial por fecha para los PNI del reporte global"
+TRANSACCIONAL = False
+
+SQL = [
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_movimientos_siigo_pni_fecha
+        ON movimientos_siigo (fecha_elaboracion)
+        INCLUDE (empresa_id, categoria_general, valor)
+        WHERE codigo_contable LIKE '1110%' OR codigo_contable LIKE '1120%'
+    """,
+]
@@ -0,0 +1,116 @@
+# app/database/migrar.py
+
+import argparse
+import importlib
+import os
+import sys
+
+from sqlalchemy import text
+
+from app.database.connection import engine
+
+
+DIRECTORIO_MIGRACIONES = os.path.join(os.path.dirname(__file__), "migraciones")
+
+TABLA_VERSIONES = """
+    CREATE TABLE IF NOT EXISTS schema_migraciones (
+        version INTEGER PRIMARY KEY,
+        descripcion VARCHAR NOT NULL,
+        aplicada_en TIMESTAMP DEFAULT now()
+    )
+"""
+
+
+# ===============================================================
+# MIGRACIONES DISPONIBLES
+# Cada módulo vNNN_nombre.py define VERSION, DESCRIPCION,
+# TRANSACCIONAL y SQL (lista de sentencias, en orden).
+# Las no transaccionales (CREATE INDEX CONCURRENTLY) corren en
+# autocommit, sentencia por sentencia.
+# ===============================================================
+def cargar_migraciones():
+    migraciones = []
+    for archivo in sorted(os.listdir(DIRECTORIO_MIGRACIONES)):
+        if archivo.startswith("v") and archivo.endswith(".py"):
+            migraciones.append(importlib.import_module(f"app.database.migraciones.{archivo[:-3]}"))
+
+    versiones = [m.VERSION for m in migraciones]
+    if len(set(versiones)) != len(versiones):
+        raise RuntimeError(f"Versiones de migración repetidas: {versiones}")
+
+    return sorted(migraciones, key=lambda m: m.VERSION)
+
+
+def versiones_aplicadas(conexion):
+    conexion.execute(text(TABLA_VERSIONES))
+    return {fila.version for fila in conexion.execute(text("SELECT version FROM schema_migraciones"))}
+
+
+def _registrar(conexion, migracion):
+    conexion.execute(
+        text("INSERT INTO schema_migraciones (version, descripcion) VALUES (:v, :d)"),
+        {"v": migracion.VERSION, "d": migracion.DESCRIPCION}
+    )
+
+
+# ===============================================================
+# APLICAR
+# ===============================================================
+def aplicar_migracion(migracion):
+    if migracion.TRANSACCIONAL:
+        with engine.begin() as conexion:
+            for sentencia in migracion.SQL:
+                conexion.execute(text(sentencia))
+            _registrar(conexion, migracion)
+        return
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conexion:
+        for sentencia in migracion.SQL:
+            conexion.execute(text(sentencia))
+        _registrar(conexion, migracion)
+
+
+def migrar(hasta: int = None):
+    """
+    Aplica en orden las migraciones pendientes (hasta la versión
+    indicada, si se da). Devuelve las versiones aplicadas.
+    """
+    with engine.begin() as conexion:
+        aplicadas = versiones_aplicadas(conexion)
+
+    nuevas = []
+    for migracion in cargar_migraciones():
+        if migracion.VERSION in aplicadas:
+            continue
+        if hasta is not None and migracion.VERSION > hasta:
+            break
+        aplicar_migracion(migracion)
+        nuevas.append(migracion.VERSION)
+
+    return nuevas
+
+
+# ===============================================================
+# CLI — python -m app.database.migrar [--hasta N] [--listar]
+# ===============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migraciones versionadas del esquema")
+    parser.add_argument("--hasta", type=int, default=None, help="Última versión a aplicar")
+    parser.add_argument("--listar", action="store_true", help="Solo mostrar el estado")
+    args = parser.parse_args(argv)
+
+    if args.listar:
+        with engine.begin() as conexion:
+            aplicadas = versiones_aplicadas(conexion)
+        for migracion in cargar_migraciones():
+            marca = "x" if migracion.VERSION in aplicadas else " "
+            print(f"[{marca}] {migracion.VERSION:03d}  {migracion.DESCRIPCION}")
+        return 0
+
+    nuevas = migrar(args.hasta)
+    print(f"Migraciones aplicadas: {nuevas or 'ninguna'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
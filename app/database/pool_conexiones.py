@@ -0,0 +1,148 @@
+# app/database/pool_conexiones.py
+
+import threading
+import time
+import uuid
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.core.config import settings
+
+
+# Límites (segundos) de los tramos del histograma de espera
+TRAMOS_ESPERA = (0.001, 0.01, 0.1, 1.0, 5.0)
+
+
+# ===============================================================
+# MÉTRICAS DE CHECKOUT (por pool)
+# ===============================================================
+class MetricasPool:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+        self.tramos = [0] * (len(TRAMOS_ESPERA) + 1)
+
+    def registrar(self, espera: float, timeout: bool = False):
+        with self._lock:
+            if timeout:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.espera_total += espera
+            self.espera_max = max(self.espera_max, espera)
+            self.tramos[sum(espera > limite for limite in TRAMOS_ESPERA)] += 1
+
+    def resumen(self):
+        with self._lock:
+            intentos = self.checkouts + self.timeouts
+            etiquetas = [f"<={limite}s" for limite in TRAMOS_ESPERA] + [f">{TRAMOS_ESPERA[-1]}s"]
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "espera_total_s": round(self.espera_total, 6),
+                "espera_promedio_s": round(self.espera_total / intentos, 6) if intentos else 0,
+                "espera_max_s": round(self.espera_max, 6),
+                "esperas": dict(zip(etiquetas, self.tramos)),
+            }
+
+
+class _PoolMedido:
+    """
+    Mide cuánto tarda cada checkout: espera en la cola del pool más,
+    si hace falta, abrir la conexión (y el pre-ping). Los checkouts que
+    terminan en "QueuePool limit ... reached" cuentan como timeouts.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metricas = MetricasPool()
+
+    def connect(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super().connect()
+        except exc.TimeoutError:
+            self.metricas.registrar(time.perf_counter() - inicio, timeout=True)
+            raise
+        self.metricas.registrar(time.perf_counter() - inicio)
+        return conexion
+
+
+class QueuePoolMedido(_PoolMedido, QueuePool):
+    pass
+
+
+class AsyncQueuePoolMedido(_PoolMedido, AsyncAdaptedQueuePool):
+    pass
+
+
+class NullPoolMedido(_PoolMedido, NullPool):
+    pass
+
+
+# ===============================================================
+# OPCIONES DEL ENGINE
+# ===============================================================
+def opciones_pool(asincrono: bool = False):
+    """
+    Argumentos de create_engine / create_async_engine según Settings.
+
+    Con DB_PGBOUNCER el pooling lo hace pgbouncer (modo transacción):
+    NullPool abre una conexión por checkout, y en asyncpg se apaga el
+    cache de sentencias preparadas y cada una lleva nombre único, porque
+    dos transacciones seguidas pueden caer en conexiones distintas del
+    servidor.
+    """
+    opciones = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+    if settings.DB_PGBOUNCER:
+        opciones["poolclass"] = NullPoolMedido
+        if asincrono:
+            opciones["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+            }
+        return opciones
+
+    opciones.update(
+        poolclass=AsyncQueuePoolMedido if asincrono else QueuePoolMedido,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_POOL_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    return opciones
+
+
+# ===============================================================
+# ESTADO ACTUAL DE UN POOL
+# ===============================================================
+def estado_pool(pool):
+    """
+    en_uso / inactivas / overflow son los contadores del QueuePool; con
+    NullPool (pgbouncer) no hay conexiones retenidas y solo quedan las
+    métricas de checkout.
+    """
+    estado = {"pool": type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        estado.update(
+            tamano=pool.size(),
+            max_overflow=pool._max_overflow,
+            en_uso=pool.checkedout(),
+            inactivas=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            timeout_s=pool.timeout(),
+        )
+
+    metricas = getattr(pool, "metricas", None)
+    if metricas is not None:
+        estado.update(metricas.resumen())
+    return estado
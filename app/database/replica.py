@@ -0,0 +1,215 @@
+# app/database/replica.py
+
+import threading
+import time
+import uuid
+
+from fastapi import Request
+from sqlalchemy import event, exc
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.report_cache import version_datos, version_datos_async
+from app.database.connection import (
+    AsyncReadSessionLocal,
+    AsyncSessionLocal,
+    ReadSessionLocal,
+    SessionLocal,
+)
+
+
+# ===============================================================
+# LECTURAS SERVIDAS (por proceso)
+# ===============================================================
+class LecturasReplica:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.replica = 0
+        self.primaria_rezago = 0
+        self.primaria_error = 0
+        self.ultimo_error = None
+
+    def registrar(self, destino: str, error: Exception = None):
+        with self._lock:
+            setattr(self, destino, getattr(self, destino) + 1)
+            if error is not None:
+                self.ultimo_error = str(error).splitlines()[0]
+
+    def resumen(self):
+        with self._lock:
+            return {
+                "configurada": ReadSessionLocal is not None or AsyncReadSessionLocal is not None,
+                "replica": self.replica,
+                "primaria_rezago": self.primaria_rezago,
+                "primaria_error": self.primaria_error,
+                "ultimo_error": self.ultimo_error,
+            }
+
+
+lecturas_replica = LecturasReplica()
+
+
+def _como_uuid(valor):
+    # Un id inválido no acota el chequeo (el endpoint responde el error)
+    try:
+        return uuid.UUID(str(valor)) if valor else None
+    except ValueError:
+        return None
+
+
+# ===============================================================
+# VERSIÓN DE LA PRIMARIA (cache corto opcional, por proceso)
+# Apagado por defecto (DB_REPLICA_VERSION_TTL=0): cada lectura de
+# reportes consulta también la primaria. Con TTL, las cargas de este
+# proceso descartan la versión guardada al confirmar; las de otros
+# procesos pueden tardar hasta el TTL en dejar de leerse de la réplica.
+# ===============================================================
+_versiones_primaria = {}
+_lock_versiones = threading.Lock()
+
+
+@event.listens_for(Session, "after_commit")
+def _descartar_versiones(session):
+    empresas = session.info.pop("empresas_versionadas", None)
+    if empresas:
+        with _lock_versiones:
+            _versiones_primaria.pop(None, None)
+            for empresa_id in empresas:
+                _versiones_primaria.pop(empresa_id, None)
+
+
+@event.listens_for(Session, "after_rollback")
+def _olvidar_versiones(session):
+    session.info.pop("empresas_versionadas", None)
+
+
+def _version_guardada(empresa_id, ahora):
+    with _lock_versiones:
+        guardada = _versiones_primaria.get(empresa_id)
+    if guardada is not None and guardada[0] > ahora:
+        return guardada[1]
+    return None
+
+
+def _guardar_version(empresa_id, ahora, version):
+    if settings.DB_REPLICA_VERSION_TTL > 0:
+        with _lock_versiones:
+            _versiones_primaria[empresa_id] = (ahora + settings.DB_REPLICA_VERSION_TTL, version)
+
+
+def _version_primaria(empresa_id):
+    ahora = time.monotonic()
+    version = _version_guardada(empresa_id, ahora)
+    if version is not None:
+        return version
+
+    primaria = SessionLocal()
+    try:
+        version = version_datos(primaria, empresa_id)
+    finally:
+        primaria.close()
+
+    _guardar_version(empresa_id, ahora, version)
+    return version
+
+
+async def _version_primaria_async(empresa_id):
+    ahora = time.monotonic()
+    version = _version_guardada(empresa_id, ahora)
+    if version is not None:
+        return version
+
+    async with AsyncSessionLocal() as primaria:
+        version = await version_datos_async(primaria, empresa_id)
+
+    _guardar_version(empresa_id, ahora, version)
+    return version
+
+
+def _empresa_de(request: Request):
+    return request.path_params.get("empresa_id") or request.query_params.get("empresa_id")
+
+
+# ===============================================================
+# SESIÓN DE LECTURA: réplica si está al día, si no la primaria
+# El ETL sube versiones_datos en la transacción de cada lote: si la
+# réplica ya ve la versión que tiene la primaria, ya replicó esas
+# filas. La réplica se lee primero (la primaria solo puede crecer).
+# empresa_id acota el chequeo: cargas de otras empresas no cuentan.
+# ===============================================================
+def sesion_lectura(empresa_id=None):
+    if ReadSessionLocal is None:
+        return SessionLocal()
+
+    empresa_id = _como_uuid(empresa_id)
+    replica = ReadSessionLocal()
+    try:
+        version_replica = version_datos(replica, empresa_id)
+    except (exc.DBAPIError, exc.TimeoutError, OSError) as e:
+        # Réplica caída o pool de la réplica agotado
+        replica.close()
+        lecturas_replica.registrar("primaria_error", e)
+        return SessionLocal()
+
+    try:
+        al_dia = version_replica >= _version_primaria(empresa_id)
+    except Exception:
+        replica.close()
+        raise
+
+    if al_dia:
+        lecturas_replica.registrar("replica")
+        return replica
+
+    replica.close()
+    lecturas_replica.registrar("primaria_rezago")
+    return SessionLocal()
+
+
+async def sesion_lectura_async(empresa_id=None):
+    """sesion_lectura para los endpoints async (AsyncSession)."""
+    if AsyncReadSessionLocal is None:
+        return AsyncSessionLocal()
+
+    empresa_id = _como_uuid(empresa_id)
+    replica = AsyncReadSessionLocal()
+    try:
+        version_replica = await version_datos_async(replica, empresa_id)
+    except (exc.DBAPIError, exc.TimeoutError, OSError) as e:
+        await replica.close()
+        lecturas_replica.registrar("primaria_error", e)
+        return AsyncSessionLocal()
+
+    try:
+        al_dia = version_replica >= await _version_primaria_async(empresa_id)
+    except Exception:
+        await replica.close()
+        raise
+
+    if al_dia:
+        lecturas_replica.registrar("replica")
+        return replica
+
+    await replica.close()
+    lecturas_replica.registrar("primaria_rezago")
+    return AsyncSessionLocal()
+
+
+# ===============================================================
+# DEPENDENCIAS PARA LOS ROUTERS DE REPORTES
+# La empresa sale del path o del query string (empresa_id)
+# ===============================================================
+def get_read_db(request: Request):
+    db = sesion_lectura(_empresa_de(request))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request):
+    db = await sesion_lectura_async(_empresa_de(request))
+    try:
+        yield db
+    finally:
+        await db.close()
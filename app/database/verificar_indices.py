@@ -0,0 +1,197 @@
+# app/database/verificar_indices.py
+
+import argparse
+import json
+import sys
+import uuid
+from datetime import date
+
+from sqlalchemy import func, select, text
+
+from app.database.connection import SessionLocal
+from app.core import report_engine
+from app.services import resumen_mensual_service
+from app.models.errores_etl import ErrorETL
+
+
+# Tablas grandes: un Seq Scan sobre ellas es una alerta
+TABLAS_VIGILADAS = {
+    "movimientos_siigo",
+    "movimientos_dian",
+    "movimientos_banco",
+    "resumen_mensual",
+    "errores_etl",
+}
+
+# Columna de fecha de cada tabla de movimientos: si el rango del periodo
+# queda en "Filter" (y no en la condición del índice) se leen todas las
+# filas de la empresa aunque el plan use un índice
+COLUMNAS_FECHA = {
+    "movimientos_siigo": "fecha_elaboracion",
+    "movimientos_dian": "fecha_emision",
+    "movimientos_banco": "fecha",
+}
+
+
+# ===============================================================
+# EXPLAIN (FORMAT JSON) de un SELECT de SQLAlchemy
+# ===============================================================
+def explicar(db, stmt):
+    compilado = stmt.compile(dialect=db.get_bind().dialect, compile_kwargs={"render_postcompile": True})
+    parametros = {
+        nombre: str(valor) if isinstance(valor, uuid.UUID) else valor
+        for nombre, valor in compilado.params.items()
+    }
+    plan = db.connection().exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compilado), parametros).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def _nodos(plan):
+    yield plan
+    for hijo in plan.get("Plans", []):
+        yield from _nodos(hijo)
+
+
+def _condicion_indice(nodo):
+    # Bitmap Heap Scan: la condición está en el Recheck Cond
+    return nodo.get("Index Cond", "") + nodo.get("Recheck Cond", "")
+
+
+# ===============================================================
+# CONSULTAS DE LOS REPORTES
+# nombre → constructor(db, empresa_id, periodo) que devuelve el SELECT
+# ===============================================================
+def _movimientos(fuentes, **filtros):
+    def construir(db, empresa_id, periodo):
+        return report_engine.consulta_movimientos(
+            fuentes, empresa_id, limite=100, periodo=periodo, **filtros
+        )
+    return construir
+
+
+def _pagina_siguiente(db, empresa_id, periodo):
+    cursor = report_engine.codificar_cursor(
+        type("Fila", (), {"fecha": date.today(), "id": uuid.uuid4()})
+    )
+    return report_engine.consulta_movimientos(
+        ["SIIGO", "DIAN", "BANCO"], empresa_id, limite=100, cursor=cursor, periodo=periodo
+    )
+
+
+def _resumen_crudo(db, empresa_id, periodo):
+    movimientos = report_engine._union_fuentes(["SIIGO", "DIAN", "BANCO"], empresa_id, periodo=periodo)
+    return select(func.sum(movimientos.c.valor))
+
+
+def _resumen_mensual(db, empresa_id, periodo):
+    movimientos = report_engine._union_resumen_mensual(["SIIGO", "DIAN", "BANCO"], empresa_id, periodo=periodo)
+    return select(func.sum(movimientos.c.valor))
+
+
+def _reconstruccion(fuente):
+    def construir(db, empresa_id, periodo):
+        return resumen_mensual_service.consulta_reconstruccion(fuente, empresa_id, periodo)
+    return construir
+
+
+def _errores_carga(db, empresa_id, periodo):
+    return (
+        select(ErrorETL)
+        .where(ErrorETL.carga_id == uuid.uuid4())
+        .order_by(ErrorETL.fila)
+        .limit(100)
+    )
+
+
+CONSULTAS = {
+    "movimientos SIIGO (A+B)": _movimientos(["SIIGO"]),
+    "movimientos DIAN (A+B)": _movimientos(["DIAN"]),
+    "movimientos BANCO (A+B)": _movimientos(["BANCO"]),
+    "movimientos unificados (A+B)": _movimientos(["SIIGO", "DIAN", "BANCO"]),
+    "movimientos unificados (A+B+E)": _movimientos(["SIIGO", "DIAN", "BANCO"], categoria="O-RCJ"),
+    "movimientos SIIGO (A+B+G)": _movimientos(["SIIGO"], documento="RC"),
+    "movimientos DIAN (A+B+G)": _movimientos(["DIAN"], documento="FACTURA"),
+    "movimientos unificados, página por cursor": _pagina_siguiente,
+    "resumen general desde movimientos": _resumen_crudo,
+    "resumen general desde resumen mensual": _resumen_mensual,
+    "reconstrucción resumen SIIGO": _reconstruccion("SIIGO"),
+    "reconstrucción resumen DIAN": _reconstruccion("DIAN"),
+    "reconstrucción resumen BANCO": _reconstruccion("BANCO"),
+    "errores de una carga": _errores_carga,
+}
+
+
+# ===============================================================
+# VERIFICAR
+# ===============================================================
+def verificar(db, empresa_id, periodo: str, forzar_indices: bool = True):
+    """
+    Corre EXPLAIN sobre cada consulta y devuelve
+    [{"consulta", "seq_scans": [tablas], "fecha_sin_indice": [tablas],
+      "indices": [índices usados]}].
+
+    Con forzar_indices se apaga enable_seqscan: un Seq Scan que aun así
+    aparece significa que no hay índice utilizable (no depende del
+    tamaño de la tabla de prueba).
+    """
+    if forzar_indices:
+        db.execute(text("SET LOCAL enable_seqscan = off"))
+
+    resultados = []
+    for nombre, construir in CONSULTAS.items():
+        nodos = list(_nodos(explicar(db, construir(db, empresa_id, periodo))))
+
+        resultados.append({
+            "consulta": nombre,
+            "seq_scans": sorted({
+                n["Relation Name"] for n in nodos
+                if n["Node Type"] == "Seq Scan" and n.get("Relation Name") in TABLAS_VIGILADAS
+            }),
+            "fecha_sin_indice": sorted({
+                n["Relation Name"] for n in nodos
+                if n.get("Relation Name") in COLUMNAS_FECHA
+                and COLUMNAS_FECHA[n["Relation Name"]] in n.get("Filter", "")
+                and COLUMNAS_FECHA[n["Relation Name"]] not in _condicion_indice(n)
+            }),
+            "indices": sorted({n["Index Name"] for n in nodos if "Index Name" in n}),
+        })
+
+    db.rollback()
+    return resultados
+
+
+# ===============================================================
+# CLI — python -m app.database.verificar_indices [--empresa ID] [--periodo YYYY-MM]
+# ===============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Detecta consultas de reportes sin índice utilizable")
+    parser.add_argument("--empresa", type=uuid.UUID, default=None)
+    parser.add_argument("--periodo", default=date.today().strftime("%Y-%m"))
+    parser.add_argument("--plan-real", action="store_true",
+                        help="No apagar enable_seqscan (usa el plan que elegiría el planner)")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        empresa_id = args.empresa or db.execute(text("SELECT id FROM empresas LIMIT 1")).scalar() or uuid.uuid4()
+        resultados = verificar(db, empresa_id, args.periodo, forzar_indices=not args.plan_real)
+    finally:
+        db.close()
+
+    fallas = 0
+    for r in resultados:
+        estado = "ok"
+        if r["seq_scans"]:
+            estado = "SEQ SCAN " + ", ".join(r["seq_scans"])
+        elif r["fecha_sin_indice"]:
+            estado = "FECHA EN FILTER " + ", ".join(r["fecha_sin_indice"])
+        fallas += estado != "ok"
+        print(f"{r['consulta']:<45} {estado:<30} {', '.join(r['indices'])}")
+
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -25,3 +25,23 @@ app.include_router(etl_dian.router, prefix="/etl/dian", tags=["ETL DIAN"])
 from app.routers import etl_banco
 
 app.include_router(etl_banco.router, prefix="/etl/banco", tags=["ETL BANCO"])
+
+from app.routers import etl_jobs
+
+app.include_router(etl_jobs.router, prefix="/etl/jobs", tags=["ETL Jobs"])
+
+from app.routers import etl_lote
+
+app.include_router(etl_lote.router, prefix="/etl/lote", tags=["ETL Lote"])
+
+from app.routers import etl_cargas
+
+app.include_router(etl_cargas.router, prefix="/etl/cargas", tags=["ETL Cargas"])
+
+from app.routers import monitoreo
+
+app.include_router(monitoreo.router, prefix="/monitoreo", tags=["Monitoreo"])
+
+from app.routers import reportes
+
+app.include_router(reportes.router)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, TIMESTAMP, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+import uuid
+from app.database.connection import Base
+
+class ArchivoCargado(Base):
+    __tablename__ = "archivos_cargados"
+    __table_args__ = (
+        UniqueConstraint("empresa_id", "tipo_archivo", "hash_contenido", name="uq_archivos_cargados_hash"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    empresa_id = Column(UUID(as_uuid=True), ForeignKey("empresas.id"), nullable=False)
+
+    tipo_archivo = Column(String, nullable=False)   # SIIGO | DIAN | BANCO
+    hash_contenido = Column(String(64), nullable=False)  # sha256 del archivo
+    archivo_nombre = Column(String)
+    carga_id = Column(String)  # CargaLog que registró la primera carga
+
+    creado_en = Column(TIMESTAMP, server_default=func.now())
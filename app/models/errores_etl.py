@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Index, Integer, String, TIMESTAMP, ForeignKey, JSON
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+import uuid
+from app.database.connection import Base
+
+class ErrorETL(Base):
+    __tablename__ = "errores_etl"
+    __table_args__ = (
+        # Paginación de los errores de una carga
+        Index("ix_errores_etl_carga_fila", "carga_id", "fila"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    empresa_id = Column(UUID(as_uuid=True), ForeignKey("empresas.id"), nullable=False)
+    carga_id = Column(UUID(as_uuid=True), ForeignKey("cargas_log.id"))
+
+    tipo_archivo = Column(String, nullable=False)
+    fila = Column(Integer)
+    descripcion = Column(String)
+    contenido = Column(JSON)
+
+    creado_en = Column(TIMESTAMP, server_default=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Numeric, Date, TIMESTAMP, ForeignKey, JSON
+from sqlalchemy import Column, Index, String, Numeric, Date, TIMESTAMP, ForeignKey, JSON
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 import uuid
@@ -6,6 +6,24 @@ from app.database.connection import Base
 
 class MovimientoBANCO(Base):
     __tablename__ = "movimientos_banco"
+    __table_args__ = (
+        # Llave natural del extracto (el banco no entrega un id propio):
+        # el saldo separa movimientos iguales del mismo día
+        Index(
+            "uq_movimientos_banco_llave",
+            "empresa_id", "fecha", "valor", "descripcion", "saldo",
+            unique=True,
+            postgresql_nulls_not_distinct=True
+        ),
+        # Filtros A + B/C y orden (fecha, id); INCLUDE cubre los resúmenes
+        Index(
+            "ix_movimientos_banco_empresa_fecha",
+            "empresa_id", "fecha", "id",
+            postgresql_include=["categoria_general", "abreviatura_general", "tipo_reporte", "valor"]
+        ),
+        # Filtro E por periodo
+        Index("ix_movimientos_banco_empresa_categoria_fecha", "empresa_id", "categoria_general", "fecha"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     empresa_id = Column(UUID(as_uuid=True), ForeignKey("empresas.id"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Numeric, Date, TIMESTAMP, ForeignKey
+from sqlalchemy import Column, Index, String, Numeric, Date, TIMESTAMP, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 import uuid
@@ -6,6 +6,24 @@ from app.database.connection import Base
 
 class MovimientoDIAN(Base):
     __tablename__ = "movimientos_dian"
+    __table_args__ = (
+        # Llave natural: el CUFE/CUDE identifica el documento electrónico
+        Index(
+            "uq_movimientos_dian_cufe",
+            "empresa_id", "cufe_cude",
+            unique=True,
+            postgresql_nulls_not_distinct=True
+        ),
+        # Filtros A + B/C y orden (fecha, id); INCLUDE cubre los resúmenes
+        Index(
+            "ix_movimientos_dian_empresa_fecha",
+            "empresa_id", "fecha_emision", "id",
+            postgresql_include=["categoria_general", "abreviatura_general", "tipo_reporte", "total_bruto"]
+        ),
+        # Filtros E y G por periodo
+        Index("ix_movimientos_dian_empresa_categoria_fecha", "empresa_id", "categoria_general", "fecha_emision"),
+        Index("ix_movimientos_dian_empresa_documento_fecha", "empresa_id", "tipo_documento", "fecha_emision"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     empresa_id = Column(UUID(as_uuid=True), ForeignKey("empresas.id"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Numeric, Date, TIMESTAMP, ForeignKey
+from sqlalchemy import Column, Index, String, Numeric, Date, TIMESTAMP, ForeignKey, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 import uuid
@@ -6,6 +6,37 @@ from app.database.connection import Base
 
 class MovimientoSIIGO(Base):
     __tablename__ = "movimientos_siigo"
+    __table_args__ = (
+        # Llave natural: una re-carga del mismo libro no duplica líneas
+        Index(
+            "uq_movimientos_siigo_llave",
+            "empresa_id", "comprobante", "secuencia", "codigo_contable",
+            unique=True,
+            postgresql_nulls_not_distinct=True
+        ),
+        # Filtros A + B/C y orden (fecha, id); INCLUDE cubre los resúmenes
+        Index(
+            "ix_movimientos_siigo_empresa_fecha",
+            "empresa_id", "fecha_elaboracion", "id",
+            postgresql_include=["categoria_general", "abreviatura_general", "tipo_reporte", "valor"]
+        ),
+        # Filtro E por periodo
+        Index("ix_movimientos_siigo_empresa_categoria_fecha", "empresa_id", "categoria_general", "fecha_elaboracion"),
+        # PNI: cuentas 1110 / 1120 del periodo
+        Index(
+            "ix_movimientos_siigo_pni",
+            "empresa_id", "fecha_elaboracion",
+            postgresql_include=["categoria_general", "comprobante", "secuencia", "valor"],
+            postgresql_where=text("codigo_contable LIKE '1110%' OR codigo_contable LIKE '1120%'")
+        ),
+        # PNI de todas las empresas del periodo (reporte global): solo rango de fecha
+        Index(
+            "ix_movimientos_siigo_pni_fecha",
+            "fecha_elaboracion",
+            postgresql_include=["empresa_id", "categoria_general", "valor"],
+            postgresql_where=text("codigo_contable LIKE '1110%' OR codigo_contable LIKE '1120%'")
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     empresa_id = Column(UUID(as_uuid=True), ForeignKey("empresas.id"), nullable=False)
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, Numeric, TIMESTAMP, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.database.connection import Base
+
+class ResumenMensual(Base):
+    """
+    Conteos y sumas de movimientos por mes. Lo mantiene el ETL en cada
+    lote cargado; se puede recalcular con resumen_mensual_service.
+    """
+    __tablename__ = "resumen_mensual"
+
+    empresa_id = Column(UUID(as_uuid=True), ForeignKey("empresas.id"), primary_key=True)
+    periodo = Column(String(7), primary_key=True)       # YYYY-MM
+    fuente = Column(String, primary_key=True)           # SIIGO | DIAN | BANCO
+    categoria_general = Column(String, primary_key=True)
+    abreviatura_general = Column(String, primary_key=True)
+    tipo_reporte = Column(String, primary_key=True)
+    estado = Column(String, primary_key=True)           # PUB | CON | PNI
+
+    movimientos = Column(Integer, nullable=False, default=0)
+    valor = Column(Numeric, nullable=False, default=0)
+
+    actualizado_en = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, TIMESTAMP, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.database.connection import Base
+
+class VersionDatos(Base):
+    """
+    Versión de los movimientos de una empresa en un periodo. El ETL la
+    sube en la misma transacción de cada lote insertado; el cache de
+    reportes la usa como parte de la llave.
+    """
+    __tablename__ = "versiones_datos"
+
+    empresa_id = Column(UUID(as_uuid=True), ForeignKey("empresas.id"), primary_key=True)
+    periodo = Column(String(7), primary_key=True)       # YYYY-MM ("" = filas sin fecha)
+
+    version = Column(Integer, nullable=False, default=0)
+
+    actualizado_en = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,73 @@
+import hashlib
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from uuid import UUID
+
+from app.models.archivos_cargados import ArchivoCargado
+from app.models.cargas_log import CargaLog
+
+
+# ==========================
+# Huella del archivo (sha256 por bloques, sin cargarlo en memoria)
+# ==========================
+def calcular_hash(archivo, tamano_bloque: int = 1024 * 1024):
+    huella = hashlib.sha256()
+    for bloque in iter(lambda: archivo.read(tamano_bloque), b""):
+        huella.update(bloque)
+    archivo.seek(0)
+    return huella.hexdigest()
+
+
+def buscar_archivo_cargado(db: Session, empresa_id: UUID, tipo_archivo: str, hash_contenido: str):
+    return db.query(ArchivoCargado).filter(
+        ArchivoCargado.empresa_id == empresa_id,
+        ArchivoCargado.tipo_archivo == tipo_archivo,
+        ArchivoCargado.hash_contenido == hash_contenido
+    ).first()
+
+
+def registrar_archivo_cargado(db: Session, empresa_id: UUID, tipo_archivo: str,
+                              hash_contenido: str, archivo_nombre: str, carga_id=None):
+    registro = ArchivoCargado(
+        empresa_id=empresa_id,
+        tipo_archivo=tipo_archivo,
+        hash_contenido=hash_contenido,
+        archivo_nombre=archivo_nombre,
+        carga_id=str(carga_id) if carga_id else None
+    )
+    db.add(registro)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Otra carga concurrente del mismo archivo ya lo registró
+        db.rollback()
+
+
+# ==========================
+# Archivo repetido: se registra el intento y no se procesa
+# ==========================
+def omitir_archivo_repetido(db: Session, empresa_id: UUID, tipo_archivo: str,
+                            archivo_nombre: str, previo: ArchivoCargado):
+    mensaje = f"Archivo idéntico ya cargado ({previo.archivo_nombre}, {previo.creado_en})"
+
+    log = CargaLog(
+        empresa_id=empresa_id,
+        tipo_archivo=tipo_archivo,
+        estado="duplicado",
+        archivo_nombre=archivo_nombre,
+        mensaje=mensaje
+    )
+    db.add(log)
+    db.commit()
+
+    return {
+        "carga_id": str(log.id),
+        "omitido": True,
+        "mensaje": mensaje,
+        "carga_original_id": previo.carga_id,
+        "procesados": 0,
+        "duplicados": 0,
+        "errores": [],
+        "total_errores": 0,
+        "resumen_errores": []
+    }
@@ -0,0 +1,176 @@
+import re
+from collections import Counter
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.bulk_loader import cargar_filas
+from app.models.cargas_log import CargaLog
+from app.models.errores_etl import ErrorETL
+
+
+# ==========================
+# CargaLog: se crea al inicio y se cierra al final de la carga
+# ==========================
+def iniciar_carga(db: Session, empresa_id: UUID, tipo_archivo: str, archivo_nombre: str):
+    log = CargaLog(
+        empresa_id=empresa_id,
+        tipo_archivo=tipo_archivo,
+        estado="procesando",
+        archivo_nombre=archivo_nombre,
+        mensaje="Carga en proceso"
+    )
+    db.add(log)
+    db.commit()
+    db.refresh(log)
+    return log
+
+
+def finalizar_carga(db: Session, log: CargaLog, registros: int, duplicados: int, errores: int):
+    log.estado = "procesado" if errores == 0 else "error"
+    log.mensaje = f"{registros} procesados, {duplicados} duplicados, {errores} errores"
+    db.commit()
+
+
+def fallar_carga(db: Session, log: CargaLog, mensaje: str):
+    db.rollback()
+    log.estado = "fallido"
+    log.mensaje = mensaje[:500]
+    db.commit()
+
+
+# ==========================
+# Tipo y llave de un error, para el resumen agrupado
+# ==========================
+_PATRONES_ERROR = [
+    (re.compile(r"^Comprobante no existe en diccionario SIIGO: (.*)$"), "comprobante_no_existe"),
+    (re.compile(r"^No existe en diccionario DIAN: (.*)$"), "dian_no_existe"),
+    (re.compile(r"^time data .* does not match format|^day is out of range|^unconverted data remains"), "fecha_invalida"),
+    (re.compile(r"^could not convert string to float|^float\(\) argument"), "valor_invalido"),
+    (re.compile(r"^JSON inválido"), "json_invalido"),
+]
+
+
+def clasificar_error(mensaje: str):
+    for patron, tipo in _PATRONES_ERROR:
+        m = patron.match(mensaje)
+        if m:
+            return tipo, (m.group(1) if m.groups() else None)
+    return "otro", mensaje[:200]
+
+
+def _limpiar_contenido(contenido):
+    # NaN de pandas no es JSON válido
+    if not isinstance(contenido, dict):
+        return contenido
+    return {
+        k: (None if isinstance(v, float) and v != v else v)
+        for k, v in contenido.items()
+    }
+
+
+# ==========================
+# Registro de errores de una carga
+# - se guardan en ErrorETL por lotes (COPY), no uno por uno
+# - en memoria solo queda una muestra y el resumen agrupado
+# ==========================
+class RegistroErrores:
+
+    def __init__(self, db: Session, empresa_id: UUID, tipo_archivo: str, carga_id):
+        self.db = db
+        self.empresa_id = empresa_id
+        self.tipo_archivo = tipo_archivo
+        self.carga_id = carga_id
+
+        self.total = 0
+        self.muestra = []
+        self._conteo = Counter()
+        self._primera_fila = {}
+        self._pendientes = []
+
+    def __len__(self):
+        return self.total
+
+    def agregar(self, fila: int, error: str, contenido):
+        contenido = _limpiar_contenido(contenido)
+        self.total += 1
+
+        if len(self.muestra) < settings.ETL_ERRORES_MUESTRA:
+            self.muestra.append({"fila": fila, "error": error, "contenido": contenido})
+
+        llave = clasificar_error(error)
+        self._conteo[llave] += 1
+        self._primera_fila.setdefault(llave, fila)
+
+        self._pendientes.append({
+            "empresa_id": self.empresa_id,
+            "carga_id": self.carga_id,
+            "tipo_archivo": self.tipo_archivo,
+            "fila": fila,
+            "descripcion": error,
+            "contenido": contenido
+        })
+        if len(self._pendientes) >= settings.ETL_CHUNK_SIZE:
+            self.guardar()
+
+    def guardar(self):
+        if self._pendientes:
+            cargar_filas(self.db, ErrorETL, self._pendientes)
+            self._pendientes = []
+
+    def resumen(self):
+        return [
+            {
+                "tipo": tipo,
+                "clave": clave,
+                "filas": n,
+                "primera_fila": self._primera_fila[(tipo, clave)]
+            }
+            for (tipo, clave), n in self._conteo.most_common(settings.ETL_ERRORES_GRUPOS)
+        ]
+
+    def respuesta(self):
+        return {
+            "errores": self.muestra,
+            "total_errores": self.total,
+            "resumen_errores": self.resumen()
+        }
+
+
+# ==========================
+# Errores paginados de una carga
+# Paginación por llave sobre ix_errores_etl_carga_fila (carga_id, fila):
+# cada página empieza después de la última fila de la anterior, sin
+# OFFSET que recorra las páginas previas. Hay un error por fila.
+# ==========================
+def listar_errores_carga(db: Session, carga_id: UUID, despues_de_fila: int = None, por_pagina: int = 100):
+    log = db.query(CargaLog).filter(CargaLog.id == carga_id).first()
+    if not log:
+        raise HTTPException(status_code=404, detail="Carga no encontrada.")
+
+    base = db.query(ErrorETL).filter(ErrorETL.carga_id == carga_id)
+    total = base.count()
+
+    pagina = base
+    if despues_de_fila is not None:
+        pagina = pagina.filter(ErrorETL.fila > despues_de_fila)
+
+    filas = (
+        pagina.order_by(ErrorETL.fila.asc())
+            .limit(por_pagina)
+            .all()
+    )
+
+    return {
+        "carga_id": str(carga_id),
+        "total": total,
+        "por_pagina": por_pagina,
+        "despues_de_fila": despues_de_fila,
+        # Para pedir la siguiente página (None si esta fue la última)
+        "siguiente_despues_de_fila": filas[-1].fila if len(filas) == por_pagina else None,
+        "errores": [
+            {"fila": e.fila, "error": e.descripcion, "contenido": e.contenido}
+            for e in filas
+        ]
+    }
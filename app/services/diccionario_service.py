@@ -1,3 +1,5 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from uuid import UUID
@@ -18,8 +20,11 @@ def crear_dian(db: Session, datos: DIANCreate):
     return registro
 
 
-def listar_dian(db: Session):
-    return db.query(DiccionarioDIAN).filter(DiccionarioDIAN.activo == True).all()
+async def listar_dian_async(db: AsyncSession):
+    resultado = await db.execute(
+        select(DiccionarioDIAN).where(DiccionarioDIAN.activo == True)
+    )
+    return resultado.scalars().all()
 
 
 def actualizar_dian(db: Session, id: UUID, datos: DIANCreate):
@@ -57,11 +62,14 @@ def crear_siigo(db: Session, datos: SIIGOCREATE):
     return registro
 
 
-def listar_siigo(db: Session, empresa_id: UUID):
-    return db.query(DiccionarioSIIGO).filter(
-        DiccionarioSIIGO.empresa_id == empresa_id,
-        DiccionarioSIIGO.activo == True
-    ).all()
+async def listar_siigo_async(db: AsyncSession, empresa_id: UUID):
+    resultado = await db.execute(
+        select(DiccionarioSIIGO).where(
+            DiccionarioSIIGO.empresa_id == empresa_id,
+            DiccionarioSIIGO.activo == True
+        )
+    )
+    return resultado.scalars().all()
 
 
 def actualizar_siigo(db: Session, id: UUID, datos: SIIGOCREATE):
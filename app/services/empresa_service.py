@@ -1,3 +1,5 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from uuid import UUID
@@ -55,28 +57,29 @@ def asignar_usuario_a_empresa(db: Session, usuario_id: UUID, empresa_id: UUID):
     return relacion
 
 
-def listar_empresas_usuario(db: Session, usuario_id: UUID):
-    relaciones = db.query(UsuarioEmpresa).filter(
-        UsuarioEmpresa.usuario_id == usuario_id
-    ).all()
-
-    empresas_ids = [r.empresa_id for r in relaciones]
-
-    return db.query(Empresa).filter(Empresa.id.in_(empresas_ids)).all()
+async def listar_empresas_usuario_async(db: AsyncSession, usuario_id: UUID):
+    resultado = await db.execute(
+        select(Empresa)
+        .join(UsuarioEmpresa, UsuarioEmpresa.empresa_id == Empresa.id)
+        .where(UsuarioEmpresa.usuario_id == usuario_id)
+    )
+    return resultado.scalars().all()
 
 
-def obtener_empresa(db: Session, empresa_id: UUID, usuario_actual):
-    empresa = db.query(Empresa).filter(Empresa.id == empresa_id).first()
+async def obtener_empresa_async(db: AsyncSession, empresa_id: UUID, usuario_actual):
+    empresa = (await db.execute(select(Empresa).where(Empresa.id == empresa_id))).scalars().first()
 
     if not empresa:
         raise HTTPException(status_code=404, detail="Empresa no encontrada.")
 
     # Si NO es admin, solo puede acceder si está asignado
     if usuario_actual.rol != "admin_general":
-        asignada = db.query(UsuarioEmpresa).filter(
-            UsuarioEmpresa.usuario_id == usuario_actual.id,
-            UsuarioEmpresa.empresa_id == empresa_id
-        ).first()
+        asignada = (await db.execute(
+            select(UsuarioEmpresa.id).where(
+                UsuarioEmpresa.usuario_id == usuario_actual.id,
+                UsuarioEmpresa.empresa_id == empresa_id
+            )
+        )).first()
 
         if not asignada:
             raise HTTPException(status_code=403, detail="No tienes acceso a esta empresa.")
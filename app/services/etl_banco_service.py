@@ -1,25 +1,27 @@
-import json
-import unicodedata
+import itertools
+import ijson
 from datetime import datetime
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from uuid import UUID
 
 from app.models.movimientos_banco import MovimientoBANCO
-from app.models.errores_etl import ErrorETL
-from app.models.cargas_log import CargaLog
-
-
-# ==========================
-# Normalización avanzada
-# ==========================
-def normalizar(texto: str):
-    if texto is None:
-        return ""
-    texto = str(texto).upper().strip()
-    texto = unicodedata.normalize("NFKD", texto).encode("ASCII", "ignore").decode()
-    texto = "".join(ch for ch in texto if ch.isalnum() or ch == " ")
-    return " ".join(texto.split())
+from app.core.bulk_loader import cargar_filas
+from app.services.archivos_cargados_service import (
+    calcular_hash,
+    buscar_archivo_cargado,
+    registrar_archivo_cargado,
+    omitir_archivo_repetido
+)
+from app.services.cargas_service import (
+    iniciar_carga,
+    finalizar_carga,
+    fallar_carga,
+    RegistroErrores
+)
+from app.services.resumen_mensual_service import acumular_resumen
+from app.core.aho_corasick import AutomataConceptos
+from app.core.normalizar import normalizar_alfanumerico
 
 
 # ==========================================================================================
@@ -29,112 +31,170 @@ diccionario_banco = [
     # Pega aquí literalmente todas las cadenas de tu captura
 ]
 
-dicc_normalizado = [normalizar(x) for x in diccionario_banco]
+dicc_normalizado = [normalizar_alfanumerico(x) for x in diccionario_banco]
+
+
+# ==========================
+# Autómata de conceptos NBK
+# Se construye una vez y solo se reconstruye si el diccionario cambia
+# ==========================
+_automata_nbk = None
+
+
+def obtener_automata_nbk():
+    global _automata_nbk
+    if _automata_nbk is None or _automata_nbk.conceptos != dicc_normalizado:
+        _automata_nbk = AutomataConceptos(dicc_normalizado)
+    return _automata_nbk
+
+
+# ==========================
+# Lectura incremental del JSON
+# ==========================
+def leer_movimientos_json(archivo):
+    """
+    Entrega uno a uno los movimientos del arreglo raíz del JSON,
+    sin cargar el archivo completo en memoria.
+    """
+    return ijson.items(archivo, "item", use_float=True)
+
+
+# ==========================
+# Clasificación de un movimiento
+# ==========================
+def clasificar_movimiento(item, empresa_id: UUID, automata: AutomataConceptos = None):
+    descripcion_raw = item.get("descripcion") or item.get("Descripcion") or ""
+    fecha_raw = item.get("fecha") or item.get("Fecha")
+    valor_raw = item.get("valor") or item.get("Valor")
+
+    descripcion = normalizar_alfanumerico(descripcion_raw)
+    valor = float(valor_raw)
+
+    # ======================
+    # CLASIFICACIÓN
+    # ======================
+
+    # 1. Si coincide con el diccionario → B-NBK
+    categoria = None
+    concepto = (automata or obtener_automata_nbk()).buscar(descripcion)
+    if concepto is not None:
+        categoria = "B-NBK"
+
+    # 2. Si NO coincide → depende del signo
+    if categoria is None:
+        if valor > 0:
+            categoria = "B-RCJ"
+        else:
+            categoria = "B-EGR"
+
+    abreviatura = categoria
+    tipo_reporte = "Indicadores"
+
+    # ======================
+    # Fecha
+    # ======================
+    fecha = datetime.strptime(str(fecha_raw), "%Y-%m-%d").date()
+
+    # ======================
+    # Crear registro
+    # ======================
+    return {
+        "empresa_id": empresa_id,
+        "fecha": fecha,
+        "descripcion": descripcion_raw,
+        "valor": valor,
+
+        "codigo_movimiento": item.get("codigo_movimiento"),
+        "oficina": item.get("oficina"),
+        "saldo": item.get("saldo"),
+
+        "abreviatura_general": abreviatura,
+        "categoria_general": categoria,
+        "tipo_reporte": tipo_reporte,
+
+        "json_fuente": item,
+
+        # Auditoría: concepto del diccionario que produjo el B-NBK
+        "concepto_nbk": concepto
+    }
 
 
 # ==========================
 # ETL para archivo JSON
 # ==========================
-def procesar_banco_json(db: Session, empresa_id: UUID, file):
+def procesar_banco_json(db: Session, empresa_id: UUID, file, progreso: dict = None):
+    # Archivo idéntico ya cargado → no se procesa de nuevo
+    hash_contenido = calcular_hash(file.file)
+    previo = buscar_archivo_cargado(db, empresa_id, "BANCO", hash_contenido)
+    if previo:
+        return omitir_archivo_repetido(db, empresa_id, "BANCO", file.filename, previo)
+
+    movimientos = leer_movimientos_json(file.file)
+
+    # Se lee el primer movimiento para rechazar de entrada un archivo ilegible
     try:
-        contenido = json.load(file.file)
+        primero = next(movimientos, None)
     except Exception:
         raise HTTPException(400, "No se pudo leer el archivo JSON de bancos")
 
-    registros = 0
-    errores = []
+    contenido = itertools.chain([primero], movimientos) if primero is not None else iter(())
 
-    for idx, item in enumerate(contenido):
+    log = iniciar_carga(db, empresa_id, "BANCO", file.filename)
+    errores = RegistroErrores(db, empresa_id, "BANCO", log.id)
+    progreso = progreso if progreso is not None else {}
+    automata = obtener_automata_nbk()
+    conceptos_nbk = {}
 
+    # Generador: cargar_filas lo consume por lotes, así en memoria
+    # solo vive el lote actual, sin importar el tamaño del archivo
+    def filas_validas():
+        idx = -1
         try:
-            descripcion_raw = item.get("descripcion") or item.get("Descripcion") or ""
-            fecha_raw = item.get("fecha") or item.get("Fecha")
-            valor_raw = item.get("valor") or item.get("Valor")
-
-            descripcion = normalizar(descripcion_raw)
-            valor = float(valor_raw)
-
-            # ======================
-            # CLASIFICACIÓN
-            # ======================
-
-            # 1. Si coincide con el diccionario → B-NBK
-            categoria = None
-            for concepto in dicc_normalizado:
-                if concepto in descripcion:
-                    categoria = "B-NBK"
-                    break
-
-            # 2. Si NO coincide → depende del signo
-            if categoria is None:
-                if valor > 0:
-                    categoria = "B-RCJ"
-                else:
-                    categoria = "B-EGR"
-
-            abreviatura = categoria
-            tipo_reporte = "Indicadores"
-
-            # ======================
-            # Fecha
-            # ======================
-            fecha = datetime.strptime(str(fecha_raw), "%Y-%m-%d").date()
-
-            # ======================
-            # Crear registro
-            # ======================
-            mov = MovimientoBANCO(
-                empresa_id=empresa_id,
-                fecha=fecha,
-                descripcion=descripcion_raw,
-                valor=valor,
-
-                codigo_movimiento=item.get("codigo_movimiento"),
-                oficina=item.get("oficina"),
-                saldo=item.get("saldo"),
-
-                abreviatura_general=abreviatura,
-                categoria_general=categoria,
-                tipo_reporte=tipo_reporte,
-
-                json_fuente=item
-            )
-
-            db.add(mov)
-            registros += 1
-
-        except Exception as e:
-            errores.append({
-                "fila": idx + 1,
-                "error": str(e),
-                "contenido": item
-            })
-
-    db.commit()
+            for idx, item in enumerate(contenido):
+                progreso["leidos"] = idx + 1
+                try:
+                    fila = clasificar_movimiento(item, empresa_id, automata)
+                    if fila["concepto_nbk"] is not None:
+                        conceptos_nbk[fila["concepto_nbk"]] = conceptos_nbk.get(fila["concepto_nbk"], 0) + 1
+                    yield fila
+                except Exception as e:
+                    errores.agregar(idx + 1, str(e), item)
+                    progreso["errores"] = errores.total
+        except ijson.JSONError as e:
+            # Archivo truncado o corrupto: lo ya cargado se conserva
+            errores.agregar(idx + 2, f"JSON inválido a partir de esta fila: {e}", {})
+            progreso["errores"] = errores.total
+
+    # ======================
+    # Carga masiva (COPY) con commits por lotes; los errores se guardan por lotes
+    # Cada lote insertado se suma al resumen mensual en la misma transacción
+    # ======================
+    try:
+        carga = cargar_filas(db, MovimientoBANCO, filas_validas(), progreso=progreso,
+                             ignorar_duplicados=True,
+                             al_insertar=lambda db, filas: acumular_resumen(db, "BANCO", filas))
+        errores.guardar()
+    except Exception as e:
+        fallar_carga(db, log, str(e))
+        raise
+
+    registros = carga["insertados"]
+    duplicados = carga["duplicados"]
 
     # ======================
-    # Registrar log
+    # Cerrar log
     # ======================
-    log = CargaLog(
-        empresa_id=empresa_id,
-        tipo_archivo="BANCO",
-        estado="procesado" if len(errores) == 0 else "error",
-        archivo_nombre=file.filename,
-        mensaje=f"{registros} procesados, {len(errores)} errores"
-    )
-    db.add(log)
-    db.commit()
-
-    # Registrar errores
-    for err in errores:
-        error = ErrorETL(
-            empresa_id=empresa_id,
-            tipo_archivo="BANCO",
-            descripcion=err["error"],
-            contenido=err["contenido"]
-        )
-        db.add(error)
-
-    db.commit()
-
-    return {"procesados": registros, "errores": errores}
+    finalizar_carga(db, log, registros, duplicados, errores.total)
+    # Con filas rechazadas el archivo se puede volver a subir tras corregir el diccionario
+    if errores.total == 0:
+        registrar_archivo_cargado(db, empresa_id, "BANCO", hash_contenido, file.filename, log.id)
+
+    return {
+        "carga_id": str(log.id),
+        "procesados": registros,
+        "duplicados": duplicados,
+        **errores.respuesta(),
+        "conceptos_nbk": conceptos_nbk,
+        "duracion_segundos": carga["duracion_segundos"],
+        "filas_por_segundo": carga["filas_por_segundo"]
+    }
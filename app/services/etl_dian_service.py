@@ -1,33 +1,48 @@
-import pandas as pd
+import itertools
 from datetime import datetime
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from uuid import UUID
-import unicodedata
 
 from app.models.movimientos_dian import MovimientoDIAN
 from app.models.diccionarios import DiccionarioDIAN
-from app.models.errores_etl import ErrorETL
-from app.models.cargas_log import CargaLog
-
-
-# Normalizador
-def normalizar(txt):
-    if txt is None:
-        return None
-    txt = str(txt).upper().strip()
-    txt = unicodedata.normalize('NFKD', txt).encode('ASCII', 'ignore').decode()
-    return " ".join(txt.split())
-
-
-def procesar_dian_excel(db: Session, empresa_id: UUID, file):
+from app.core.bulk_loader import cargar_filas
+from app.core.excel_stream import leer_excel_por_lotes
+from app.core.normalizar import normalizar
+from app.services.archivos_cargados_service import (
+    calcular_hash,
+    buscar_archivo_cargado,
+    registrar_archivo_cargado,
+    omitir_archivo_repetido
+)
+from app.services.cargas_service import (
+    iniciar_carga,
+    finalizar_carga,
+    fallar_carga,
+    RegistroErrores
+)
+from app.services.resumen_mensual_service import acumular_resumen
+
+
+def procesar_dian_excel(db: Session, empresa_id: UUID, file, progreso: dict = None):
+    # Archivo idéntico ya cargado → no se procesa de nuevo
+    hash_contenido = calcular_hash(file.file)
+    previo = buscar_archivo_cargado(db, empresa_id, "DIAN", hash_contenido)
+    if previo:
+        return omitir_archivo_repetido(db, empresa_id, "DIAN", file.filename, previo)
+
+    # Lectura por lotes (1 sola hoja): se abre el primero para rechazar de entrada un archivo ilegible
     try:
-        df = pd.read_excel(file.file, dtype=str)  # 1 sola hoja
+        lotes = leer_excel_por_lotes(file.file)
+        primero = next(lotes, None)
     except Exception:
         raise HTTPException(status_code=400, detail="No se pudo leer archivo DIAN")
 
-    registros = 0
-    errores = []
+    lotes = itertools.chain([primero], lotes) if primero is not None else iter(())
+
+    log = iniciar_carga(db, empresa_id, "DIAN", file.filename)
+    errores = RegistroErrores(db, empresa_id, "DIAN", log.id)
+    progreso = progreso if progreso is not None else {}
 
     # Cargar diccionario DIAN
     dicc = {
@@ -36,85 +51,87 @@ def procesar_dian_excel(db: Session, empresa_id: UUID, file):
                   .filter(DiccionarioDIAN.activo == True)
     }
 
-    for idx, row in df.iterrows():
-        try:
-            grupo = normalizar(row.get("Grupo"))
-            tipo_doc = normalizar(row.get("Tipo de documento"))
-            llave = f"{grupo}_{tipo_doc}"
-
-            if llave not in dicc:
-                raise ValueError(f"No existe en diccionario DIAN: {grupo} / {tipo_doc}")
+    def filas_validas():
+        for df in lotes:
+            for idx, row in df.iterrows():
+                progreso["leidos"] = idx + 1
+                try:
+                    grupo = normalizar(row.get("Grupo"))
+                    tipo_doc = normalizar(row.get("Tipo de documento"))
+                    llave = f"{grupo}_{tipo_doc}"
 
-            regla = dicc[llave]
+                    if llave not in dicc:
+                        raise ValueError(f"No existe en diccionario DIAN: {grupo} / {tipo_doc}")
 
-            total = float(row.get("Total") or 0)
-            iva = float(row.get("IVA") or 0)
-            total_bruto = total - iva
+                    regla = dicc[llave]
 
-            fecha_em = row.get("Fecha Emisión")
-            fecha_rec = row.get("Fecha Recepción")
+                    # Sin CUFE/CUDE no hay llave: todos chocarían entre sí
+                    cufe_cude = row.get("CUFE/CUDE")
+                    if not isinstance(cufe_cude, str) or not cufe_cude.strip():
+                        raise ValueError("Documento DIAN sin CUFE/CUDE")
 
-            mov = MovimientoDIAN(
-                empresa_id=empresa_id,
+                    total = float(row.get("Total") or 0)
+                    iva = float(row.get("IVA") or 0)
+                    total_bruto = total - iva
 
-                grupo=grupo,
-                tipo_documento=tipo_doc,
+                    fecha_em = row.get("Fecha Emisión")
+                    fecha_rec = row.get("Fecha Recepción")
 
-                fecha_emision=datetime.strptime(str(fecha_em), "%Y-%m-%d").date() if fecha_em else None,
-                fecha_recepcion=datetime.strptime(str(fecha_rec), "%Y-%m-%d").date() if fecha_rec else None,
+                    yield {
+                        "empresa_id": empresa_id,
 
-                cufe_cude=row.get("CUFE/CUDE"),
-                folio=row.get("Folio"),
-                divisa=row.get("Divisa"),
+                        "grupo": grupo,
+                        "tipo_documento": tipo_doc,
 
-                nit_emisor=row.get("NIT Emisor"),
-                nombre_emisor=row.get("Nombre Emisor"),
-                nit_receptor=row.get("NIT Receptor"),
-                nombre_receptor=row.get("Nombre Receptor"),
+                        "fecha_emision": datetime.strptime(str(fecha_em), "%Y-%m-%d").date() if fecha_em else None,
+                        "fecha_recepcion": datetime.strptime(str(fecha_rec), "%Y-%m-%d").date() if fecha_rec else None,
 
-                total=total,
-                iva=iva,
-                total_bruto=total_bruto,
+                        "cufe_cude": cufe_cude,
+                        "folio": row.get("Folio"),
+                        "divisa": row.get("Divisa"),
 
-                abreviatura_general=regla.abreviatura_general,
-                categoria_general=regla.categoria_general,
-                tipo_reporte=regla.tipo_reporte
-            )
+                        "nit_emisor": row.get("NIT Emisor"),
+                        "nombre_emisor": row.get("Nombre Emisor"),
+                        "nit_receptor": row.get("NIT Receptor"),
+                        "nombre_receptor": row.get("Nombre Receptor"),
 
-            db.add(mov)
-            registros += 1
+                        "total": total,
+                        "iva": iva,
+                        "total_bruto": total_bruto,
 
-        except Exception as e:
-            errores.append({
-                "fila": idx + 2,
-                "error": str(e),
-                "contenido": row.to_dict()
-            })
+                        "abreviatura_general": regla.abreviatura_general,
+                        "categoria_general": regla.categoria_general,
+                        "tipo_reporte": regla.tipo_reporte
+                    }
 
-    db.commit()
+                except Exception as e:
+                    errores.agregar(idx + 2, str(e), row.to_dict())
+                    progreso["errores"] = errores.total
 
-    # Crear Log
-    log = CargaLog(
-        empresa_id=empresa_id,
-        tipo_archivo="DIAN",
-        estado="procesado" if len(errores) == 0 else "error",
-        archivo_nombre=file.filename,
-        mensaje=f"{registros} procesados, {len(errores)} errores"
-    )
-
-    db.add(log)
-    db.commit()
-
-    # Guardar errores
-    for err in errores:
-        error = ErrorETL(
-            empresa_id=empresa_id,
-            tipo_archivo="DIAN",
-            descripcion=err["error"],
-            contenido=err["contenido"]
-        )
-        db.add(error)
-
-    db.commit()
-
-    return {"procesados": registros, "errores": errores}
+    # Carga masiva (COPY) con commits por lotes; los errores se guardan por lotes
+    # Cada lote insertado se suma al resumen mensual en la misma transacción
+    try:
+        carga = cargar_filas(db, MovimientoDIAN, filas_validas(), progreso=progreso,
+                             ignorar_duplicados=True,
+                             al_insertar=lambda db, filas: acumular_resumen(db, "DIAN", filas))
+        errores.guardar()
+    except Exception as e:
+        fallar_carga(db, log, str(e))
+        raise
+
+    registros = carga["insertados"]
+    duplicados = carga["duplicados"]
+
+    finalizar_carga(db, log, registros, duplicados, errores.total)
+    # Con filas rechazadas el archivo se puede volver a subir tras corregir el diccionario
+    if errores.total == 0:
+        registrar_archivo_cargado(db, empresa_id, "DIAN", hash_contenido, file.filename, log.id)
+
+    return {
+        "carga_id": str(log.id),
+        "procesados": registros,
+        "duplicados": duplicados,
+        **errores.respuesta(),
+        "duracion_segundos": carga["duracion_segundos"],
+        "filas_por_segundo": carga["filas_por_segundo"]
+    }
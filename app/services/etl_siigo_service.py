@@ -1,38 +1,167 @@
+import itertools
 import pandas as pd
 from datetime import datetime
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from uuid import UUID
-import unicodedata
 
 from app.models.movimientos_siigo import MovimientoSIIGO
 from app.models.diccionarios import DiccionarioSIIGO
-from app.models.errores_etl import ErrorETL
-from app.models.cargas_log import CargaLog
+from app.core.bulk_loader import cargar_filas
+from app.core.excel_stream import leer_excel_por_lotes
+from app.core.normalizar import normalizar, normalizar_serie
+from app.services.archivos_cargados_service import (
+    calcular_hash,
+    buscar_archivo_cargado,
+    registrar_archivo_cargado,
+    omitir_archivo_repetido
+)
+from app.services.cargas_service import (
+    iniciar_carga,
+    finalizar_carga,
+    fallar_carga,
+    RegistroErrores
+)
+from app.services.resumen_mensual_service import acumular_resumen
 
 
 # ==========================
-# Normalizador de texto
+# Columnas del Excel que pasan sin transformación
 # ==========================
-def normalizar(texto):
-    if texto is None:
-        return None
-    texto = str(texto).upper().strip()
-    texto = unicodedata.normalize('NFKD', texto).encode('ASCII', 'ignore').decode()
-    return " ".join(texto.split())
+COLUMNAS_DIRECTAS = {
+    "Secuencia": "secuencia",
+    "Descripción": "descripcion",
+    "Detalle": "detalle",
+    "Código contable": "codigo_contable",
+    "Cuenta contable": "cuenta_contable",
+    "Identificación": "identificacion",
+    "Nombre tercero": "nombre_tercero",
+    "Centro de costo": "centro_costo",
+}
+
+
+def _columna(df, nombre):
+    if nombre in df.columns:
+        return df[nombre]
+    return pd.Series([None] * len(df), index=df.index, dtype=object)
+
+
+def _convertir_con_respaldo(convertidos, crudos, malos, convertir):
+    """
+    Las filas que la conversión vectorizada no pudo interpretar se
+    reintentan con la conversión escalar original; así el mensaje de
+    error por fila es exactamente el mismo de antes.
+    """
+    errores = pd.Series(None, index=crudos.index, dtype=object)
+    for idx in crudos.index[malos]:
+        try:
+            convertidos.at[idx] = convertir(crudos.at[idx])
+        except Exception as e:
+            errores.at[idx] = str(e)
+    return errores
+
+
+def _columna_numerica(crudos):
+    vacios = crudos.isna() | (crudos == "")
+    numeros = pd.to_numeric(crudos, errors="coerce").astype(float)
+    numeros[vacios] = 0.0
+    malos = numeros.isna() & ~vacios
+    errores = _convertir_con_respaldo(numeros, crudos, malos, float)
+    return numeros, errores
+
+
+# ==========================
+# Transformación vectorizada
+# ==========================
+def transformar_siigo(df, dicc: dict, empresa_id: UUID):
+    """
+    Devuelve (validos, errores):
+    - validos: DataFrame con las columnas de movimientos_siigo
+    - errores: lista [{"fila", "error", "contenido"}] igual a la del ETL fila a fila
+    """
+
+    # Comprobante normalizado + cruce con el diccionario
+    comprobantes = normalizar_serie(_columna(df, "Comprobante"))
+
+    reglas_df = pd.DataFrame(
+        [
+            {
+                "_comprobante": llave,
+                "abreviatura_general": regla.abreviatura_general,
+                "categoria_general": regla.categoria_general,
+                "tipo_reporte": regla.tipo_reporte,
+            }
+            for llave, regla in dicc.items()
+        ],
+        columns=["_comprobante", "abreviatura_general", "categoria_general", "tipo_reporte"]
+    )
+    reglas = (
+        pd.DataFrame({"_comprobante": comprobantes.values})
+        .merge(reglas_df, how="left", on="_comprobante", indicator="_origen")
+    )
+    reglas.index = df.index
+    en_dicc = reglas["_origen"] == "both"
+
+    # Fecha de elaboración
+    fechas_raw = _columna(df, "Fecha elaboración")
+    fechas = pd.to_datetime(fechas_raw, format="%Y-%m-%d", errors="coerce")
+    err_fecha = _convertir_con_respaldo(
+        fechas, fechas_raw, fechas.isna(),
+        lambda v: datetime.strptime(str(v), "%Y-%m-%d")
+    )
+
+    # Débito / Crédito
+    debitos, err_debito = _columna_numerica(_columna(df, "Débito"))
+    creditos, err_credito = _columna_numerica(_columna(df, "Crédito"))
+
+    # Primer error por fila, en el mismo orden de validación de siempre
+    error = pd.Series(None, index=df.index, dtype=object)
+    error[~en_dicc] = "Comprobante no existe en diccionario SIIGO: " + comprobantes[~en_dicc].astype(str)
+    for err in (err_fecha, err_debito, err_credito):
+        error = error.where(error.notna(), err)
+
+    malos = error.notna()
+    ok = ~malos
+
+    errores = [
+        {"fila": idx + 2, "error": error.at[idx], "contenido": contenido}
+        for idx, contenido in zip(df.index[malos], df[malos].to_dict("records"))
+    ]
+
+    validos = pd.DataFrame({
+        "empresa_id": empresa_id,
+        "fecha_elaboracion": fechas[ok].dt.date,
+        "comprobante": comprobantes[ok],
+        **{destino: _columna(df, origen)[ok] for origen, destino in COLUMNAS_DIRECTAS.items()},
+        "debito": debitos[ok],
+        "credito": creditos[ok],
+        "valor": (debitos - creditos)[ok],  # regla confirmada
+        "abreviatura_general": reglas["abreviatura_general"][ok],
+        "categoria_general": reglas["categoria_general"][ok],
+        "tipo_reporte": reglas["tipo_reporte"][ok],
+    })
+
+    return validos, errores
 
 
 # ==========================
 # ETL SIIGO
 # ==========================
-def procesar_siigo_excel(db: Session, empresa_id: UUID, file):
+def procesar_siigo_excel(db: Session, empresa_id: UUID, file, progreso: dict = None):
+    # Archivo idéntico ya cargado → no se procesa de nuevo
+    hash_contenido = calcular_hash(file.file)
+    previo = buscar_archivo_cargado(db, empresa_id, "SIIGO", hash_contenido)
+    if previo:
+        return omitir_archivo_repetido(db, empresa_id, "SIIGO", file.filename, previo)
+
+    # Lectura por lotes: se abre el primero para rechazar de entrada un archivo ilegible
     try:
-        df = pd.read_excel(file.file, dtype=str)  # lectura exacta del Excel
+        lotes = leer_excel_por_lotes(file.file)
+        primero = next(lotes, None)
     except Exception:
         raise HTTPException(400, "No se pudo leer el archivo Excel SIIGO.")
 
-    registros = 0
-    errores = []
+    lotes = itertools.chain([primero], lotes) if primero is not None else iter(())
 
     # Cargar diccionario SIIGO de la empresa
     dicc = {
@@ -42,76 +171,47 @@ def procesar_siigo_excel(db: Session, empresa_id: UUID, file):
                               DiccionarioSIIGO.activo == True)
     }
 
-    for idx, row in df.iterrows():
-        try:
-            comprobante = normalizar(row.get("Comprobante"))
-            fecha_elab = row.get("Fecha elaboración")
-            debito = row.get("Débito")
-            credito = row.get("Crédito")
-
-            if comprobante not in dicc:
-                raise ValueError(f"Comprobante no existe en diccionario SIIGO: {comprobante}")
-
-            regla = dicc[comprobante]
-
-            fecha = datetime.strptime(str(fecha_elab), "%Y-%m-%d").date()
-
-            deb = float(debito) if debito else 0
-            cre = float(credito) if credito else 0
-            valor = deb - cre  # regla confirmada
-
-            mov = MovimientoSIIGO(
-                empresa_id=empresa_id,
-                fecha_elaboracion=fecha,
-                comprobante=comprobante,
-                secuencia=row.get("Secuencia"),
-                descripcion=row.get("Descripción"),
-                detalle=row.get("Detalle"),
+    log = iniciar_carga(db, empresa_id, "SIIGO", file.filename)
+    errores = RegistroErrores(db, empresa_id, "SIIGO", log.id)
+    progreso = progreso if progreso is not None else {}
 
-                codigo_contable=row.get("Código contable"),
-                cuenta_contable=row.get("Cuenta contable"),
-                identificacion=row.get("Identificación"),
-                nombre_tercero=row.get("Nombre tercero"),
-                centro_costo=row.get("Centro de costo"),
+    def filas_validas():
+        leidos = 0
+        for df in lotes:
+            validos, errores_lote = transformar_siigo(df, dicc, empresa_id)
+            for err in errores_lote:
+                errores.agregar(err["fila"], err["error"], err["contenido"])
 
-                debito=deb,
-                credito=cre,
-                valor=valor,
+            leidos += len(df)
+            progreso["leidos"] = leidos
+            progreso["errores"] = errores.total
 
-                abreviatura_general=regla.abreviatura_general,
-                categoria_general=regla.categoria_general,
-                tipo_reporte=regla.tipo_reporte
-            )
+            yield from validos.to_dict("records")
 
-            db.add(mov)
-            registros += 1
-
-        except Exception as e:
-            errores.append({"fila": idx + 2, "error": str(e), "contenido": row.to_dict()})
-
-    db.commit()
-
-    # Registrar log
-    log = CargaLog(
-        empresa_id=empresa_id,
-        tipo_archivo="SIIGO",
-        estado="procesado" if len(errores) == 0 else "error",
-        archivo_nombre=file.filename,
-        mensaje=f"{registros} procesados, {len(errores)} errores"
-    )
-    db.add(log)
-    db.commit()
-
-    # Registrar errores
-    for err in errores:
-        error = ErrorETL(
-            empresa_id=empresa_id,
-            tipo_archivo="SIIGO",
-            descripcion=err["error"],
-            contenido=err["contenido"]
-        )
-        db.add(error)
-
-    db.commit()
-
-    return {"procesados": registros, "errores": errores}
+    # Carga masiva (COPY) con commits por lotes; los errores se guardan por lotes
+    # Cada lote insertado se suma al resumen mensual en la misma transacción
+    try:
+        carga = cargar_filas(db, MovimientoSIIGO, filas_validas(), progreso=progreso,
+                             ignorar_duplicados=True,
+                             al_insertar=lambda db, filas: acumular_resumen(db, "SIIGO", filas))
+        errores.guardar()
+    except Exception as e:
+        fallar_carga(db, log, str(e))
+        raise
+
+    registros = carga["insertados"]
+    duplicados = carga["duplicados"]
+
+    finalizar_carga(db, log, registros, duplicados, errores.total)
+    # Con filas rechazadas el archivo se puede volver a subir tras corregir el diccionario
+    if errores.total == 0:
+        registrar_archivo_cargado(db, empresa_id, "SIIGO", hash_contenido, file.filename, log.id)
+
+    return {
+        "carga_id": str(log.id),
+        "procesados": registros,
+        "duplicados": duplicados,
+        **errores.respuesta(),
+        "duracion_segundos": carga["duracion_segundos"],
+        "filas_por_segundo": carga["filas_por_segundo"]
+    }
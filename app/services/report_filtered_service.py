@@ -1,69 +1,82 @@
+from sqlalchemy import func, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.models.movimientos_dian import MovDian
-from app.models.movimientos_banco import MovBanco
-from app.models.movimientos_siigo import MovSiigo
-from app.core.periods import apply_period_filter
+from app.core.filters import filtrar_por_rango
+from app.core.report_cache import cacheado
+from app.services.resumen_mensual_service import FUENTES_RESUMEN, estado_sql
+
+
+CATEGORIAS = [
+    "E-DE", "E-DSS",
+    "R-DE", "R-DNE",
+    "O-EGR", "O-RCJ", "O-NBK"
+]
 
 
 # ------------------------------------------------------------
-#  CLASIFICADOR DE ESTADOS: PUB / CON / PNI
+#  CONTEOS POR CATEGORÍA Y ESTADO: PUB / CON / PNI
+#  El estado se calcula en SQL con las reglas de
+#  resumen_mensual_service.estado_sql:
+#  - SIIGO: RCJ positivo, EGR negativo y NBK → CON; lo demás PNI
+#  - DIAN: siempre PUB
+#  - BANCO: B-RCJ / B-EGR / B-NBK → PUB; lo demás PNI
 # ------------------------------------------------------------
 
-def clasificar_estado_siigo(mov):
+def _conteo(fuente: str, empresa_id, fecha_inicio, fecha_fin):
     """
-    Clasifica los movimientos de SIIGO según la naturaleza válida.
-    - CON → si la naturaleza es correcta según categoría
-    - PNI → categoría válida pero naturaleza inválida
-    - PUB → NO aplica para SIIGO (solo se publica DIAN y Banco)
+    SELECT categoria, estado, COUNT(*) de una fuente. Para SIIGO cuenta
+    un movimiento por comprobante (DISTINCT ON comprobante, secuencia).
     """
+    modelo, col_fecha, col_valor = FUENTES_RESUMEN[fuente]
+    fecha_col = getattr(modelo, col_fecha)
+
+    filas = (
+        select(
+            modelo.categoria_general.label("categoria"),
+            estado_sql(fuente, modelo, getattr(modelo, col_valor)).label("estado")
+        )
+        .where(modelo.categoria_general.in_(CATEGORIAS))
+    )
+    filas = filtrar_por_rango(filas, fecha_col, fecha_inicio, fecha_fin)
 
-    valor = (mov.debito or 0) - (mov.credito or 0)
-    categoria = mov.categoria_general
-
-    # --- RCJ (debe ser valor positivo)
-    if categoria == "O-RCJ":
-        if valor > 0:
-            return "CON"
-        else:
-            return "PNI"
+    if empresa_id:
+        filas = filas.where(modelo.empresa_id == empresa_id)
 
-    # --- EGR (debe ser valor negativo)
-    if categoria == "O-EGR":
-        if valor < 0:
-            return "CON"
-        else:
-            return "PNI"
+    if fuente == "SIIGO":
+        filas = (
+            filas.distinct(modelo.comprobante, modelo.secuencia)
+                 .order_by(modelo.comprobante, modelo.secuencia, fecha_col, modelo.id)
+        )
 
-    # --- NBK (siempre CON por reglas de negocio)
-    if categoria == "O-NBK":
-        return "CON"
+    filas = filas.subquery()
+    return (
+        select(filas.c.categoria, filas.c.estado, func.count().label("total"))
+        .group_by(filas.c.categoria, filas.c.estado)
+    )
 
-    # Categoría no contemplada
-    return "PNI"
 
+# ------------------------------------------------------------
+#  SERVICIO PRINCIPAL DE REPORTE CON FILTROS
+# ------------------------------------------------------------
 
-def clasificar_estado_dian(_mov):
-    """DIAN siempre es PUBLICADO"""
-    return "PUB"
+def consulta_reporte_filtrado(empresa_id=None, fecha_inicio=None, fecha_fin=None):
+    """Conteos de las tres fuentes en una consulta (UNION ALL)."""
+    return union_all(*[
+        _conteo(fuente, empresa_id, fecha_inicio, fecha_fin)
+        for fuente in ("DIAN", "BANCO", "SIIGO")
+    ])
 
 
-def clasificar_estado_banco(mov):
-    """
-    Banco:
-    - RCJ (valor > 0) → PUB
-    - EGR (valor < 0) → PUB
-    - NBK → 1 PUB por JSON (ya viene consolidado desde SQL)
-    """
-    if mov.categoria_general in ("B-RCJ", "B-EGR", "B-NBK"):
-        return "PUB"
+def _armar_reporte_filtrado(filas):
+    resultado = {cat: {"PUB": 0, "CON": 0, "PNI": 0} for cat in CATEGORIAS}
 
-    return "PNI"
+    for fila in filas:
+        resultado[fila.categoria][fila.estado] += fila.total
 
+    return resultado
 
-# ------------------------------------------------------------
-#  SERVICIO PRINCIPAL DE REPORTE CON FILTROS
-# ------------------------------------------------------------
 
+@cacheado
 def generar_reporte_filtrado(db: Session, empresa_id=None, fecha_inicio=None, fecha_fin=None):
     """
     Devuelve el estado consolidado PUB / CON / PNI para cada categoría.
@@ -71,74 +84,16 @@ def generar_reporte_filtrado(db: Session, empresa_id=None, fecha_inicio=None, fe
     - DIAN
     - BANCO
     - SIIGO
-    """
 
-    # Aplicar filtros de fechas o periodos
-    filtros_siigo = apply_period_filter(MovSiigo.fecha, fecha_inicio, fecha_fin)
-    filtros_dian = apply_period_filter(MovDian.fecha_emision, fecha_inicio, fecha_fin)
-    filtros_banco = apply_period_filter(MovBanco.fecha, fecha_inicio, fecha_fin)
+    Se cuenta en la base (una consulta, UNION ALL de las tres fuentes);
+    no se cargan los movimientos.
+    """
+    consulta = consulta_reporte_filtrado(empresa_id, fecha_inicio, fecha_fin)
+    return _armar_reporte_filtrado(db.execute(consulta))
 
-    if empresa_id:
-        filtros_siigo.append(MovSiigo.empresa_id == empresa_id)
-        filtros_dian.append(MovDian.empresa_id == empresa_id)
-        filtros_banco.append(MovBanco.empresa_id == empresa_id)
-
-    # ------------------------------------------------------------
-    # 1. Obtener movimientos
-    # ------------------------------------------------------------
-    movs_siigo = db.query(MovSiigo).filter(*filtros_siigo).all()
-    movs_dian = db.query(MovDian).filter(*filtros_dian).all()
-    movs_banco = db.query(MovBanco).filter(*filtros_banco).all()
-
-    # ------------------------------------------------------------
-    # 2. Estructura base del reporte (todas las categorías posibles)
-    # ------------------------------------------------------------
-
-    categorias = [
-        "E-DE", "E-DSS",
-        "R-DE", "R-DNE",
-        "O-EGR", "O-RCJ", "O-NBK"
-    ]
-
-    resultado = {cat: {"PUB": 0, "CON": 0, "PNI": 0} for cat in categorias}
-
-    # ------------------------------------------------------------
-    # 3. Procesar DIAN
-    # ------------------------------------------------------------
-    for mov in movs_dian:
-        cat = mov.categoria_general
-        if cat in resultado:
-            estado = clasificar_estado_dian(mov)
-            resultado[cat][estado] += 1
-
-    # ------------------------------------------------------------
-    # 4. Procesar BANCO
-    # ------------------------------------------------------------
-    for mov in movs_banco:
-        cat = mov.categoria_general
-        if cat in resultado:
-            estado = clasificar_estado_banco(mov)
-            resultado[cat][estado] += 1
-
-    # ------------------------------------------------------------
-    # 5. Procesar SIIGO
-    # ------------------------------------------------------------
-    comprobantes_vistos = set()
-
-    for mov in movs_siigo:
-        cat = mov.categoria_general
-        if cat not in resultado:
-            continue
-
-        # Agrupación por comprobante
-        comp_key = f"{mov.comprobante}-{mov.secuencia}"
-
-        if comp_key in comprobantes_vistos:
-            continue
-
-        comprobantes_vistos.add(comp_key)
-
-        estado = clasificar_estado_siigo(mov)
-        resultado[cat][estado] += 1
 
-    return resultado
+@cacheado
+async def generar_reporte_filtrado_async(db: AsyncSession, empresa_id=None, fecha_inicio=None, fecha_fin=None):
+    """generar_reporte_filtrado sobre una AsyncSession."""
+    consulta = consulta_reporte_filtrado(empresa_id, fecha_inicio, fecha_fin)
+    return _armar_reporte_filtrado(await db.execute(consulta))
@@ -1,10 +1,12 @@
 # app/services/report_global_service.py
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.database.connection import get_db
 from fastapi import Depends
 
 from app.core.periods import get_period_range
 from app.core.filters import apply_filters_global
+from app.core.report_cache import cacheado
 from sqlalchemy import text
 
 
@@ -27,43 +29,56 @@ def calcular_indicadores_empresa(data_empresa):
     return avance, rezago, calidad
 
 
-def obtener_pni_por_categoria(db: Session, empresa_id: str, fecha_ini, fecha_fin):
+SQL_PNI_POR_EMPRESA = text("""
+    SELECT
+        empresa_id,
+        categoria_general,
+        COUNT(*) AS pni
+    FROM movimientos_siigo
+    WHERE fecha_elaboracion BETWEEN :f_ini AND :f_fin
+      AND (codigo_contable LIKE '1110%' OR codigo_contable LIKE '1120%')
+      AND NOT (
+            (categoria_general = 'O-RCJ' AND valor > 0)
+         OR (categoria_general = 'O-EGR' AND valor < 0)
+         OR categoria_general = 'O-NBK'
+      )
+    GROUP BY empresa_id, categoria_general;
+""")
+
+
+def obtener_pni_por_empresa(db: Session, fecha_ini, fecha_fin):
     """
-    Obtiene los PNI (movimientos SIIGO con código 1110/1120 y sin categoría válida)
-    agrupados por categoría contable.
+    Obtiene los PNI (movimientos SIIGO con código 1110/1120 sin naturaleza
+    válida para su categoría) de todas las empresas en una sola consulta,
+    agrupados por empresa y categoría contable.
+
+    Devuelve {empresa_id: {categoria: pni}}.
     """
-    sql = text("""
-        SELECT 
-            empresa_id,
-            categoria_general,
-            COUNT(*) AS pni
-        FROM movimientos_siigo
-        WHERE empresa_id = :empresa
-          AND fecha BETWEEN :f_ini AND :f_fin
-          AND (codigo_contable LIKE '1110%' OR codigo_contable LIKE '1120%')
-          AND categoria_general IS NULL
-        GROUP BY empresa_id, categoria_general;
-    """)
-
-    rows = db.execute(sql, {"empresa": empresa_id, "f_ini": fecha_ini, "f_fin": fecha_fin}).fetchall()
-
-    result = {cat: 0 for cat in CATEGORIAS}
+    rows = db.execute(SQL_PNI_POR_EMPRESA, {"f_ini": fecha_ini, "f_fin": fecha_fin}).fetchall()
+    return agrupar_pni(rows)
+
+
+def agrupar_pni(rows):
+    result = {}
     for r in rows:
-        result[r.categoria_general] = r.pni if r.categoria_general else 0
+        if r.categoria_general in CATEGORIAS:
+            result.setdefault(r.empresa_id, {})[r.categoria_general] = r.pni
 
     return result
 
 
+SQL_MATRIZ = text("""
+    SELECT *
+    FROM vista_reporte_matriz
+    WHERE fecha BETWEEN :f_ini AND :f_fin;
+""")
+
+
 def obtener_matriz_sql(db: Session, fecha_ini, fecha_fin):
     """
     Obtiene los valores PUB/CON/PNC desde la vista oficial.
     """
-    sql = text("""
-        SELECT *
-        FROM vista_reporte_matriz
-        WHERE fecha BETWEEN :f_ini AND :f_fin;
-    """)
-    return db.execute(sql, {"f_ini": fecha_ini, "f_fin": fecha_fin}).fetchall()
+    return db.execute(SQL_MATRIZ, {"f_ini": fecha_ini, "f_fin": fecha_fin}).fetchall()
 
 
 def build_empresa_json(row, pni_dict):
@@ -110,21 +125,13 @@ def build_empresa_json(row, pni_dict):
     return empresa_json
 
 
-def reporte_global(periodo: str, db: Session):
-    """
-    Servicio principal del Reporte Global Multiempresa.
-    """
-
-    fecha_ini, fecha_fin = get_period_range(periodo)
-
-    matriz_rows = obtener_matriz_sql(db, fecha_ini, fecha_fin)
-
+def armar_reporte_global(matriz_rows, pni_empresas):
     empresas_json = []
     totales = {"pub_total": 0, "con_total": 0, "pnc_total": 0, "pni_total": 0}
 
     for row in matriz_rows:
 
-        pni_dict = obtener_pni_por_categoria(db, row.empresa_id, fecha_ini, fecha_fin)
+        pni_dict = pni_empresas.get(row.empresa_id, {})
 
         empresa_json = build_empresa_json(row, pni_dict)
 
@@ -151,3 +158,32 @@ def reporte_global(periodo: str, db: Session):
         "empresas": empresas_json,
         "totales": totales
     }
+
+
+@cacheado
+def reporte_global(periodo: str, db: Session):
+    """
+    Servicio principal del Reporte Global Multiempresa.
+    """
+
+    fecha_ini, fecha_fin = get_period_range(periodo)
+
+    matriz_rows = obtener_matriz_sql(db, fecha_ini, fecha_fin)
+    pni_empresas = obtener_pni_por_empresa(db, fecha_ini, fecha_fin)
+
+    return armar_reporte_global(matriz_rows, pni_empresas)
+
+
+@cacheado
+async def reporte_global_async(periodo: str, db: AsyncSession):
+    """
+    reporte_global sobre una AsyncSession.
+    """
+
+    fecha_ini, fecha_fin = get_period_range(periodo)
+    parametros = {"f_ini": fecha_ini, "f_fin": fecha_fin}
+
+    matriz_rows = (await db.execute(SQL_MATRIZ, parametros)).fetchall()
+    pni_empresas = agrupar_pni((await db.execute(SQL_PNI_POR_EMPRESA, parametros)).fetchall())
+
+    return armar_reporte_global(matriz_rows, pni_empresas)
@@ -1,8 +1,11 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from datetime import date
 from app.core.periods import obtener_rango_periodo
-from app.core.report_engine import ejecutar_sql
+from app.core.report_engine import ejecutar_sql, ejecutar_sql_async
+from app.core.report_cache import cacheado
+from app.core.ejecucion_paralela import en_paralelo, en_paralelo_async
 
 # Categorías oficiales del sistema
 CATEGORIAS = [
@@ -18,13 +21,9 @@ def inicializar_categorias():
 
 
 # --------------------------------------------------------------
-# PUBLICADOS – DIAN + BANCO
+# PUBLICADOS – DIAN
 # --------------------------------------------------------------
-def obtener_publicados(db: Session, empresa_id: str, inicio: date, fin: date):
-    publicados = inicializar_categorias()
-
-    # ---------------------- DIAN -------------------------
-    sql_dian = """
+SQL_DIAN = """
         SELECT
             empresa_id,
             categoria_general,
@@ -48,19 +47,33 @@ def obtener_publicados(db: Session, empresa_id: str, inicio: date, fin: date):
         AND activo = TRUE;
     """
 
-    filas_dian = ejecutar_sql(db, sql_dian, {
+
+def obtener_publicados_dian(db: Session, empresa_id: str, inicio: date, fin: date):
+    return agrupar_publicados(ejecutar_sql(db, SQL_DIAN, {
         "empresa_id": empresa_id,
         "inicio": inicio,
         "fin": fin
-    })
+    }))
 
-    for f in filas_dian:
+
+# --------------------------------------------------------------
+# PUBLICADOS: filas por categoría (las de otras categorías se omiten)
+# --------------------------------------------------------------
+def agrupar_publicados(filas):
+    publicados = inicializar_categorias()
+
+    for f in filas:
         categoria = f["categoria_general"]
         if categoria in publicados:
             publicados[categoria].append(f)
 
-    # ---------------------- BANCO RCJ / EGR / NBK -------------------------
-    sql_banco = """
+    return publicados
+
+
+# --------------------------------------------------------------
+# PUBLICADOS – BANCO RCJ / EGR / NBK
+# --------------------------------------------------------------
+SQL_BANCO = """
         SELECT
             empresa_id,
             categoria_general,
@@ -78,138 +91,102 @@ def obtener_publicados(db: Session, empresa_id: str, inicio: date, fin: date):
         ORDER BY fecha ASC;
     """
 
-    filas_banco = ejecutar_sql(db, sql_banco, {
+
+def obtener_publicados_banco(db: Session, empresa_id: str, inicio: date, fin: date):
+    return agrupar_publicados(ejecutar_sql(db, SQL_BANCO, {
         "empresa_id": empresa_id,
         "inicio": inicio,
         "fin": fin
-    })
-
-    for f in filas_banco:
-        categoria = f["categoria_general"]
-        if categoria in publicados:
-            publicados[categoria].append(f)
-
-    return publicados
+    }))
 
 
 # --------------------------------------------------------------
-# CONTABILIZADOS – SIIGO
+# CONTABILIZADOS y POR IDENTIFICAR – SIIGO en un solo recorrido
+#
+# Reglas de naturaleza (evaluadas en SQL):
+#   CON → todo, salvo O-RCJ con valor <= 0 y O-EGR con valor >= 0
+#         (O-NBK siempre es válido; el resto de categorías pasa directo)
+#   PNI → códigos 1110 / 1120 que no son RCJ positivo, EGR negativo
+#         ni NBK (sin código contable no es PNI: NOT (NULL LIKE …)
+#         es NULL y caería en el ELSE)
+# Una fila de otra categoría con código 1110/1120 queda en ambos.
 # --------------------------------------------------------------
-def obtener_contabilizados(db: Session, empresa_id: str, inicio: date, fin: date):
-    contabilizados = inicializar_categorias()
-
-    sql_siigo = """
-        SELECT
-            empresa_id,
-            categoria_general,
-            abreviatura_general,
-            codigo_contable,
-            cuenta_contable,
-            identificacion_tercero,
-            nombre_tercero,
-            comprobante,
-            secuencia,
-            fecha_elaboracion,
-            descripcion_general,
-            detalle,
-            centro_costo,
-            debito,
-            credito,
-            (debito - credito) AS valor
-        FROM movimientos_siigo
-        WHERE empresa_id = :empresa_id
-        AND fecha_elaboracion BETWEEN :inicio AND :fin
-        AND activo = TRUE;
+MARCAS_SIIGO = ("es_con", "es_pni")
+
+
+SQL_SIIGO = """
+        SELECT *
+        FROM (
+            SELECT
+                empresa_id,
+                categoria_general,
+                abreviatura_general,
+                codigo_contable,
+                cuenta_contable,
+                identificacion_tercero,
+                nombre_tercero,
+                comprobante,
+                secuencia,
+                fecha_elaboracion,
+                descripcion_general,
+                detalle,
+                centro_costo,
+                debito,
+                credito,
+                (debito - credito) AS valor,
+                CASE
+                    WHEN categoria_general = 'O-RCJ' AND (debito - credito) <= 0 THEN FALSE
+                    WHEN categoria_general = 'O-EGR' AND (debito - credito) >= 0 THEN FALSE
+                    ELSE TRUE
+                END AS es_con,
+                CASE
+                    WHEN codigo_contable IS NULL
+                         OR NOT (codigo_contable LIKE '1110%' OR codigo_contable LIKE '1120%') THEN FALSE
+                    WHEN categoria_general = 'O-RCJ' AND (debito - credito) > 0 THEN FALSE
+                    WHEN categoria_general = 'O-EGR' AND (debito - credito) < 0 THEN FALSE
+                    WHEN categoria_general = 'O-NBK' THEN FALSE
+                    ELSE TRUE
+                END AS es_pni
+            FROM movimientos_siigo
+            WHERE empresa_id = :empresa_id
+            AND fecha_elaboracion BETWEEN :inicio AND :fin
+            AND activo = TRUE
+        ) AS siigo
+        WHERE es_con OR es_pni;
     """
 
-    filas = ejecutar_sql(db, sql_siigo, {
+
+def obtener_siigo_clasificado(db: Session, empresa_id: str, inicio: date, fin: date):
+    return clasificar_siigo(ejecutar_sql(db, SQL_SIIGO, {
         "empresa_id": empresa_id,
         "inicio": inicio,
         "fin": fin
-    })
-
-    for f in filas:
-        cat = f["categoria_general"]
-
-        valor = f["valor"]
-
-        # Reglas de naturaleza
-        if cat == "O-RCJ" and valor <= 0:
-            continue
-        if cat == "O-EGR" and valor >= 0:
-            continue
-        # O-NBK siempre es válido
-        # Resto de categorías pasan directo
-
-        if cat in contabilizados:
-            contabilizados[cat].append(f)
-
-    return contabilizados
+    }))
 
 
-# --------------------------------------------------------------
-# POR IDENTIFICAR – SIIGO códigos 1110 / 1120
-# --------------------------------------------------------------
-def obtener_pni(db: Session, empresa_id: str, inicio: date, fin: date):
+def clasificar_siigo(filas):
+    contabilizados = inicializar_categorias()
     pni = inicializar_categorias()
 
-    sql_pni = """
-        SELECT
-            empresa_id,
-            categoria_general,
-            abreviatura_general,
-            codigo_contable,
-            cuenta_contable,
-            identificacion_tercero,
-            nombre_tercero,
-            comprobante,
-            secuencia,
-            fecha_elaboracion,
-            descripcion_general,
-            detalle,
-            centro_costo,
-            debito,
-            credito,
-            (debito - credito) AS valor
-        FROM movimientos_siigo
-        WHERE empresa_id = :empresa_id
-        AND fecha_elaboracion BETWEEN :inicio AND :fin
-        AND activo = TRUE
-        AND (codigo_contable LIKE '1110%' OR codigo_contable LIKE '1120%');
-    """
-
-    filas = ejecutar_sql(db, sql_pni, {
-        "empresa_id": empresa_id,
-        "inicio": inicio,
-        "fin": fin
-    })
-
     for f in filas:
         cat = f["categoria_general"]
-        valor = f["valor"]
-
-        # Clasificación PNI:
-        # NO RCJ válido
-        if cat == "O-RCJ" and valor > 0:
-            continue
-        # NO EGR válido
-        if cat == "O-EGR" and valor < 0:
-            continue
-        # NO NBK
-        if cat == "O-NBK":
+        if cat not in contabilizados:
             continue
 
-        # SIIGO no clasificado → PNI en su categoría
-        if cat in pni:
-            pni[cat].append(f)
+        fila = {k: v for k, v in f.items() if k not in MARCAS_SIIGO}
 
-    return pni
+        if f["es_con"]:
+            contabilizados[cat].append(fila)
+        if f["es_pni"]:
+            pni[cat].append(fila)
+
+    return contabilizados, pni
 
 
 # --------------------------------------------------------------
 # FUNCIÓN PRINCIPAL DEL REPORTE DETALLADO
 # --------------------------------------------------------------
-def obtener_reporte_detallado(db: Session, empresa_id: str, periodo: str):
+def _rango_detallado(empresa_id: str, periodo: str):
     if not empresa_id:
         raise HTTPException(status_code=400, detail="Debe enviar empresa_id")
 
@@ -217,14 +194,43 @@ def obtener_reporte_detallado(db: Session, empresa_id: str, periodo: str):
         raise HTTPException(status_code=400, detail="Debe enviar periodo YYYY-MM")
 
     # Rango de fechas sincronizado con la matriz
-    inicio, fin = obtener_rango_periodo(periodo)
+    return obtener_rango_periodo(periodo)
 
-    publicados = obtener_publicados(db, empresa_id, inicio, fin)
-    contabilizados = obtener_contabilizados(db, empresa_id, inicio, fin)
-    pni = obtener_pni(db, empresa_id, inicio, fin)
+
+def _armar_detallado(dian, banco, contabilizados, pni):
+    publicados = {cat: dian[cat] + banco[cat] for cat in CATEGORIAS}
 
     return {
         "publicados": publicados,
         "contabilizados": contabilizados,
         "por_identificar": pni
     }
+
+
+@cacheado
+def obtener_reporte_detallado(db: Session, empresa_id: str, periodo: str):
+    inicio, fin = _rango_detallado(empresa_id, periodo)
+
+    # DIAN, BANCO y SIIGO son independientes: se consultan a la vez
+    dian, banco, (contabilizados, pni) = en_paralelo(db, [
+        lambda sesion: obtener_publicados_dian(sesion, empresa_id, inicio, fin),
+        lambda sesion: obtener_publicados_banco(sesion, empresa_id, inicio, fin),
+        lambda sesion: obtener_siigo_clasificado(sesion, empresa_id, inicio, fin),
+    ])
+
+    return _armar_detallado(dian, banco, contabilizados, pni)
+
+
+@cacheado
+async def obtener_reporte_detallado_async(db: AsyncSession, empresa_id: str, periodo: str):
+    """obtener_reporte_detallado sobre una AsyncSession."""
+    inicio, fin = _rango_detallado(empresa_id, periodo)
+    parametros = {"empresa_id": empresa_id, "inicio": inicio, "fin": fin}
+
+    filas_dian, filas_banco, filas_siigo = await en_paralelo_async(db, [
+        lambda sesion, sql=sql: ejecutar_sql_async(sesion, sql, parametros)
+        for sql in (SQL_DIAN, SQL_BANCO, SQL_SIIGO)
+    ])
+
+    contabilizados, pni = clasificar_siigo(filas_siigo)
+    return _armar_detallado(agrupar_publicados(filas_dian), agrupar_publicados(filas_banco), contabilizados, pni)
@@ -0,0 +1,233 @@
+import argparse
+import sys
+import uuid
+from decimal import Decimal
+from uuid import UUID
+
+from sqlalchemy import and_, case, delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.core.bulk_loader import insert_del_dialecto
+from app.core.report_cache import incrementar_versiones
+from app.core.periods import periodo_a_rango
+from app.models.movimientos_siigo import MovimientoSIIGO
+from app.models.movimientos_dian import MovimientoDIAN
+from app.models.movimientos_banco import MovimientoBANCO
+from app.models.resumen_mensual import ResumenMensual
+
+
+# Modelo, columna de fecha y columna de valor de cada fuente
+FUENTES_RESUMEN = {
+    "SIIGO": (MovimientoSIIGO, "fecha_elaboracion", "valor"),
+    "DIAN": (MovimientoDIAN, "fecha_emision", "total_bruto"),
+    "BANCO": (MovimientoBANCO, "fecha", "valor"),
+}
+
+LLAVE_RESUMEN = [
+    "empresa_id", "periodo", "fuente",
+    "categoria_general", "abreviatura_general", "tipo_reporte", "estado",
+]
+
+CATEGORIAS_PUB_BANCO = ("B-RCJ", "B-EGR", "B-NBK")
+
+
+# ==========================
+# Estado PUB / CON / PNI de un movimiento
+# (las mismas reglas en Python para el ETL y en SQL para reconstruir)
+# ==========================
+def estado_movimiento(fuente: str, categoria: str, valor):
+    if fuente == "DIAN":
+        return "PUB"
+
+    if fuente == "BANCO":
+        return "PUB" if categoria in CATEGORIAS_PUB_BANCO else "PNI"
+
+    # SIIGO: RCJ debe ser positivo, EGR negativo, NBK siempre CON
+    if categoria == "O-RCJ":
+        return "CON" if valor > 0 else "PNI"
+    if categoria == "O-EGR":
+        return "CON" if valor < 0 else "PNI"
+    if categoria == "O-NBK":
+        return "CON"
+    return "PNI"
+
+
+def estado_sql(fuente: str, modelo, valor):
+    categoria = modelo.categoria_general
+
+    if fuente == "DIAN":
+        return literal("PUB")
+
+    if fuente == "BANCO":
+        return case((categoria.in_(CATEGORIAS_PUB_BANCO), "PUB"), else_="PNI")
+
+    return case(
+        (and_(categoria == "O-RCJ", valor > 0), "CON"),
+        (and_(categoria == "O-EGR", valor < 0), "CON"),
+        (categoria == "O-NBK", "CON"),
+        else_="PNI"
+    )
+
+
+# ==========================
+# Actualización incremental desde el ETL
+# ==========================
+def acumular_resumen(db: Session, fuente: str, filas):
+    """
+    Suma al resumen las filas recién insertadas de un lote y sube la
+    versión de datos de cada (empresa, periodo) tocado. Se llama desde
+    cargar_filas antes del commit del lote (misma transacción).
+    Las filas sin fecha no entran al resumen.
+    """
+    _, col_fecha, col_valor = FUENTES_RESUMEN[fuente]
+
+    grupos = {}
+    versiones = set()
+    for fila in filas:
+        fecha = fila.get(col_fecha)
+        if fecha is None or fecha != fecha:
+            versiones.add((fila["empresa_id"], ""))
+            continue
+
+        valor = Decimal(str(fila[col_valor]))
+        llave = (
+            fila["empresa_id"],
+            f"{fecha.year:04d}-{fecha.month:02d}",
+            fuente,
+            fila["categoria_general"],
+            fila["abreviatura_general"],
+            fila["tipo_reporte"],
+            estado_movimiento(fuente, fila["categoria_general"], valor),
+        )
+        movimientos, total = grupos.get(llave, (0, Decimal(0)))
+        grupos[llave] = (movimientos + 1, total + valor)
+        versiones.add(llave[:2])
+
+    incrementar_versiones(db, versiones)
+
+    if not grupos:
+        return
+
+    tabla = ResumenMensual.__table__
+    stmt = insert_del_dialecto(db)(tabla)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=LLAVE_RESUMEN,
+        set_={
+            "movimientos": tabla.c.movimientos + stmt.excluded.movimientos,
+            "valor": tabla.c.valor + stmt.excluded.valor,
+            "actualizado_en": func.now(),
+        }
+    )
+
+    db.execute(stmt, [
+        {**dict(zip(LLAVE_RESUMEN, llave)), "movimientos": movimientos, "valor": total}
+        for llave, (movimientos, total) in grupos.items()
+    ])
+
+
+# ==========================
+# Reconstrucción desde las tablas de movimientos
+# ==========================
+def consulta_reconstruccion(fuente: str, empresa_id: UUID = None, periodo: str = None):
+    """
+    SELECT agrupado con las filas del resumen de una fuente, en el
+    orden de LLAVE_RESUMEN + movimientos, valor. Sin empresa_id cubre
+    todas las empresas (backfill de la migración v006).
+    """
+    modelo, col_fecha, col_valor = FUENTES_RESUMEN[fuente]
+    fecha = getattr(modelo, col_fecha)
+    valor = getattr(modelo, col_valor)
+
+    filas = (
+        select(
+            modelo.empresa_id,
+            func.to_char(fecha, "YYYY-MM").label("periodo"),
+            modelo.categoria_general,
+            modelo.abreviatura_general,
+            modelo.tipo_reporte,
+            estado_sql(fuente, modelo, valor).label("estado"),
+            valor.label("valor"),
+        )
+        .where(fecha.isnot(None))
+    )
+    if empresa_id:
+        filas = filas.where(modelo.empresa_id == empresa_id)
+    if periodo:
+        inicio, fin = periodo_a_rango(periodo)
+        filas = filas.where(fecha >= inicio, fecha < fin)
+    filas = filas.subquery()
+
+    return select(
+        filas.c.empresa_id,
+        filas.c.periodo,
+        literal(fuente),
+        filas.c.categoria_general,
+        filas.c.abreviatura_general,
+        filas.c.tipo_reporte,
+        filas.c.estado,
+        func.count(),
+        func.sum(filas.c.valor),
+    ).group_by(
+        filas.c.empresa_id,
+        filas.c.periodo,
+        filas.c.categoria_general,
+        filas.c.abreviatura_general,
+        filas.c.tipo_reporte,
+        filas.c.estado,
+    )
+
+
+def reconstruir_resumen(db: Session, empresa_id: UUID, periodo: str = None):
+    """
+    Recalcula el resumen de una empresa (y un periodo, si se indica)
+    a partir de los movimientos. Devuelve cuántas filas quedaron.
+
+    Sube la versión de datos de cada periodo que tenía o que queda con
+    filas, para que el cache de reportes y la réplica no sirvan el
+    resumen anterior.
+    """
+    periodos = select(ResumenMensual.periodo).distinct().where(ResumenMensual.empresa_id == empresa_id)
+    borrar = delete(ResumenMensual).where(ResumenMensual.empresa_id == empresa_id)
+    if periodo:
+        periodos = periodos.where(ResumenMensual.periodo == periodo)
+        borrar = borrar.where(ResumenMensual.periodo == periodo)
+    afectados = set(db.execute(periodos).scalars())
+    db.execute(borrar)
+
+    for fuente in FUENTES_RESUMEN:
+        agrupado = consulta_reconstruccion(fuente, empresa_id, periodo)
+        db.execute(insert(ResumenMensual).from_select(LLAVE_RESUMEN + ["movimientos", "valor"], agrupado))
+
+    afectados.update(db.execute(periodos).scalars())
+    incrementar_versiones(db, {(empresa_id, p) for p in afectados})
+    db.commit()
+
+    contar = select(func.count()).select_from(ResumenMensual).where(ResumenMensual.empresa_id == empresa_id)
+    if periodo:
+        contar = contar.where(ResumenMensual.periodo == periodo)
+    return db.execute(contar).scalar()
+
+
+# ==========================
+# CLI — python -m app.services.resumen_mensual_service EMPRESA_ID [--periodo YYYY-MM]
+# ==========================
+def main(argv=None):
+    from app.database.connection import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Reconstruir el resumen mensual de movimientos")
+    parser.add_argument("empresa_id", type=uuid.UUID)
+    parser.add_argument("--periodo", default=None, help="YYYY-MM; sin él se reconstruyen todos")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        filas = reconstruir_resumen(db, args.empresa_id, args.periodo)
+    finally:
+        db.close()
+
+    print(f"Resumen reconstruido: {filas} filas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
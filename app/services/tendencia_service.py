@@ -0,0 +1,248 @@
+from uuid import UUID
+
+from sqlalchemy import and_, func, not_, or_, select, tuple_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.periods import normalizar_periodo, periodo_a_rango, periodos_entre
+from app.core.report_cache import cacheado
+from app.models.movimientos_siigo import MovimientoSIIGO
+from app.models.resumen_mensual import ResumenMensual
+from app.services.report_service import CATEGORIAS
+from app.services.resumen_mensual_service import FUENTES_RESUMEN, estado_sql
+
+
+# ==========================
+# Ingresos / egresos y PUB por mes, tipo de reporte y estado
+# Ambas consultas devuelven (periodo, tipo_reporte, estado, movimientos, valor)
+# De estas solo se toma el estado PUB: CON y PNI salen de _con_pni_por_mes
+# ==========================
+def _por_mes_movimientos(fuentes, empresa_id: UUID, inicio, fin):
+    """Un SELECT agrupado por date_trunc('month', fecha) por fuente, en UNION ALL."""
+    ramas = []
+    for fuente in fuentes:
+        modelo, col_fecha, col_valor = FUENTES_RESUMEN[fuente]
+        fecha = getattr(modelo, col_fecha)
+        valor = getattr(modelo, col_valor)
+
+        llave = [
+            func.to_char(func.date_trunc("month", fecha), "YYYY-MM").label("periodo"),
+            modelo.tipo_reporte.label("tipo_reporte"),
+            estado_sql(fuente, modelo, valor).label("estado"),
+        ]
+        ramas.append(
+            select(*llave, func.count().label("movimientos"), func.sum(valor).label("valor"))
+            .where(modelo.empresa_id == empresa_id, fecha >= inicio, fecha < fin)
+            # GROUP BY por nombre de columna: el estado de DIAN es una constante
+            .group_by(*[columna.name for columna in llave])
+        )
+    return union_all(*ramas)
+
+
+def _por_mes_resumen(fuentes, empresa_id: UUID, periodo_inicio: str, periodo_fin: str):
+    return (
+        select(
+            ResumenMensual.periodo,
+            ResumenMensual.tipo_reporte,
+            ResumenMensual.estado,
+            func.sum(ResumenMensual.movimientos).label("movimientos"),
+            func.sum(ResumenMensual.valor).label("valor"),
+        )
+        .where(
+            ResumenMensual.empresa_id == empresa_id,
+            ResumenMensual.fuente.in_(fuentes),
+            ResumenMensual.periodo.between(periodo_inicio, periodo_fin),
+        )
+        .group_by(ResumenMensual.periodo, ResumenMensual.tipo_reporte, ResumenMensual.estado)
+    )
+
+
+# ==========================
+# CON y PNI por mes, con las definiciones de los reportes
+#   CON → comprobantes SIIGO (comprobante, secuencia distintos) con
+#         alguna línea válida: todo salvo O-RCJ <= 0 y O-EGR >= 0
+#         (report_service, deduplicado como report_filtered_service)
+#   PNI → líneas SIIGO de cuentas 1110 / 1120 que no son RCJ positivo,
+#         EGR negativo ni NBK (report_global_service)
+# ==========================
+def _con_pni_por_mes(empresa_id: UUID, inicio, fin):
+    m = MovimientoSIIGO
+    periodo = func.to_char(func.date_trunc("month", m.fecha_elaboracion), "YYYY-MM")
+
+    es_con = not_(or_(
+        and_(m.categoria_general == "O-RCJ", m.valor <= 0),
+        and_(m.categoria_general == "O-EGR", m.valor >= 0),
+    ))
+    es_pni = and_(
+        or_(m.codigo_contable.like("1110%"), m.codigo_contable.like("1120%")),
+        not_(or_(
+            and_(m.categoria_general == "O-RCJ", m.valor > 0),
+            and_(m.categoria_general == "O-EGR", m.valor < 0),
+            m.categoria_general == "O-NBK",
+        )),
+    )
+
+    return (
+        select(
+            periodo.label("periodo"),
+            func.count(tuple_(m.comprobante, m.secuencia).distinct()).filter(es_con).label("con"),
+            func.count().filter(es_pni).label("pni"),
+        )
+        .where(
+            m.empresa_id == empresa_id,
+            m.fecha_elaboracion >= inicio,
+            m.fecha_elaboracion < fin,
+            m.categoria_general.in_(CATEGORIAS),
+        )
+        .group_by(periodo)
+    )
+
+
+# ==========================
+# Indicadores del mes (mismas fórmulas del reporte global)
+# ==========================
+def _indicadores(mes):
+    pub = mes["pub"]
+    mes["pnc"] = max(pub - mes["con"], 0)
+    mes["resultado"] = mes["ingresos"] - mes["egresos"]
+    mes["avance"] = mes["con"] / pub if pub > 0 else 1
+    mes["rezago"] = mes["pnc"] / pub if pub > 0 else 0
+    mes["calidad"] = 1 - (mes["pni"] / pub) if pub > 0 else 1
+    return mes
+
+
+# ==========================
+# Consultas del rango y armado de los meses
+# ==========================
+def _consultas_tendencia(
+        empresa_id: UUID,
+        periodo_inicio: str,
+        periodo_fin: str,
+        incluir_siigo,
+        incluir_dian,
+        incluir_banco,
+        usar_resumen: bool
+):
+    """
+    Valida el rango y arma las dos consultas de tendencia_mensual.
+    Devuelve (periodos, totales, con_pni); una consulta que no aplica
+    va en None.
+    """
+    periodo_inicio = normalizar_periodo(periodo_inicio)
+    periodo_fin = normalizar_periodo(periodo_fin)
+
+    periodos = periodos_entre(periodo_inicio, periodo_fin)
+    if not periodos:
+        raise ValueError("periodo_inicio debe ser anterior o igual a periodo_fin")
+    if len(periodos) > settings.REPORTES_TENDENCIA_MAX_MESES:
+        raise ValueError(f"Máximo {settings.REPORTES_TENDENCIA_MAX_MESES} meses por consulta")
+
+    fuentes = [
+        fuente for fuente, incluir in
+        (("SIIGO", incluir_siigo), ("DIAN", incluir_dian), ("BANCO", incluir_banco))
+        if incluir
+    ]
+
+    inicio, _ = periodo_a_rango(periodo_inicio)
+    _, fin = periodo_a_rango(periodo_fin)
+
+    totales = None
+    if fuentes:
+        if usar_resumen is None:
+            usar_resumen = settings.REPORTES_DESDE_RESUMEN
+
+        if usar_resumen:
+            totales = _por_mes_resumen(fuentes, empresa_id, periodo_inicio, periodo_fin)
+        else:
+            totales = _por_mes_movimientos(fuentes, empresa_id, inicio, fin)
+
+    con_pni = _con_pni_por_mes(empresa_id, inicio, fin) if incluir_siigo else None
+
+    return periodos, totales, con_pni
+
+
+def _armar_tendencia(periodos, filas_totales, filas_con_pni):
+    meses = {
+        periodo: {"periodo": periodo, "ingresos": 0, "egresos": 0, "pub": 0, "con": 0, "pni": 0}
+        for periodo in periodos
+    }
+
+    for fila in filas_totales:
+        mes = meses.get(fila.periodo)
+        if mes is None:
+            continue
+
+        tipo = (fila.tipo_reporte or "").upper()
+        if tipo == "INGRESOS":
+            mes["ingresos"] += fila.valor
+        elif tipo == "EGRESOS":
+            mes["egresos"] += fila.valor
+
+        if fila.estado == "PUB":
+            mes["pub"] += fila.movimientos
+
+    for fila in filas_con_pni:
+        mes = meses.get(fila.periodo)
+        if mes is not None:
+            mes["con"] += fila.con
+            mes["pni"] += fila.pni
+
+    return {
+        "periodo_inicio": periodos[0],
+        "periodo_fin": periodos[-1],
+        "meses": [_indicadores(meses[periodo]) for periodo in periodos],
+    }
+
+
+@cacheado
+def tendencia_mensual(
+        db: Session,
+        empresa_id: UUID,
+        periodo_inicio: str,
+        periodo_fin: str,
+        incluir_siigo=True,
+        incluir_dian=True,
+        incluir_banco=True,
+        usar_resumen: bool = None
+):
+    """
+    Ingresos, egresos, PUB / CON / PNI y avance / rezago / calidad de
+    cada mes entre periodo_inicio y periodo_fin (inclusive). Los meses
+    sin movimientos van en cero.
+
+    Ingresos, egresos y PUB se leen del resumen mensual salvo
+    usar_resumen=False o REPORTES_DESDE_RESUMEN apagado; CON y PNI
+    siempre de movimientos_siigo (el resumen no guarda la cuenta ni el
+    comprobante). Dos consultas para todo el rango.
+    """
+    periodos, totales, con_pni = _consultas_tendencia(
+        empresa_id, periodo_inicio, periodo_fin, incluir_siigo, incluir_dian, incluir_banco, usar_resumen
+    )
+    return _armar_tendencia(
+        periodos,
+        db.execute(totales) if totales is not None else [],
+        db.execute(con_pni) if con_pni is not None else [],
+    )
+
+
+@cacheado
+async def tendencia_mensual_async(
+        db: AsyncSession,
+        empresa_id: UUID,
+        periodo_inicio: str,
+        periodo_fin: str,
+        incluir_siigo=True,
+        incluir_dian=True,
+        incluir_banco=True,
+        usar_resumen: bool = None
+):
+    """tendencia_mensual sobre una AsyncSession."""
+    periodos, totales, con_pni = _consultas_tendencia(
+        empresa_id, periodo_inicio, periodo_fin, incluir_siigo, incluir_dian, incluir_banco, usar_resumen
+    )
+    return _armar_tendencia(
+        periodos,
+        await db.execute(totales) if totales is not None else [],
+        await db.execute(con_pni) if con_pni is not None else [],
+    )
@@ -0,0 +1,77 @@
+# app/core/aho_corasick.py
+
+from collections import deque
+
+
+# ===============================================================
+# AUTÓMATA AHO-CORASICK PARA CONCEPTOS DEL DICCIONARIO
+# ===============================================================
+class AutomataConceptos:
+    """
+    Busca todos los conceptos en una sola pasada por el texto.
+
+    buscar() devuelve el mismo concepto que el recorrido lineal
+    `for concepto in conceptos: if concepto in texto`, es decir,
+    el de menor posición en la lista entre los que aparecen.
+    """
+
+    def __init__(self, conceptos):
+        self.conceptos = list(conceptos)
+        self._sin_match = len(self.conceptos)
+
+        self._hijos = [{}]
+        self._falla = [0]
+        self._mejor = [self._sin_match]  # menor índice de concepto que termina aquí
+
+        # 1. Trie
+        for i, concepto in enumerate(self.conceptos):
+            nodo = 0
+            for ch in concepto:
+                siguiente = self._hijos[nodo].get(ch)
+                if siguiente is None:
+                    siguiente = len(self._hijos)
+                    self._hijos[nodo][ch] = siguiente
+                    self._hijos.append({})
+                    self._falla.append(0)
+                    self._mejor.append(self._sin_match)
+                nodo = siguiente
+            if i < self._mejor[nodo]:
+                self._mejor[nodo] = i
+
+        # 2. Enlaces de falla (BFS); cada nodo hereda el mejor de su enlace
+        cola = deque()
+        for hijo in self._hijos[0].values():
+            self._mejor[hijo] = min(self._mejor[hijo], self._mejor[0])
+            cola.append(hijo)
+
+        while cola:
+            nodo = cola.popleft()
+            for ch, hijo in self._hijos[nodo].items():
+                falla = self._falla[nodo]
+                while falla and ch not in self._hijos[falla]:
+                    falla = self._falla[falla]
+                self._falla[hijo] = self._hijos[falla].get(ch, 0)
+                self._mejor[hijo] = min(self._mejor[hijo], self._mejor[self._falla[hijo]])
+                cola.append(hijo)
+
+    def buscar(self, texto: str):
+        """
+        Devuelve el concepto encontrado en el texto, o None.
+        """
+        hijos, falla, mejor_nodo = self._hijos, self._falla, self._mejor
+
+        nodo = 0
+        mejor = mejor_nodo[0]
+
+        for ch in texto:
+            if mejor == 0:
+                break
+            while nodo and ch not in hijos[nodo]:
+                nodo = falla[nodo]
+            nodo = hijos[nodo].get(ch, 0)
+            if mejor_nodo[nodo] < mejor:
+                mejor = mejor_nodo[nodo]
+
+        if mejor == self._sin_match:
+            return None
+        return self.conceptos[mejor]
@@ -0,0 +1,183 @@
+# app/core/bulk_loader.py
+
+import io
+import json
+import time
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.core.config import settings
+
+
+# ===============================================================
+# Columnas que se escriben en la carga masiva
+# (se omiten las que tienen server_default, p.ej. creado_en)
+# ===============================================================
+def columnas_carga(modelo):
+    return [
+        c.name for c in modelo.__table__.columns
+        if c.server_default is None
+    ]
+
+
+# ===============================================================
+# Serializar un valor al formato CSV de COPY
+# NULL se escribe sin comillas; todo lo demás va entre comillas,
+# así una cadena vacía nunca se confunde con NULL.
+# ===============================================================
+def _valor_copy(valor):
+    if valor is None or (isinstance(valor, float) and valor != valor):
+        return r"\N"
+
+    if isinstance(valor, (dict, list)):
+        texto = json.dumps(valor, ensure_ascii=False, default=str)
+    elif isinstance(valor, (date, datetime)):
+        texto = valor.isoformat()
+    elif isinstance(valor, (float, int, Decimal, uuid.UUID)):
+        return str(valor)
+    else:
+        texto = str(valor)
+
+    return '"' + texto.replace('"', '""') + '"'
+
+
+def _buffer_copy(filas, columnas):
+    buffer = io.StringIO()
+    for fila in filas:
+        buffer.write(",".join(_valor_copy(fila.get(c)) for c in columnas))
+        buffer.write("\n")
+    buffer.seek(0)
+    return buffer
+
+
+# ===============================================================
+# Escribir un lote — COPY en PostgreSQL, executemany en otro caso
+#
+# Con ignorar_duplicados las filas que chocan con un índice único
+# (llave natural) se descartan con ON CONFLICT DO NOTHING. Como COPY
+# no admite ON CONFLICT, el lote pasa por una tabla temporal.
+# Devuelve las filas que quedaron realmente insertadas (por id).
+# ===============================================================
+_INSERT_POR_DIALECTO = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def insert_del_dialecto(db: Session):
+    """insert() con ON CONFLICT del dialecto, o None si no lo soporta."""
+    return _INSERT_POR_DIALECTO.get(db.get_bind().dialect.name)
+
+
+def _filtrar_por_id(filas, ids):
+    ids = {str(i) for i in ids}
+    return [fila for fila in filas if str(fila["id"]) in ids]
+
+
+def _escribir_copy(db: Session, tabla: str, columnas, filas, ignorar_duplicados=False):
+    raw = db.connection().connection
+    lista = ", ".join(columnas)
+    opciones = "WITH (FORMAT csv, NULL '\\N')"
+
+    with raw.cursor() as cursor:
+        if not ignorar_duplicados:
+            cursor.copy_expert(f"COPY {tabla} ({lista}) FROM STDIN {opciones}", _buffer_copy(filas, columnas))
+            return filas
+
+        temporal = f"_carga_{tabla}"
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {temporal} "
+            f"(LIKE {tabla} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        )
+        cursor.execute(f"TRUNCATE {temporal}")
+        cursor.copy_expert(f"COPY {temporal} ({lista}) FROM STDIN {opciones}", _buffer_copy(filas, columnas))
+        cursor.execute(
+            f"INSERT INTO {tabla} ({lista}) SELECT {lista} FROM {temporal} "
+            f"ON CONFLICT DO NOTHING RETURNING id"
+        )
+        return _filtrar_por_id(filas, (r[0] for r in cursor.fetchall()))
+
+
+def _escribir_executemany(db: Session, modelo, columnas, filas, ignorar_duplicados=False):
+    insert = insert_del_dialecto(db)
+    valores = [{c: fila.get(c) for c in columnas} for fila in filas]
+
+    if ignorar_duplicados and insert is not None:
+        stmt = insert(modelo.__table__).on_conflict_do_nothing().returning(modelo.__table__.c.id)
+        ids = db.execute(stmt, valores).scalars().all()
+        return _filtrar_por_id(filas, ids)
+
+    db.execute(modelo.__table__.insert(), valores)
+    return filas
+
+
+def escribir_lote(db: Session, modelo, filas, columnas=None, ignorar_duplicados=False):
+    if not filas:
+        return []
+
+    columnas = columnas or columnas_carga(modelo)
+
+    if db.get_bind().dialect.name == "postgresql":
+        return _escribir_copy(db, modelo.__tablename__, columnas, filas, ignorar_duplicados)
+
+    return _escribir_executemany(db, modelo, columnas, filas, ignorar_duplicados)
+
+
+# ===============================================================
+# CARGA MASIVA — consume un iterable de dicts y confirma por lotes
+# ===============================================================
+def cargar_filas(db: Session, modelo, filas, tamano_lote: int = None, progreso: dict = None,
+                 ignorar_duplicados: bool = False, al_insertar=None):
+    """
+    filas: iterable de dicts {columna: valor}. Si una fila no trae
+    'id' se genera aquí, porque COPY no aplica el default del ORM.
+
+    progreso: dict opcional; se actualiza progreso["insertados"] en cada lote.
+    ignorar_duplicados: descarta las filas que ya existen según la llave natural.
+    al_insertar: al_insertar(db, filas_insertadas) se llama con cada lote
+    antes del commit, así lo que haga queda en la misma transacción.
+
+    Devuelve {"insertados", "duplicados", "duracion_segundos", "filas_por_segundo"}.
+    """
+    tamano_lote = tamano_lote or settings.ETL_CHUNK_SIZE
+    progreso = progreso if progreso is not None else {}
+    columnas = columnas_carga(modelo)
+
+    inicio = time.perf_counter()
+    insertados = 0
+    leidas = 0
+    lote = []
+
+    def escribir(lote):
+        insertadas = escribir_lote(db, modelo, lote, columnas, ignorar_duplicados)
+        if al_insertar is not None and insertadas:
+            al_insertar(db, insertadas)
+        db.commit()
+        return len(insertadas)
+
+    for fila in filas:
+        fila.setdefault("id", uuid.uuid4())
+        lote.append(fila)
+        leidas += 1
+
+        if len(lote) >= tamano_lote:
+            insertados += escribir(lote)
+            progreso["insertados"] = insertados
+            lote = []
+
+    if lote:
+        insertados += escribir(lote)
+        progreso["insertados"] = insertados
+
+    duracion = time.perf_counter() - inicio
+
+    return {
+        "insertados": insertados,
+        "duplicados": leidas - insertados,
+        "duracion_segundos": round(duracion, 3),
+        "filas_por_segundo": round(insertados / duracion, 1) if duracion > 0 else None
+    }
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -12,4 +13,31 @@ class Settings:
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60  # 1 hora
 
+    # Pool de conexiones (por proceso y por engine: sync y async)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))  # conexiones retenidas
+    DB_POOL_MAX_OVERFLOW: int = int(os.getenv("DB_POOL_MAX_OVERFLOW", "10"))  # extra en picos, se cierran al devolverse
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))  # segundos esperando una conexión libre
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # segundos antes de reabrir una conexión (-1 = nunca)
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"  # validar la conexión en cada checkout
+    DB_PGBOUNCER: bool = os.getenv("DB_PGBOUNCER", "false").lower() == "true"  # detrás de pgbouncer (modo transacción): sin pool propio
+    DB_REPLICA_VERSION_TTL: float = float(os.getenv("DB_REPLICA_VERSION_TTL", "0"))  # segundos que se reutiliza la versión de la primaria (0 = siempre consultarla; >0 puede servir datos viejos de cargas hechas en otro proceso)
+
+    # ETL
+    ETL_CHUNK_SIZE: int = int(os.getenv("ETL_CHUNK_SIZE", "5000"))  # filas por commit
+    ETL_WORKERS: int = int(os.getenv("ETL_WORKERS", "2"))  # hilos de carga en segundo plano
+    ETL_UPLOAD_DIR: str = os.getenv("ETL_UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "etl_uploads"))
+    ETL_BATCH_PROCESSES: int = int(os.getenv("ETL_BATCH_PROCESSES", str(os.cpu_count() or 1)))  # cargas por lote
+    ETL_ERRORES_MUESTRA: int = int(os.getenv("ETL_ERRORES_MUESTRA", "50"))  # errores devueltos en la respuesta
+    ETL_ERRORES_GRUPOS: int = int(os.getenv("ETL_ERRORES_GRUPOS", "100"))  # grupos en el resumen de errores
+    ETL_JOBS_RETENIDOS: int = int(os.getenv("ETL_JOBS_RETENIDOS", "1000"))  # jobs terminados en memoria
+
+    # Reportes
+    REPORTES_PAGINA_MAX: int = int(os.getenv("REPORTES_PAGINA_MAX", "5000"))  # filas por página
+    REPORTES_LOTE_STREAM: int = int(os.getenv("REPORTES_LOTE_STREAM", "2000"))  # filas por fetch al hacer streaming
+    REPORTES_DESDE_RESUMEN: bool = os.getenv("REPORTES_DESDE_RESUMEN", "true").lower() == "true"  # False → tablas de movimientos
+    REPORTES_TENDENCIA_MAX_MESES: int = int(os.getenv("REPORTES_TENDENCIA_MAX_MESES", "36"))  # meses por consulta de tendencia
+    REPORTES_HILOS: int = int(os.getenv("REPORTES_HILOS", "4"))  # consultas por fuente en paralelo (1 = en serie)
+    REPORTES_CACHE_MAX: int = int(os.getenv("REPORTES_CACHE_MAX", "512"))  # reportes en cache por proceso (0 = sin cache)
+    REPORTES_CACHE_MAX_MB: int = int(os.getenv("REPORTES_CACHE_MAX_MB", "64"))  # tamaño aproximado del cache por proceso
+
 settings = Settings()
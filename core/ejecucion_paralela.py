@@ -0,0 +1,99 @@
+# app/core/ejecucion_paralela.py
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.connection import AsyncSessionLocal, SessionLocal
+
+
+# ===============================================================
+# POOL DE HILOS PARA CONSULTAS DE REPORTES (compartido por proceso)
+# ===============================================================
+_lock = threading.Lock()
+_executor = None
+
+
+def _hilos():
+    # Cada hilo toma una conexión del pool: nunca más hilos que conexiones
+    if settings.DB_PGBOUNCER:
+        return settings.REPORTES_HILOS
+    return max(1, min(settings.REPORTES_HILOS, settings.DB_POOL_SIZE + settings.DB_POOL_MAX_OVERFLOW))
+
+
+def _obtener_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_hilos(),
+                thread_name_prefix="reportes"
+            )
+    return _executor
+
+
+def _con_sesion_propia(tarea, bind):
+    db = SessionLocal(bind=bind)
+    try:
+        return tarea(db)
+    finally:
+        db.close()
+
+
+# ===============================================================
+# EJECUTAR CONSULTAS INDEPENDIENTES A LA VEZ
+# ===============================================================
+def en_paralelo(db: Session, tareas):
+    """
+    tareas: funciones tarea(db) independientes entre sí (una por fuente).
+    Cada una corre en el pool de hilos con su propia sesión (sobre el
+    mismo engine de db: réplica o primaria), así la latencia es la de la
+    más lenta. Devuelve los resultados en el mismo
+    orden; si una falla, se propaga su excepción.
+
+    Con REPORTES_HILOS <= 1 (o una sola tarea) corren en orden sobre db.
+
+    Antes de repartir se cierra db (queda usable: la próxima consulta
+    toma otra conexión), así el llamador no retiene una conexión del
+    pool mientras los hilos esperan las suyas. db no debe tener cambios
+    sin confirmar. Los hilos no pasan de DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW.
+    Las tareas no deben volver a llamar en_paralelo (el pool es acotado).
+    """
+    tareas = list(tareas)
+    if settings.REPORTES_HILOS <= 1 or len(tareas) <= 1:
+        return [tarea(db) for tarea in tareas]
+
+    bind = db.get_bind()
+    db.close()
+
+    executor = _obtener_executor()
+    futuros = [executor.submit(_con_sesion_propia, tarea, bind) for tarea in tareas]
+    return [futuro.result() for futuro in futuros]
+
+
+# ===============================================================
+# LO MISMO SOBRE UNA SESIÓN ASYNC (sin hilos)
+# ===============================================================
+async def _con_sesion_propia_async(tarea, bind):
+    async with AsyncSessionLocal(bind=bind) as db:
+        return await tarea(db)
+
+
+async def en_paralelo_async(db: AsyncSession, tareas):
+    """
+    Como en_paralelo, con tareas async tarea(db): cada una con su propia
+    AsyncSession sobre el engine de db, esperadas con asyncio.gather.
+    Las conexiones salen del pool async (espera si está lleno).
+    """
+    tareas = list(tareas)
+    if settings.REPORTES_HILOS <= 1 or len(tareas) <= 1:
+        return [await tarea(db) for tarea in tareas]
+
+    bind = db.bind
+    await db.close()
+
+    return list(await asyncio.gather(*[_con_sesion_propia_async(tarea, bind) for tarea in tareas]))
@@ -0,0 +1,186 @@
+# app/core/etl_batch.py
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.etl_jobs import procesar_desde_disco
+from app.services.etl_siigo_service import procesar_siigo_excel
+from app.services.etl_dian_service import procesar_dian_excel
+from app.services.etl_banco_service import procesar_banco_json
+
+
+PROCESADORES = {
+    "SIIGO": procesar_siigo_excel,
+    "DIAN": procesar_dian_excel,
+    "BANCO": procesar_banco_json,
+}
+
+
+# ===============================================================
+# Validar manifiesto
+# [{"empresa_id": "...", "fuente": "SIIGO|DIAN|BANCO", "archivo": "ruta"}, ...]
+# ===============================================================
+def validar_manifiesto(manifiesto):
+    if not isinstance(manifiesto, list) or not manifiesto:
+        raise ValueError("El manifiesto debe ser una lista no vacía")
+
+    entradas = []
+    for i, entrada in enumerate(manifiesto, start=1):
+        if not isinstance(entrada, dict):
+            raise ValueError(f"Entrada {i}: debe ser un objeto")
+        fuente = str(entrada.get("fuente") or "").upper()
+        if fuente not in PROCESADORES:
+            raise ValueError(f"Entrada {i}: fuente inválida '{entrada.get('fuente')}'")
+        if not entrada.get("empresa_id") or not entrada.get("archivo"):
+            raise ValueError(f"Entrada {i}: faltan empresa_id o archivo")
+        try:
+            empresa_id = uuid.UUID(str(entrada["empresa_id"]))
+        except ValueError:
+            raise ValueError(f"Entrada {i}: empresa_id inválido '{entrada['empresa_id']}'")
+        entradas.append({
+            "orden": i,
+            "empresa_id": empresa_id,
+            "fuente": fuente,
+            "archivo": entrada["archivo"],
+            "archivo_nombre": entrada.get("archivo_nombre") or os.path.basename(entrada["archivo"]),
+        })
+    return entradas
+
+
+# ===============================================================
+# TRABAJO DE UN PROCESO — todas las cargas de una empresa, en orden
+# ===============================================================
+def _resumen_error(entrada, mensaje):
+    return {
+        "empresa_id": str(entrada["empresa_id"]),
+        "tipo_archivo": entrada["fuente"],
+        "estado": "fallido",
+        "archivo_nombre": entrada["archivo_nombre"],
+        "mensaje": mensaje,
+        "carga_id": None,
+        "procesados": 0,
+        "duplicados": 0,
+        "errores": 0,
+    }
+
+
+def _procesar_empresa(entradas):
+    resultados = []
+
+    for entrada in entradas:
+        try:
+            r = procesar_desde_disco(
+                PROCESADORES[entrada["fuente"]],
+                entrada["empresa_id"],
+                entrada["archivo"],
+                entrada["archivo_nombre"]
+            )
+        except HTTPException as e:
+            resultados.append((entrada["orden"], _resumen_error(entrada, e.detail)))
+            continue
+        except Exception as e:
+            resultados.append((entrada["orden"], _resumen_error(entrada, str(e))))
+            continue
+
+        errores = r.get("total_errores", 0)
+        if r.get("omitido"):
+            estado = "duplicado"
+        else:
+            estado = "procesado" if errores == 0 else "error"
+
+        # Misma estructura que CargaLog, más los contadores de la carga
+        resultados.append((entrada["orden"], {
+            "empresa_id": str(entrada["empresa_id"]),
+            "tipo_archivo": entrada["fuente"],
+            "estado": estado,
+            "archivo_nombre": entrada["archivo_nombre"],
+            "mensaje": r.get("mensaje") or f"{r['procesados']} procesados, {r.get('duplicados', 0)} duplicados, {errores} errores",
+            "carga_id": r.get("carga_id"),
+            "procesados": r["procesados"],
+            "duplicados": r.get("duplicados", 0),
+            "errores": errores,
+        }))
+
+    return resultados
+
+
+# ===============================================================
+# EJECUTAR LOTE
+# ===============================================================
+def ejecutar_lote(manifiesto, procesos: int = None, progreso: dict = None):
+    """
+    Reparte las cargas del manifiesto en un pool de procesos.
+    Las cargas de una misma empresa se ejecutan en un solo proceso y en
+    el orden del manifiesto; empresas distintas corren en paralelo.
+
+    Devuelve el resumen agregado con una entrada tipo CargaLog por archivo.
+    """
+    entradas = validar_manifiesto(manifiesto)
+    progreso = progreso if progreso is not None else {}
+    progreso.update({"archivos": len(entradas), "terminados": 0})
+
+    por_empresa = OrderedDict()
+    for entrada in entradas:
+        por_empresa.setdefault(entrada["empresa_id"], []).append(entrada)
+
+    procesos = procesos or settings.ETL_BATCH_PROCESSES
+    inicio = time.perf_counter()
+    resultados = []
+
+    # spawn: el hijo arranca limpio, sin las conexiones del pool, los
+    # hilos ni los locks del proceso padre (un fork desde el servidor
+    # puede copiar un lock tomado por otro hilo y colgarse)
+    with ProcessPoolExecutor(
+        max_workers=min(procesos, len(por_empresa)),
+        mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        futuros = [pool.submit(_procesar_empresa, grupo) for grupo in por_empresa.values()]
+        for futuro in as_completed(futuros):
+            parcial = futuro.result()
+            resultados.extend(parcial)
+            progreso["terminados"] += len(parcial)
+
+    cargas = [r for _, r in sorted(resultados, key=lambda x: x[0])]
+
+    return {
+        "archivos": len(cargas),
+        "empresas": len(por_empresa),
+        "procesados": sum(c["procesados"] for c in cargas),
+        "duplicados": sum(c["duplicados"] for c in cargas),
+        "errores": sum(c["errores"] for c in cargas),
+        "fallidos": sum(1 for c in cargas if c["estado"] == "fallido"),
+        "duracion_segundos": round(time.perf_counter() - inicio, 3),
+        "cargas": cargas,
+    }
+
+
+# ===============================================================
+# CLI — python -m app.core.etl_batch manifiesto.json [--procesos N]
+# ===============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Carga masiva de archivos SIIGO / DIAN / BANCO")
+    parser.add_argument("manifiesto", help="JSON con [{empresa_id, fuente, archivo}, ...]")
+    parser.add_argument("--procesos", type=int, default=None, help="Tamaño del pool de procesos")
+    args = parser.parse_args(argv)
+
+    with open(args.manifiesto, encoding="utf-8") as f:
+        manifiesto = json.load(f)
+
+    resumen = ejecutar_lote(manifiesto, procesos=args.procesos)
+    json.dump(resumen, sys.stdout, ensure_ascii=False, indent=2, default=str)
+    sys.stdout.write("\n")
+    return 0 if resumen["fallidos"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+# app/core/etl_jobs.py
+
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.connection import SessionLocal
+from app.models.cargas_log import CargaLog
+
+
+# ===============================================================
+# ESTADO DE LOS JOBS (en memoria del proceso)
+# ===============================================================
+_jobs = OrderedDict()
+_lock = threading.Lock()
+_executor = None
+
+
+def _obtener_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ETL_WORKERS,
+                thread_name_prefix="etl"
+            )
+    return _executor
+
+
+def _purgar_terminados():
+    """Conserva solo los últimos ETL_JOBS_RETENIDOS jobs terminados."""
+    terminados = [j for j, job in _jobs.items() if job["estado"] in ("terminado", "fallido")]
+    for job_id in terminados[:max(0, len(terminados) - settings.ETL_JOBS_RETENIDOS)]:
+        del _jobs[job_id]
+
+
+# ===============================================================
+# Archivo guardado en disco con la interfaz que usan los servicios
+# (los servicios ETL solo leen .file y .filename del UploadFile)
+# ===============================================================
+class ArchivoEnDisco:
+    def __init__(self, file, filename: str):
+        self.file = file
+        self.filename = filename
+
+
+def guardar_upload(file, prefijo: str) -> str:
+    os.makedirs(settings.ETL_UPLOAD_DIR, exist_ok=True)
+    nombre = os.path.basename(file.filename or "archivo")
+    ruta = os.path.join(settings.ETL_UPLOAD_DIR, f"{prefijo}_{nombre}")
+    with open(ruta, "wb") as destino:
+        shutil.copyfileobj(file.file, destino)
+    return ruta
+
+
+# ===============================================================
+# EJECUCIÓN DE UN JOB
+# tarea(progreso) hace el trabajo y devuelve el resultado del job
+# ===============================================================
+def _ejecutar(job_id: str, tarea, rutas):
+    job = _jobs[job_id]
+    job["estado"] = "procesando"
+    job["iniciado_en"] = datetime.utcnow()
+
+    try:
+        job["resultado"] = tarea(job["progreso"])
+        job["estado"] = "terminado"
+
+    except HTTPException as e:
+        job["estado"] = "fallido"
+        job["error"] = e.detail
+
+    except Exception as e:
+        job["estado"] = "fallido"
+        job["error"] = str(e)
+
+    finally:
+        job["finalizado_en"] = datetime.utcnow()
+        for ruta in rutas:
+            if os.path.exists(ruta):
+                os.remove(ruta)
+
+
+def _encolar(tarea, rutas, progreso: dict, **datos):
+    job_id = datos.pop("job_id", None) or str(uuid.uuid4())
+
+    job = {
+        "job_id": job_id,
+        **datos,
+        "estado": "en_cola",
+        "creado_en": datetime.utcnow(),
+        "iniciado_en": None,
+        "finalizado_en": None,
+        "progreso": progreso,
+        "resultado": None,
+        "error": None,
+    }
+
+    with _lock:
+        _purgar_terminados()
+        _jobs[job_id] = job
+
+    _obtener_executor().submit(_ejecutar, job_id, tarea, rutas)
+
+    return {k: v for k, v in job.items() if k in ("job_id", "estado", *datos)}
+
+
+# ===============================================================
+# ENCOLAR UNA CARGA
+# ===============================================================
+def procesar_desde_disco(procesar, empresa_id, ruta: str, filename: str, progreso: dict = None):
+    """
+    Ejecuta un servicio ETL sobre un archivo guardado, con su propia sesión.
+    """
+    db = SessionLocal()
+    try:
+        with open(ruta, "rb") as f:
+            return procesar(db, empresa_id, ArchivoEnDisco(f, filename), progreso=progreso)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def encolar_carga(procesar, empresa_id, file, tipo_archivo: str):
+    """
+    Guarda el archivo en ETL_UPLOAD_DIR y lo deja en la cola de
+    ETL_WORKERS hilos. Devuelve el job inicial (con su job_id).
+
+    procesar: procesar_siigo_excel | procesar_dian_excel | procesar_banco_json
+    """
+    job_id = str(uuid.uuid4())
+    ruta = guardar_upload(file, job_id)
+
+    def tarea(progreso):
+        return procesar_desde_disco(procesar, empresa_id, ruta, file.filename, progreso)
+
+    return _encolar(
+        tarea, [ruta],
+        {"leidos": 0, "insertados": 0, "errores": 0},
+        job_id=job_id,
+        tipo_archivo=tipo_archivo,
+        empresa_id=str(empresa_id),
+        archivo_nombre=file.filename,
+    )
+
+
+def encolar_lote(ejecutar_lote, manifiesto, rutas):
+    """
+    Encola un lote multiempresa (ver core/etl_batch.ejecutar_lote).
+    rutas: archivos guardados con guardar_upload; se borran al terminar.
+    """
+    def tarea(progreso):
+        return ejecutar_lote(manifiesto, progreso=progreso)
+
+    return _encolar(
+        tarea, rutas,
+        {"archivos": len(manifiesto), "terminados": 0},
+        tipo_archivo="LOTE",
+        archivos=len(manifiesto),
+    )
+
+
+# ===============================================================
+# CONSULTAR ESTADO
+# ===============================================================
+def obtener_estado_job(db: Session, job_id: str):
+    job = _jobs.get(job_id)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Job no encontrado.")
+
+    estado = dict(job, progreso=dict(job["progreso"]))
+    estado["carga_log"] = None
+
+    carga_id = (job["resultado"] or {}).get("carga_id")
+    if carga_id:
+        log = db.query(CargaLog).filter(CargaLog.id == carga_id).first()
+        if log:
+            estado["carga_log"] = {
+                "id": str(log.id),
+                "tipo_archivo": log.tipo_archivo,
+                "estado": log.estado,
+                "archivo_nombre": log.archivo_nombre,
+                "mensaje": log.mensaje,
+            }
+
+    return estado
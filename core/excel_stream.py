@@ -0,0 +1,105 @@
+# app/core/excel_stream.py
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+from app.core.config import settings
+
+
+# ===============================================================
+# Encabezados con los mismos nombres que genera pd.read_excel
+# (celda vacía → "Unnamed: i", repetidos → "Nombre.1", "Nombre.2")
+# ===============================================================
+def _nombres_columnas(encabezado):
+    nombres = []
+    vistos = {}
+    for i, valor in enumerate(encabezado):
+        nombre = f"Unnamed: {i}" if valor is None else str(valor)
+        if nombre in vistos:
+            vistos[nombre] += 1
+            nombre = f"{nombre}.{vistos[nombre]}"
+        else:
+            vistos[nombre] = 0
+        nombres.append(nombre)
+    return nombres
+
+
+# ===============================================================
+# Valor de celda como lo deja pd.read_excel(dtype=str)
+# ===============================================================
+def _como_texto(valor):
+    if valor is None:
+        return np.nan
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+def _lote_df(filas, columnas, inicio):
+    df = pd.DataFrame(filas, columns=columnas, dtype=object)
+    df.index = pd.RangeIndex(inicio, inicio + len(filas))
+    return df
+
+
+# ===============================================================
+# LECTOR POR LOTES
+# ===============================================================
+def leer_excel_por_lotes(archivo, tamano_lote: int = None):
+    """
+    Recorre la primera hoja en modo solo lectura y entrega DataFrames de
+    hasta tamano_lote filas, con las mismas columnas y valores que
+    pd.read_excel(archivo, dtype=str). El índice continúa entre lotes
+    (fila 0 = primera fila de datos), así idx + 2 sigue siendo la fila
+    del Excel.
+
+    La memoria depende del tamaño del lote, no del archivo. Los formatos
+    que openpyxl no abre (p. ej. .xls) se leen completos con pandas.
+    """
+    tamano_lote = tamano_lote or settings.ETL_CHUNK_SIZE
+
+    try:
+        libro = load_workbook(archivo, read_only=True, data_only=True)
+    except InvalidFileException:
+        archivo.seek(0)
+        df = pd.read_excel(archivo, dtype=str)
+        for inicio in range(0, len(df), tamano_lote):
+            yield df.iloc[inicio:inicio + tamano_lote]
+        return
+
+    try:
+        filas_hoja = libro.worksheets[0].iter_rows(values_only=True)
+
+        encabezado = next(filas_hoja, None)
+        if encabezado is None:
+            return
+        columnas = _nombres_columnas(encabezado)
+        ancho = len(columnas)
+
+        lote = []
+        vacias = []  # filas en blanco pendientes (las del final se descartan)
+        inicio = 0
+
+        for fila in filas_hoja:
+            valores = [_como_texto(v) for v in fila[:ancho]]
+            valores += [np.nan] * (ancho - len(valores))
+
+            if all(v is np.nan for v in valores):
+                vacias.append(valores)
+                continue
+
+            lote.extend(vacias)
+            vacias = []
+            lote.append(valores)
+
+            while len(lote) >= tamano_lote:
+                yield _lote_df(lote[:tamano_lote], columnas, inicio)
+                inicio += tamano_lote
+                lote = lote[tamano_lote:]
+
+        if lote:
+            yield _lote_df(lote, columnas, inicio)
+
+    finally:
+        libro.close()
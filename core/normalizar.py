@@ -0,0 +1,98 @@
+# app/core/normalizar.py
+
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+# Valores distintos que se recuerdan por función (comprobantes, grupos,
+# tipos de documento y descripciones se repiten miles de veces)
+TAMANO_CACHE = 65536
+
+
+# ===============================================================
+# TABLAS PARA str.translate
+# Cada carácter no ASCII se reemplaza por su descomposición NFKD sin
+# marcas (Á → A, Ñ → N, ½ → 1/2). Es lo mismo que
+# normalize("NFKD").encode("ASCII", "ignore") carácter por carácter.
+# Los caracteres que no están precalculados se calculan la primera vez
+# y quedan en la tabla.
+# ===============================================================
+def _a_ascii(ch):
+    return unicodedata.normalize("NFKD", ch).encode("ASCII", "ignore").decode()
+
+
+class _TablaASCII(dict):
+    def __missing__(self, codigo):
+        valor = _a_ascii(chr(codigo))
+        self[codigo] = valor
+        return valor
+
+
+class _TablaAlfanumerica(dict):
+    """Como _TablaASCII, pero solo deja letras, dígitos y espacios."""
+
+    def __missing__(self, codigo):
+        valor = "".join(c for c in _a_ascii(chr(codigo)) if c.isalnum() or c == " ")
+        self[codigo] = valor
+        return valor
+
+
+_TABLA_ASCII = _TablaASCII()
+_TABLA_ALFANUMERICA = _TablaAlfanumerica()
+
+# Latín-1 y Latín extendido cubren lo que llega en SIIGO, DIAN y bancos
+for _codigo in range(0x80, 0x250):
+    _TABLA_ASCII[_codigo]
+    _TABLA_ALFANUMERICA[_codigo]
+
+# En la tabla alfanumérica también se eliminan los signos ASCII
+for _codigo in range(0x80):
+    _ch = chr(_codigo)
+    if not (_ch.isalnum() or _ch == " "):
+        _TABLA_ALFANUMERICA[_codigo] = None
+
+
+# ===============================================================
+# NORMALIZADORES
+# ===============================================================
+@lru_cache(maxsize=TAMANO_CACHE, typed=True)
+def normalizar(texto):
+    """
+    Mayúsculas, sin tildes ni caracteres no ASCII y con los espacios
+    colapsados. None se conserva como None.
+    """
+    if texto is None:
+        return None
+    texto = str(texto).upper().strip()
+    if not texto.isascii():
+        texto = texto.translate(_TABLA_ASCII)
+    return " ".join(texto.split())
+
+
+@lru_cache(maxsize=TAMANO_CACHE, typed=True)
+def normalizar_alfanumerico(texto):
+    """
+    Igual que normalizar(), pero además elimina todo lo que no sea letra,
+    dígito o espacio. None se convierte en "".
+    """
+    if texto is None:
+        return ""
+    texto = str(texto).upper().strip().translate(_TABLA_ALFANUMERICA)
+    return " ".join(texto.split())
+
+
+# ===============================================================
+# API POR LOTES — una columna completa
+# ===============================================================
+def normalizar_serie(serie: pd.Series, funcion=normalizar) -> pd.Series:
+    """
+    Normaliza solo los valores distintos de la columna y los expande
+    con los códigos de factorize (el último slot es el del valor nulo).
+    """
+    codigos, unicos = pd.factorize(serie)
+    nulo = funcion(serie[serie.isna()].iloc[0]) if serie.isna().any() else None
+    normalizados = np.array([funcion(u) for u in unicos] + [nulo], dtype=object)
+    return pd.Series(normalizados[codigos], index=serie.index)
@@ -0,0 +1,120 @@
+# app/core/normalizar_benchmark.py
+
+import argparse
+import random
+import sys
+import time
+import unicodedata
+
+import pandas as pd
+
+from app.core.normalizar import normalizar, normalizar_alfanumerico, normalizar_serie
+
+
+# ===============================================================
+# Implementación anterior (carácter por carácter, sin cache),
+# solo como referencia para comparar resultados y tiempos
+# ===============================================================
+def _normalizar_original(texto):
+    if texto is None:
+        return None
+    texto = str(texto).upper().strip()
+    texto = unicodedata.normalize("NFKD", texto).encode("ASCII", "ignore").decode()
+    return " ".join(texto.split())
+
+
+def _normalizar_alfanumerico_original(texto):
+    if texto is None:
+        return ""
+    texto = str(texto).upper().strip()
+    texto = unicodedata.normalize("NFKD", texto).encode("ASCII", "ignore").decode()
+    texto = "".join(ch for ch in texto if ch.isalnum() or ch == " ")
+    return " ".join(texto.split())
+
+
+# ===============================================================
+# Datos de prueba: pocas decenas de valores categóricos repetidos
+# (Comprobante, Grupo, Tipo de documento) y descripciones bancarias
+# ===============================================================
+_COMPROBANTES = [
+    "RC 1", "rc  1", "Recibo de caja", "EGR", "Egreso", "Nota contable",
+    "Nómina", "NÓMINA ", "Factura de venta", "Factura electrónica",
+    "Comprobante de egreso", "Depreciación", "Amortización", "Causación",
+]
+_GRUPOS = ["Emitido", "Recibido", "Emitido ", "recibido", "Nómina electrónica"]
+_TIPOS_DOCUMENTO = [
+    "Factura electrónica", "Nota crédito", "Nota débito",
+    "Documento soporte", "Nota de ajuste", "Factura de exportación",
+]
+_DESCRIPCIONES = [
+    "PAGO PSE {n}", "Comisión transferencia {n}", "GMF 4x1000",
+    "Abono intereses ahorro", "Cuota manejo tarjeta débito",
+    "Transferencia a cta. {n}", "IVA comisión {n}",
+]
+
+
+def datos_prueba(filas: int, semilla: int = 7):
+    rnd = random.Random(semilla)
+    categoricos = [
+        rnd.choice(_COMPROBANTES + _GRUPOS + _TIPOS_DOCUMENTO + [None])
+        for _ in range(filas)
+    ]
+    descripciones = [
+        rnd.choice(_DESCRIPCIONES).format(n=rnd.randint(1, 500))
+        for _ in range(filas)
+    ]
+    return categoricos, descripciones
+
+
+def _medir(funcion, valores):
+    inicio = time.perf_counter()
+    resultado = funcion(valores)
+    return time.perf_counter() - inicio, resultado
+
+
+# ===============================================================
+# CLI — python -m app.core.normalizar_benchmark [--filas N]
+# ===============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmark de normalización de texto")
+    parser.add_argument("--filas", type=int, default=500_000)
+    args = parser.parse_args(argv)
+
+    categoricos, descripciones = datos_prueba(args.filas)
+    serie = pd.Series(categoricos, dtype=object)
+
+    normalizar.cache_clear()
+    normalizar_alfanumerico.cache_clear()
+
+    casos = [
+        ("categóricos, fila a fila",
+         lambda v: [_normalizar_original(x) for x in v],
+         lambda v: [normalizar(x) for x in v],
+         categoricos),
+        ("categóricos, columna (normalizar_serie)",
+         lambda s: s.map(_normalizar_original),
+         normalizar_serie,
+         serie),
+        ("descripciones bancarias",
+         lambda v: [_normalizar_alfanumerico_original(x) for x in v],
+         lambda v: [normalizar_alfanumerico(x) for x in v],
+         descripciones),
+    ]
+
+    print(f"{args.filas} filas")
+    iguales = True
+    for nombre, antes, despues, valores in casos:
+        t_antes, r_antes = _medir(antes, valores)
+        t_despues, r_despues = _medir(despues, valores)
+        mismo = list(r_antes) == list(r_despues)
+        iguales = iguales and mismo
+        print(
+            f"  {nombre:<42} antes {t_antes:7.3f}s  ahora {t_despues:7.3f}s  "
+            f"x{t_antes / t_despues:6.1f}  {'OK' if mismo else 'DIFERENTE'}"
+        )
+
+    return 0 if iguales else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
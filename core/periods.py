@@ -33,6 +33,17 @@ def periodo_a_rango(periodo: str):
     return fecha_inicio, fecha_fin
 
 
+# ===============================================================
+# Periodo "YYYY-MM" → (primer día, último día), ambos INCLUSIVOS
+# Para consultas con BETWEEN
+# ===============================================================
+def obtener_rango_periodo(periodo: str):
+    fecha_inicio, _ = periodo_a_rango(periodo)
+    if fecha_inicio is None:
+        return None, None
+    return fecha_inicio, ultimo_dia_del_mes(fecha_inicio.year, fecha_inicio.month)
+
+
 # ===============================================================
 # Devuelve el último día de un mes
 # ===============================================================
@@ -77,6 +88,18 @@ def validar_periodo(periodo: str):
     return True
 
 
+# ===============================================================
+# Normalizar periodo: "2024-3" → "2024-03" (inválido → ValueError)
+# Para comparar contra columnas periodo YYYY-MM
+# ===============================================================
+def normalizar_periodo(periodo: str):
+    if not periodo:
+        return None
+    validar_periodo(periodo)
+    year, month = map(int, periodo.split("-"))
+    return f"{year:04d}-{month:02d}"
+
+
 # ===============================================================
 # Crear lista de periodos entre 2 fechas
 # ===============================================================
@@ -0,0 +1,240 @@
+# app/core/report_cache.py
+
+import functools
+import inspect
+import sys
+import threading
+import uuid
+from collections import OrderedDict
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.bulk_loader import insert_del_dialecto
+from app.core.config import settings
+from app.core.periods import normalizar_periodo
+from app.models.versiones_datos import VersionDatos
+
+
+# ===============================================================
+# VERSIÓN DE DATOS POR (empresa, periodo)
+# El ETL la sube en la transacción de cada lote; como va en la llave
+# del cache, una carga invalida los reportes de lo que tocó sin
+# borrar nada (las entradas viejas salen por LRU).
+# ===============================================================
+def incrementar_versiones(db: Session, llaves):
+    """
+    llaves: {(empresa_id, periodo)}; periodo "" para filas sin fecha.
+    No hace commit: corre dentro de la transacción del lote.
+    """
+    if not llaves:
+        return
+
+    tabla = VersionDatos.__table__
+    stmt = insert_del_dialecto(db)(tabla)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["empresa_id", "periodo"],
+        set_={"version": tabla.c.version + 1, "actualizado_en": func.now()}
+    )
+    db.execute(stmt, [
+        {"empresa_id": empresa_id, "periodo": periodo, "version": 1}
+        for empresa_id, periodo in llaves
+    ])
+    # Para que la réplica descarte su versión guardada al confirmar
+    db.info.setdefault("empresas_versionadas", set()).update(e for e, _ in llaves)
+
+
+def consulta_version_datos(empresa_id=None, periodo: str = None):
+    """
+    Suma de versiones de lo que cubre un reporte: la empresa (o todas)
+    en el periodo (o en todos). Solo crece, así que cualquier carga
+    dentro del alcance cambia el resultado.
+    """
+    stmt = select(func.coalesce(func.sum(VersionDatos.version), 0))
+    if empresa_id:
+        stmt = stmt.where(VersionDatos.empresa_id == empresa_id)
+    if periodo:
+        stmt = stmt.where(VersionDatos.periodo == periodo)
+    return stmt
+
+
+def version_datos(db: Session, empresa_id=None, periodo: str = None):
+    return db.execute(consulta_version_datos(empresa_id, periodo)).scalar()
+
+
+async def version_datos_async(db: AsyncSession, empresa_id=None, periodo: str = None):
+    return (await db.execute(consulta_version_datos(empresa_id, periodo))).scalar()
+
+
+# ===============================================================
+# TAMAÑO APROXIMADO DE UN RESULTADO
+# Las listas se estiman con su primer elemento (las filas de un
+# reporte tienen todas las mismas columnas): recorrerlas entera
+# costaría tanto como la consulta.
+# ===============================================================
+def tamano_aproximado(valor):
+    if hasattr(valor, "_mapping"):
+        valor = tuple(valor)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(
+            tamano_aproximado(k) + tamano_aproximado(v) for k, v in valor.items()
+        )
+    if isinstance(valor, (list, tuple)):
+        if not valor:
+            return sys.getsizeof(valor)
+        return sys.getsizeof(valor) + len(valor) * tamano_aproximado(valor[0])
+    return sys.getsizeof(valor)
+
+
+# ===============================================================
+# CACHE LRU (en memoria del proceso)
+# Acotado por entradas y por tamaño aproximado en bytes; un resultado
+# más grande que todo el cache no se guarda.
+# ===============================================================
+class CacheReportes:
+    def __init__(self, maximo: int, maximo_bytes: int):
+        self.maximo = maximo
+        self.maximo_bytes = maximo_bytes
+        self._entradas = OrderedDict()
+        self._tamanos = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.omitidos = 0
+
+    def obtener(self, llave):
+        """Devuelve (encontrado, valor)."""
+        with self._lock:
+            if llave in self._entradas:
+                self._entradas.move_to_end(llave)
+                self.aciertos += 1
+                return True, self._entradas[llave]
+            self.fallos += 1
+            return False, None
+
+    def guardar(self, llave, valor, tamano: int = 0):
+        with self._lock:
+            if tamano > self.maximo_bytes:
+                self.omitidos += 1
+                return
+            self._bytes += tamano - self._tamanos.get(llave, 0)
+            self._entradas[llave] = valor
+            self._tamanos[llave] = tamano
+            self._entradas.move_to_end(llave)
+            while len(self._entradas) > self.maximo or self._bytes > self.maximo_bytes:
+                viejo, _ = self._entradas.popitem(last=False)
+                self._bytes -= self._tamanos.pop(viejo)
+                self.desalojos += 1
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._tamanos.clear()
+            self._bytes = 0
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "maximo": self.maximo,
+                "bytes_aprox": self._bytes,
+                "maximo_bytes": self.maximo_bytes,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "desalojos": self.desalojos,
+                "omitidos_por_tamano": self.omitidos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0,
+            }
+
+
+cache_reportes = CacheReportes(settings.REPORTES_CACHE_MAX, settings.REPORTES_CACHE_MAX_MB * 1024 * 1024)
+
+
+# ===============================================================
+# DECORADOR
+# ===============================================================
+def _valor_llave(valor):
+    if isinstance(valor, uuid.UUID):
+        return str(valor)
+    if isinstance(valor, (list, set)):
+        return tuple(valor)
+    return valor
+
+
+def cacheado(funcion):
+    """
+    Cachea el resultado de un reporte (función normal o async, con
+    Session o AsyncSession). La función debe recibir `db`;
+    `empresa_id` y `periodo` (si los tiene, también dentro de **filtros)
+    eligen la versión de datos que entra en la llave.
+
+    El resultado se comparte entre llamadas: no se debe modificar.
+
+    Cada llamada, acierto o no, hace una consulta a versiones_datos
+    (una suma sobre la llave primaria, sin tocar los movimientos) para
+    armar la llave: un acierto cuesta ese viaje a la base, no cero.
+    """
+    firma = inspect.signature(funcion)
+    extra = next(
+        (p.name for p in firma.parameters.values() if p.kind is inspect.Parameter.VAR_KEYWORD),
+        None
+    )
+
+    def preparar(args, kwargs):
+        """Devuelve (db, llave sin la versión, empresa_id, periodo normalizado)."""
+        argumentos = firma.bind(*args, **kwargs)
+        argumentos.apply_defaults()
+        parametros = dict(argumentos.arguments)
+        db = parametros.pop("db")
+        if extra:
+            parametros.update(parametros.pop(extra, {}))
+
+        llave = (
+            funcion.__module__,
+            funcion.__qualname__,
+            tuple(sorted((nombre, _valor_llave(valor)) for nombre, valor in parametros.items())),
+        )
+        # versiones_datos guarda el periodo como YYYY-MM: "2024-3" también
+        # tiene que ver las cargas de 2024-03
+        return db, llave, parametros.get("empresa_id"), normalizar_periodo(parametros.get("periodo"))
+
+    if inspect.iscoroutinefunction(funcion):
+        @functools.wraps(funcion)
+        async def envoltura_async(*args, **kwargs):
+            if cache_reportes.maximo <= 0:
+                return await funcion(*args, **kwargs)
+
+            db, llave, empresa_id, periodo = preparar(args, kwargs)
+            llave += (await version_datos_async(db, empresa_id, periodo),)
+
+            encontrado, valor = cache_reportes.obtener(llave)
+            if encontrado:
+                return valor
+
+            valor = await funcion(*args, **kwargs)
+            cache_reportes.guardar(llave, valor, tamano_aproximado(valor))
+            return valor
+
+        return envoltura_async
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        if cache_reportes.maximo <= 0:
+            return funcion(*args, **kwargs)
+
+        db, llave, empresa_id, periodo = preparar(args, kwargs)
+        llave += (version_datos(db, empresa_id, periodo),)
+
+        encontrado, valor = cache_reportes.obtener(llave)
+        if encontrado:
+            return valor
+
+        valor = funcion(*args, **kwargs)
+        cache_reportes.guardar(llave, valor, tamano_aproximado(valor))
+        return valor
+
+    return envoltura
@@ -1,11 +1,19 @@
 # app/core/report_engine.py
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+import base64
+import heapq
+import json
+import uuid
+from datetime import date
+
+from sqlalchemy import Text, false, func, literal, or_, select, text, tuple_, union_all
 
 from app.models.movimientos_siigo import MovimientoSIIGO
 from app.models.movimientos_dian import MovimientoDIAN
 from app.models.movimientos_banco import MovimientoBANCO
+from app.models.resumen_mensual import ResumenMensual
 
 from app.core.filters import (
     filtrar_por_empresa,
@@ -17,51 +25,62 @@ from app.core.filters import (
     filtrar_por_documento
 )
 
-from app.core.periods import periodo_a_rango
+from app.core.periods import normalizar_periodo, periodo_a_rango
+from app.core.config import settings
+from app.core.report_cache import cacheado
+from app.core.ejecucion_paralela import en_paralelo, en_paralelo_async
+
+
+# ===============================================================
+# CONSULTAS BASE: SELECT sin sesión, los ejecuta Session o AsyncSession
+# ===============================================================
 
 
 # ===============================================================
 # CONSULTA BASE — SIIGO
 # ===============================================================
-def consulta_base_siigo(db: Session):
-    return db.query(
+def consulta_base_siigo():
+    return select(
         MovimientoSIIGO.fecha_elaboracion.label("fecha"),
         MovimientoSIIGO.descripcion.label("descripcion"),
         MovimientoSIIGO.valor.label("valor"),
         MovimientoSIIGO.categoria_general.label("categoria"),
         MovimientoSIIGO.abreviatura_general.label("abreviatura"),
         MovimientoSIIGO.tipo_reporte.label("tipo_reporte"),
-        func.cast(func.null(), func.text).label("fuente")
+        literal("SIIGO", Text).label("fuente"),
+        MovimientoSIIGO.id.label("id")
     )
 
 
 # ===============================================================
 # CONSULTA BASE — DIAN
 # ===============================================================
-def consulta_base_dian(db: Session):
-    return db.query(
+def consulta_base_dian():
+    return select(
         MovimientoDIAN.fecha_emision.label("fecha"),
         MovimientoDIAN.nombre_emisor.label("descripcion"),
         MovimientoDIAN.total_bruto.label("valor"),
         MovimientoDIAN.categoria_general.label("categoria"),
         MovimientoDIAN.abreviatura_general.label("abreviatura"),
         MovimientoDIAN.tipo_reporte.label("tipo_reporte"),
-        func.cast("DIAN", func.text).label("fuente")
+        literal("DIAN", Text).label("fuente"),
+        MovimientoDIAN.id.label("id")
     )
 
 
 # ===============================================================
 # CONSULTA BASE — BANCO
 # ===============================================================
-def consulta_base_banco(db: Session):
-    return db.query(
+def consulta_base_banco():
+    return select(
         MovimientoBANCO.fecha.label("fecha"),
         MovimientoBANCO.descripcion.label("descripcion"),
         MovimientoBANCO.valor.label("valor"),
         MovimientoBANCO.categoria_general.label("categoria"),
         MovimientoBANCO.abreviatura_general.label("abreviatura"),
         MovimientoBANCO.tipo_reporte.label("tipo_reporte"),
-        func.cast("BANCO", func.text).label("fuente")
+        literal("BANCO", Text).label("fuente"),
+        MovimientoBANCO.id.label("id")
     )
 
 
@@ -78,7 +97,8 @@ def aplicar_filtros(
     categoria=None,
     abreviatura=None,
     documento=None,
-    fecha_col=None
+    fecha_col=None,
+    campo_documento="comprobante"
 ):
     # A — Empresa
     query = filtrar_por_empresa(query, empresa_id)
@@ -101,15 +121,145 @@ def aplicar_filtros(
     # F — Abreviatura
     query = filtrar_por_abreviatura(query, abreviatura)
 
-    # G — Documento / comprobante
-    query = filtrar_por_documento(query, documento)
+    # G — Documento / comprobante (BANCO no tiene documento: no hay coincidencias)
+    if documento and campo_documento is None:
+        query = query.filter(false())
+    else:
+        query = filtrar_por_documento(query, documento, campo_documento or "comprobante")
 
     return query
 
 
+# ===============================================================
+# FUENTES: consulta base, columnas de orden y campo del filtro G
+# ===============================================================
+FUENTES = {
+    "SIIGO": (consulta_base_siigo, MovimientoSIIGO.fecha_elaboracion, MovimientoSIIGO.id, "comprobante"),
+    "DIAN": (consulta_base_dian, MovimientoDIAN.fecha_emision, MovimientoDIAN.id, "tipo_documento"),
+    "BANCO": (consulta_base_banco, MovimientoBANCO.fecha, MovimientoBANCO.id, None),
+}
+
+
+# ===============================================================
+# CURSOR (fecha, id) PARA PAGINACIÓN POR LLAVE
+# Opaco para el cliente: base64 de {"fecha": ..., "id": ...}
+# ===============================================================
+def codificar_cursor(fila):
+    datos = {
+        "fecha": fila.fecha.isoformat() if fila.fecha else None,
+        "id": str(fila.id)
+    }
+    return base64.urlsafe_b64encode(json.dumps(datos).encode()).decode()
+
+
+def decodificar_cursor(cursor: str):
+    try:
+        datos = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        fecha = date.fromisoformat(datos["fecha"]) if datos["fecha"] else None
+        return fecha, uuid.UUID(datos["id"])
+    except Exception:
+        raise ValueError("Cursor inválido")
+
+
+def _despues_de(fecha_col, id_col, cursor):
+    """
+    Filas posteriores al cursor en el orden (fecha NULLS LAST, id).
+    """
+    fecha, id_ = cursor
+    if fecha is None:
+        return (fecha_col.is_(None)) & (id_col > id_)
+    return or_(tuple_(fecha_col, id_col) > tuple_(fecha, id_), fecha_col.is_(None))
+
+
+def consulta_fuente(fuente: str, empresa_id: str, cursor=None, **filtros):
+    """
+    Consulta de una fuente con los filtros A–G (y el cursor, si lo hay)
+    aplicados, sin ordenar. Devuelve (select, fecha_col, id_col).
+    """
+    if fuente not in FUENTES:
+        raise ValueError("Fuente inválida")
+
+    consulta_base, fecha_col, id_col, campo_documento = FUENTES[fuente]
+
+    q = aplicar_filtros(
+        consulta_base(),
+        empresa_id=empresa_id,
+        fecha_col=fecha_col,
+        campo_documento=campo_documento,
+        **filtros
+    )
+    if cursor is not None:
+        q = q.filter(_despues_de(fecha_col, id_col, cursor))
+    return q, fecha_col, id_col
+
+
+# ===============================================================
+# CONSULTA DE MOVIMIENTOS — una fuente o UNION ALL de varias
+# ===============================================================
+def _union_fuentes(fuentes, empresa_id: str, cursor=None, limite: int = None, **filtros):
+    """
+    Subconsulta "movimientos" con las ramas filtradas de cada fuente.
+    Con límite, cada rama se ordena por (fecha, id) y se corta ahí.
+    """
+    ramas = []
+    for fuente in fuentes:
+        q, fecha_col, id_col = consulta_fuente(fuente, empresa_id, cursor=cursor, **filtros)
+        if limite is not None:
+            q = q.order_by(fecha_col.asc().nulls_last(), id_col.asc()).limit(limite)
+        ramas.append(q)
+
+    return (union_all(*ramas) if len(ramas) > 1 else ramas[0]).subquery("movimientos")
+
+
+def consulta_movimientos(
+        fuentes,
+        empresa_id: str,
+        limite: int = None,
+        desplazamiento: int = 0,
+        cursor: str = None,
+        **filtros
+):
+    """
+    Un solo SELECT con los filtros A–G dentro de cada rama, ordenado por
+    (fecha, id) y paginado en la base, por desplazamiento o por cursor.
+    Con límite, cada rama trae como máximo desplazamiento + limite filas.
+    Devuelve None si no hay fuentes.
+    """
+    if not fuentes:
+        return None
+
+    llave = decodificar_cursor(cursor) if cursor else None
+
+    por_rama = desplazamiento + limite if limite is not None else None
+    movimientos = _union_fuentes(fuentes, empresa_id, cursor=llave, limite=por_rama, **filtros)
+
+    stmt = select(movimientos).order_by(
+        movimientos.c.fecha.asc().nulls_last(),
+        movimientos.c.id.asc()
+    )
+
+    if limite is not None:
+        stmt = stmt.limit(limite)
+    if desplazamiento:
+        stmt = stmt.offset(desplazamiento)
+
+    return stmt
+
+
+def _fuentes_incluidas(incluir_siigo, incluir_dian, incluir_banco):
+    return [
+        fuente for fuente, incluir in (
+            ("SIIGO", incluir_siigo),
+            ("DIAN", incluir_dian),
+            ("BANCO", incluir_banco),
+        ) if incluir
+    ]
+
+
 # ===============================================================
 # FUNCIÓN GENERAL PARA OBTENER MOVIMIENTOS POR FUENTE
 # ===============================================================
+@cacheado
 def obtener_movimientos(
         db: Session,
         fuente: str,
@@ -120,67 +270,346 @@ def obtener_movimientos(
         tipo_reporte=None,
         categoria=None,
         abreviatura=None,
-        documento=None
+        documento=None,
+        limite: int = None,
+        cursor: str = None
 ):
     """
     fuente = 'SIIGO' | 'DIAN' | 'BANCO'
     """
 
-    if fuente == "SIIGO":
-        base = consulta_base_siigo(db)
-        fecha_col = MovimientoSIIGO.fecha_elaboracion
-
-    elif fuente == "DIAN":
-        base = consulta_base_dian(db)
-        fecha_col = MovimientoDIAN.fecha_emision
-
-    elif fuente == "BANCO":
-        base = consulta_base_banco(db)
-        fecha_col = MovimientoBANCO.fecha
-
-    else:
-        raise ValueError("Fuente inválida")
-
     # Aplicar filtros A–G
-    q = aplicar_filtros(
-        base,
-        empresa_id=empresa_id,
+    stmt = consulta_movimientos(
+        [fuente], empresa_id,
+        limite=limite,
+        cursor=cursor,
         periodo=periodo,
         fecha_inicio=fecha_inicio,
         fecha_fin=fecha_fin,
         tipo_reporte=tipo_reporte,
         categoria=categoria,
         abreviatura=abreviatura,
-        documento=documento,
-        fecha_col=fecha_col
+        documento=documento
     )
 
-    return q.order_by(fecha_col.asc()).all()
+    return db.execute(stmt).all()
 
 
 # ===============================================================
 # FUNCIÓN MAESTRA — COMBINAR FUENTES
 # ===============================================================
+def consulta_unificada(
+        empresa_id: str,
+        incluir_siigo=True,
+        incluir_dian=True,
+        incluir_banco=True,
+        **kwargs
+):
+    return consulta_movimientos(
+        _fuentes_incluidas(incluir_siigo, incluir_dian, incluir_banco),
+        empresa_id,
+        **kwargs
+    )
+
+
+def _en_una_consulta(fuentes):
+    return settings.REPORTES_HILOS <= 1 or len(fuentes) == 1
+
+
+def _consultas_por_fuente(fuentes, empresa_id: str, limite, desplazamiento, cursor, filtros):
+    """
+    Una consulta por fuente, cada una con hasta desplazamiento + limite
+    filas ya ordenadas. Devuelve (consultas, por_fuente).
+    """
+    por_fuente = desplazamiento + limite if limite is not None else None
+    consultas = [
+        consulta_movimientos([fuente], empresa_id, limite=por_fuente, cursor=cursor, **filtros)
+        for fuente in fuentes
+    ]
+    return consultas, por_fuente
+
+
+def _mezclar_fuentes(resultados, desplazamiento: int, por_fuente):
+    filas = list(heapq.merge(*resultados, key=_orden_movimiento))
+    return filas[desplazamiento:por_fuente]
+
+
+@cacheado
 def obtener_movimientos_unificados(
         db: Session,
         empresa_id: str,
         incluir_siigo=True,
         incluir_dian=True,
         incluir_banco=True,
+        limite: int = None,
+        desplazamiento: int = 0,
+        cursor: str = None,
         **filtros
 ):
-    resultados = []
+    """
+    Con REPORTES_HILOS > 1 cada fuente se consulta en paralelo (sesiones
+    separadas) y las filas se mezclan por (fecha, id); si no, un solo
+    UNION ALL. El resultado es el mismo.
+    """
+    fuentes = _fuentes_incluidas(incluir_siigo, incluir_dian, incluir_banco)
+    if not fuentes:
+        return []
+
+    if _en_una_consulta(fuentes):
+        stmt = consulta_movimientos(
+            fuentes, empresa_id,
+            limite=limite,
+            desplazamiento=desplazamiento,
+            cursor=cursor,
+            **filtros
+        )
+        return db.execute(stmt).all()
+
+    consultas, por_fuente = _consultas_por_fuente(fuentes, empresa_id, limite, desplazamiento, cursor, filtros)
+    resultados = en_paralelo(db, [
+        lambda sesion, stmt=stmt: sesion.execute(stmt).all()
+        for stmt in consultas
+    ])
+    return _mezclar_fuentes(resultados, desplazamiento, por_fuente)
+
+
+async def _todas_las_filas(db: AsyncSession, stmt):
+    return (await db.execute(stmt)).all()
+
+
+@cacheado
+async def obtener_movimientos_unificados_async(
+        db: AsyncSession,
+        empresa_id: str,
+        incluir_siigo=True,
+        incluir_dian=True,
+        incluir_banco=True,
+        limite: int = None,
+        desplazamiento: int = 0,
+        cursor: str = None,
+        **filtros
+):
+    """
+    obtener_movimientos_unificados sobre una AsyncSession: las consultas
+    por fuente se esperan a la vez (asyncio.gather), sin hilos.
+    """
+    fuentes = _fuentes_incluidas(incluir_siigo, incluir_dian, incluir_banco)
+    if not fuentes:
+        return []
+
+    if _en_una_consulta(fuentes):
+        stmt = consulta_movimientos(
+            fuentes, empresa_id,
+            limite=limite,
+            desplazamiento=desplazamiento,
+            cursor=cursor,
+            **filtros
+        )
+        return await _todas_las_filas(db, stmt)
+
+    consultas, por_fuente = _consultas_por_fuente(fuentes, empresa_id, limite, desplazamiento, cursor, filtros)
+    resultados = await en_paralelo_async(db, [
+        lambda sesion, stmt=stmt: _todas_las_filas(sesion, stmt)
+        for stmt in consultas
+    ])
+    return _mezclar_fuentes(resultados, desplazamiento, por_fuente)
+
+
+def _orden_movimiento(fila):
+    # Mismo orden que consulta_movimientos: fecha NULLS LAST, id
+    return (fila.fecha is None, fila.fecha or date.min, fila.id)
+
+
+# ===============================================================
+# RESUMEN — ingresos y egresos sumados en la base
+# ===============================================================
+AGRUPACIONES_RESUMEN = ("fuente", "categoria")
+
+# Filtros que el resumen mensual puede responder (los demás van a las tablas)
+FILTROS_RESUMEN = ("periodo", "tipo_reporte", "categoria", "abreviatura")
+
+
+def _union_resumen_mensual(fuentes, empresa_id: str, periodo=None, tipo_reporte=None,
+                           categoria=None, abreviatura=None):
+    """
+    Mismas columnas que _union_fuentes (fuente, categoria, tipo_reporte,
+    valor), leídas del resumen mensual: cada fila ya es una suma parcial.
+    periodo llega normalizado (YYYY-MM), igual que la columna.
+    """
+    q = select(
+        ResumenMensual.fuente.label("fuente"),
+        ResumenMensual.categoria_general.label("categoria"),
+        ResumenMensual.tipo_reporte.label("tipo_reporte"),
+        ResumenMensual.valor.label("valor"),
+    ).where(
+        ResumenMensual.empresa_id == empresa_id,
+        ResumenMensual.fuente.in_(fuentes)
+    )
+
+    if periodo:
+        q = q.where(ResumenMensual.periodo == periodo)
+    if tipo_reporte:
+        q = q.where(ResumenMensual.tipo_reporte == tipo_reporte)
+    if categoria:
+        q = q.where(ResumenMensual.categoria_general == categoria)
+    if abreviatura:
+        q = q.where(ResumenMensual.abreviatura_general == abreviatura)
+
+    return q.subquery("movimientos")
+
+
+def _consulta_resumen(
+        empresa_id: str,
+        agrupar_por: str,
+        incluir_siigo,
+        incluir_dian,
+        incluir_banco,
+        usar_resumen: bool,
+        filtros
+):
+    """SELECT de resumir_movimientos; None si no hay fuentes."""
+    if agrupar_por is not None and agrupar_por not in AGRUPACIONES_RESUMEN:
+        raise ValueError(f"Agrupación inválida: {agrupar_por}")
+
+    fuentes = _fuentes_incluidas(incluir_siigo, incluir_dian, incluir_banco)
+    if not fuentes:
+        return None
+
+    # Una sola forma (YYYY-MM) para el resumen, que compara el texto,
+    # y para las tablas, que lo pasan a rango de fechas
+    if filtros.get("periodo"):
+        filtros["periodo"] = normalizar_periodo(filtros["periodo"])
+
+    if usar_resumen is None:
+        usar_resumen = settings.REPORTES_DESDE_RESUMEN
+    usar_resumen = usar_resumen and all(
+        nombre in FILTROS_RESUMEN for nombre, valor in filtros.items() if valor
+    )
+
+    if usar_resumen:
+        movimientos = _union_resumen_mensual(fuentes, empresa_id, **filtros)
+    else:
+        movimientos = _union_fuentes(fuentes, empresa_id, **filtros)
+
+    tipo = func.upper(movimientos.c.tipo_reporte)
+    ingresos = func.coalesce(func.sum(movimientos.c.valor).filter(tipo == "INGRESOS"), 0)
+    egresos = func.coalesce(func.sum(movimientos.c.valor).filter(tipo == "EGRESOS"), 0)
+    totales = [
+        ingresos.label("ingresos"),
+        egresos.label("egresos"),
+        (ingresos - egresos).label("resultado"),
+    ]
 
-    if incluir_siigo:
-        resultados += obtener_movimientos(db, "SIIGO", empresa_id, **filtros)
+    if agrupar_por is None:
+        return select(*totales)
 
-    if incluir_dian:
-        resultados += obtener_movimientos(db, "DIAN", empresa_id, **filtros)
+    grupo = movimientos.c[agrupar_por]
+    return select(grupo, *totales).group_by(grupo).order_by(grupo)
 
-    if incluir_banco:
-        resultados += obtener_movimientos(db, "BANCO", empresa_id, **filtros)
 
-    # Ordenar por fecha
-    resultados.sort(key=lambda x: x.fecha)
+def _armar_resumen(filas, agrupar_por: str):
+    if filas is None:
+        return {"ingresos": 0, "egresos": 0, "resultado": 0}
+
+    if agrupar_por is None:
+        return dict(filas[0]._mapping)
+
+    desglose = [dict(f._mapping) for f in filas]
+    resumen = {
+        "ingresos": sum(f["ingresos"] for f in desglose),
+        "egresos": sum(f["egresos"] for f in desglose),
+    }
+    resumen["resultado"] = resumen["ingresos"] - resumen["egresos"]
+    resumen["desglose"] = desglose
+    return resumen
+
+
+@cacheado
+def resumir_movimientos(
+        db: Session,
+        empresa_id: str,
+        agrupar_por: str = None,
+        incluir_siigo=True,
+        incluir_dian=True,
+        incluir_banco=True,
+        usar_resumen: bool = None,
+        **filtros
+):
+    """
+    SUM(valor) FILTER (WHERE upper(tipo_reporte) = ...) sobre el UNION ALL
+    de las fuentes, en un solo SELECT. agrupar_por = 'fuente' | 'categoria'
+    agrega el desglose (los totales se suman de los grupos).
+
+    Si los filtros lo permiten se lee del resumen mensual (salvo
+    usar_resumen=False o REPORTES_DESDE_RESUMEN apagado); si no, de las
+    tablas de movimientos.
+
+    Devuelve {"ingresos", "egresos", "resultado"[, "desglose"]}.
+    """
+    stmt = _consulta_resumen(
+        empresa_id, agrupar_por, incluir_siigo, incluir_dian, incluir_banco, usar_resumen, filtros
+    )
+    filas = db.execute(stmt).all() if stmt is not None else None
+    return _armar_resumen(filas, agrupar_por)
+
+
+@cacheado
+async def resumir_movimientos_async(
+        db: AsyncSession,
+        empresa_id: str,
+        agrupar_por: str = None,
+        incluir_siigo=True,
+        incluir_dian=True,
+        incluir_banco=True,
+        usar_resumen: bool = None,
+        **filtros
+):
+    """resumir_movimientos sobre una AsyncSession."""
+    stmt = _consulta_resumen(
+        empresa_id, agrupar_por, incluir_siigo, incluir_dian, incluir_banco, usar_resumen, filtros
+    )
+    filas = await _todas_las_filas(db, stmt) if stmt is not None else None
+    return _armar_resumen(filas, agrupar_por)
+
+
+# ===============================================================
+# STREAMING — recorre el resultado con un cursor del servidor
+# ===============================================================
+def recorrer_movimientos(db: Session, stmt, tamano_lote: int = None):
+    """
+    Itera las filas de stmt trayéndolas de a tamano_lote (yield_per usa
+    un cursor del lado del servidor en PostgreSQL), así la memoria no
+    depende del número de filas.
+    """
+    if stmt is None:
+        return
+    tamano_lote = tamano_lote or settings.REPORTES_LOTE_STREAM
+    resultado = db.execute(stmt.execution_options(yield_per=tamano_lote))
+    try:
+        yield from resultado
+    finally:
+        resultado.close()
+
+
+async def recorrer_movimientos_async(db: AsyncSession, stmt, tamano_lote: int = None):
+    """recorrer_movimientos sobre una AsyncSession (AsyncSession.stream)."""
+    if stmt is None:
+        return
+    tamano_lote = tamano_lote or settings.REPORTES_LOTE_STREAM
+    resultado = await db.stream(stmt.execution_options(yield_per=tamano_lote))
+    try:
+        async for fila in resultado:
+            yield fila
+    finally:
+        await resultado.close()
+
+
+# ===============================================================
+# SQL DE TEXTO → lista de dicts (columna → valor)
+# ===============================================================
+def ejecutar_sql(db: Session, sql: str, parametros: dict = None):
+    return [dict(fila) for fila in db.execute(text(sql), parametros or {}).mappings()]
+
 
-    return resultados
+async def ejecutar_sql_async(db: AsyncSession, sql: str, parametros: dict = None):
+    return [dict(fila) for fila in (await db.execute(text(sql), parametros or {})).mappings()]
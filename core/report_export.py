@@ -0,0 +1,182 @@
+# app/core/report_export.py
+
+import argparse
+import sys
+import uuid
+from datetime import date
+from itertools import islice
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.core.config import settings
+from app.core.report_engine import consulta_unificada, recorrer_movimientos
+
+
+# ===============================================================
+# ESQUEMA DE LA EXPORTACIÓN
+# Las columnas de texto repetitivas van como diccionario; valor como
+# float64 (Numeric sin escala fija en la base).
+# ===============================================================
+_TEXTO_CATEGORICO = pa.dictionary(pa.int32(), pa.string())
+
+ESQUEMA = pa.schema([
+    ("fecha", pa.date32()),
+    ("descripcion", pa.string()),
+    ("valor", pa.float64()),
+    ("categoria", _TEXTO_CATEGORICO),
+    ("abreviatura", _TEXTO_CATEGORICO),
+    ("tipo_reporte", _TEXTO_CATEGORICO),
+    ("fuente", _TEXTO_CATEGORICO),
+    ("id", pa.string()),
+])
+
+FORMATOS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+
+def _lote_arrow(filas):
+    columnas = {nombre: [] for nombre in ESQUEMA.names}
+    for fila in filas:
+        columnas["fecha"].append(fila.fecha)
+        columnas["descripcion"].append(fila.descripcion)
+        columnas["valor"].append(float(fila.valor) if fila.valor is not None else None)
+        columnas["categoria"].append(fila.categoria)
+        columnas["abreviatura"].append(fila.abreviatura)
+        columnas["tipo_reporte"].append(fila.tipo_reporte)
+        columnas["fuente"].append(fila.fuente)
+        columnas["id"].append(str(fila.id) if fila.id is not None else None)
+
+    return pa.RecordBatch.from_arrays(
+        [pa.array(columnas[campo.name], type=campo.type) for campo in ESQUEMA],
+        schema=ESQUEMA
+    )
+
+
+def _escritor(destino, formato: str):
+    if formato == "parquet":
+        return pq.ParquetWriter(destino, ESQUEMA, compression="zstd")
+    if formato == "arrow":
+        return pa.ipc.new_stream(destino, ESQUEMA)
+    raise ValueError(f"Formato inválido: {formato}")
+
+
+# ===============================================================
+# ESCRIBIR — un row group (o record batch) por lote del cursor
+# ===============================================================
+def _escribir_por_lotes(db, stmt, destino, formato: str, tamano_lote: int = None):
+    """
+    Lee stmt con un cursor del servidor y escribe cada lote de
+    tamano_lote filas en destino. Cede el número de filas de cada lote
+    apenas queda escrito.
+    """
+    tamano_lote = tamano_lote or settings.REPORTES_LOTE_STREAM
+    filas = recorrer_movimientos(db, stmt, tamano_lote)
+
+    with _escritor(destino, formato) as escritor:
+        while True:
+            lote = list(islice(filas, tamano_lote))
+            if not lote:
+                break
+            escritor.write_batch(_lote_arrow(lote))
+            yield len(lote)
+
+
+def escribir_movimientos(db, stmt, destino, formato: str = "parquet", tamano_lote: int = None):
+    """Escribe en destino (ruta o archivo). Devuelve cuántas filas exportó."""
+    return sum(_escribir_por_lotes(db, stmt, destino, formato, tamano_lote))
+
+
+class _BufferSalida:
+    """Archivo de solo escritura que se vacía entre lotes (para streaming)."""
+
+    closed = False
+
+    def __init__(self):
+        self._partes = []
+        self._posicion = 0
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self._posicion
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self):
+        return True
+
+    def vaciar(self):
+        datos = b"".join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+def transmitir_movimientos(db, stmt, formato: str = "parquet", tamano_lote: int = None):
+    """
+    Generador de bytes: cada lote se entrega apenas se escribe, sin
+    armar el archivo completo en memoria.
+    """
+    buffer = _BufferSalida()
+    for _ in _escribir_por_lotes(db, stmt, buffer, formato, tamano_lote):
+        yield buffer.vaciar()
+    yield buffer.vaciar()
+
+
+# ===============================================================
+# CLI — python -m app.core.report_export EMPRESA_ID SALIDA [filtros]
+# ===============================================================
+def main(argv=None):
+    from app.database.connection import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Exportar movimientos a Parquet / Arrow")
+    parser.add_argument("empresa_id", type=uuid.UUID)
+    parser.add_argument("salida", help="Archivo de salida")
+    parser.add_argument("--formato", choices=sorted(FORMATOS), default="parquet")
+    parser.add_argument("--periodo", default=None, help="YYYY-MM")
+    parser.add_argument("--fecha-inicio", type=date.fromisoformat, default=None)
+    parser.add_argument("--fecha-fin", type=date.fromisoformat, default=None)
+    parser.add_argument("--tipo-reporte", default=None)
+    parser.add_argument("--categoria", default=None)
+    parser.add_argument("--abreviatura", default=None)
+    parser.add_argument("--documento", default=None)
+    parser.add_argument("--sin-siigo", action="store_true")
+    parser.add_argument("--sin-dian", action="store_true")
+    parser.add_argument("--sin-banco", action="store_true")
+    parser.add_argument("--lote", type=int, default=None, help="Filas por row group")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        stmt = consulta_unificada(
+            args.empresa_id,
+            incluir_siigo=not args.sin_siigo,
+            incluir_dian=not args.sin_dian,
+            incluir_banco=not args.sin_banco,
+            periodo=args.periodo,
+            fecha_inicio=args.fecha_inicio,
+            fecha_fin=args.fecha_fin,
+            tipo_reporte=args.tipo_reporte,
+            categoria=args.categoria,
+            abreviatura=args.abreviatura,
+            documento=args.documento
+        )
+        total = escribir_movimientos(db, stmt, args.salida, args.formato, args.lote)
+    finally:
+        db.close()
+
+    print(f"{total} movimientos exportados a {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
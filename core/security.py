@@ -3,9 +3,12 @@ from typing import Optional
 from jose import jwt, JWTError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.core.config import settings
-from app.database.connection import get_db
+from app.database.connection import get_async_db, get_db
+from app.database.replica import get_async_read_db
 from app.models.usuarios import Usuario
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -17,37 +20,72 @@ def create_access_token(subject: str) -> str:
     to_encode = {"sub": subject, "exp": expire}
     return jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
 
-def verify_token(token: str, db: Session):
-    credentials_exception = HTTPException(
+def _credenciales_invalidas():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Token inválido o expirado",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+def _usuario_del_token(token: str):
+    """Devuelve el id (sub) del token o lanza 401."""
     try:
         payload = jwt.decode(
             token,
             settings.JWT_SECRET_KEY,
             algorithms=[settings.JWT_ALGORITHM]
         )
-        user_id = payload.get("sub")
+    except JWTError:
+        raise _credenciales_invalidas()
 
-        if user_id is None:
-            raise credentials_exception
+    user_id = payload.get("sub")
 
-        user = db.query(Usuario).filter(Usuario.id == user_id).first()
+    if user_id is None:
+        raise _credenciales_invalidas()
 
-        if not user or not user.activo:
-            raise credentials_exception
+    return user_id
 
-        return user
+def verify_token(token: str, db: Session):
+    user_id = _usuario_del_token(token)
 
-    except JWTError:
-        raise credentials_exception
+    user = db.query(Usuario).filter(Usuario.id == user_id).first()
+
+    if not user or not user.activo:
+        raise _credenciales_invalidas()
+
+    return user
+
+async def verify_token_async(token: str, db: AsyncSession):
+    user_id = _usuario_del_token(token)
+
+    user = (await db.execute(select(Usuario).where(Usuario.id == user_id))).scalars().first()
+
+    if not user or not user.activo:
+        raise _credenciales_invalidas()
 
+    return user
 
+
+# El usuario se lee con la misma sesión del endpoint: FastAPI resuelve
+# una sola vez cada dependencia por petición, así que get_db (o
+# get_async_db / get_async_read_db) es una sola conexión del pool por petición
 def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
 ):
     return verify_token(token, db)
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await verify_token_async(token, db)
+
+
+async def get_current_user_read_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Para endpoints sobre get_async_read_db (réplica si está al día)."""
+    return await verify_token_async(token, db)
@@ -1,17 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from uuid import UUID
 
-from app.database.connection import get_db
+from app.database.connection import get_async_db, get_db
 from app.schemas.diccionarios import (
     DIANCreate, DIANRead,
     SIIGOCREATE, SIIGORead
 )
 from app.services.diccionario_service import (
-    crear_dian, listar_dian, actualizar_dian, eliminar_dian,
-    crear_siigo, listar_siigo, actualizar_siigo, eliminar_siigo
+    crear_dian, actualizar_dian, eliminar_dian,
+    crear_siigo, actualizar_siigo, eliminar_siigo,
+    listar_dian_async, listar_siigo_async
 )
-from app.core.security import get_current_user
+from app.core.security import get_current_user, get_current_user_async
 
 
 router = APIRouter()
@@ -34,8 +36,8 @@ def crear_d(dic: DIANCreate, db: Session = Depends(get_db), usuario=Depends(get_
 
 
 @router.get("/dian/", response_model=list[DIANRead])
-def listar_d(db: Session = Depends(get_db), usuario=Depends(get_current_user)):
-    return listar_dian(db)
+async def listar_d(db: AsyncSession = Depends(get_async_db), usuario=Depends(get_current_user_async)):
+    return await listar_dian_async(db)
 
 
 @router.put("/dian/{id}", response_model=DIANRead)
@@ -59,8 +61,8 @@ def crear_s(dic: SIIGOCREATE, db: Session = Depends(get_db), usuario=Depends(get
 
 
 @router.get("/siigo/{empresa_id}", response_model=list[SIIGORead])
-def listar_s(empresa_id: UUID, db: Session = Depends(get_db), usuario=Depends(get_current_user)):
-    return listar_siigo(db, empresa_id)
+async def listar_s(empresa_id: UUID, db: AsyncSession = Depends(get_async_db), usuario=Depends(get_current_user_async)):
+    return await listar_siigo_async(db, empresa_id)
 
 
 @router.put("/siigo/{id}", response_model=SIIGORead)
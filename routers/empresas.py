@@ -1,17 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from uuid import UUID
 
-from app.database.connection import get_db
+from app.database.connection import get_async_db, get_db
 from app.schemas.empresas import EmpresaCreate
 from app.schemas.empresas import EmpresaRead
 from app.services.empresa_service import (
     crear_empresa,
     asignar_usuario_a_empresa,
-    listar_empresas_usuario,
-    obtener_empresa
+    listar_empresas_usuario_async,
+    obtener_empresa_async
 )
-from app.core.security import get_current_user
+from app.core.security import get_current_user, get_current_user_async
 
 router = APIRouter()
 
@@ -46,17 +47,17 @@ def asignar(
 
 
 @router.get("/", response_model=list[EmpresaRead])
-def mis_empresas(
-    db: Session = Depends(get_db),
-    usuario_actual = Depends(get_current_user)
+async def mis_empresas(
+    db: AsyncSession = Depends(get_async_db),
+    usuario_actual = Depends(get_current_user_async)
 ):
-    return listar_empresas_usuario(db, usuario_actual.id)
+    return await listar_empresas_usuario_async(db, usuario_actual.id)
 
 
 @router.get("/{empresa_id}", response_model=EmpresaRead)
-def obtener(
+async def obtener(
     empresa_id: UUID,
-    db: Session = Depends(get_db),
-    usuario_actual = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    usuario_actual = Depends(get_current_user_async)
 ):
-    return obtener_empresa(db, empresa_id, usuario_actual)
+    return await obtener_empresa_async(db, empresa_id, usuario_actual)
@@ -1,18 +1,19 @@
 from fastapi import APIRouter, UploadFile, File, Depends
-from sqlalchemy.orm import Session
 from uuid import UUID
 
-from app.database.connection import get_db
 from app.core.security import get_current_user
 from app.services.etl_banco_service import procesar_banco_json
+from app.core.etl_jobs import encolar_carga
 
 router = APIRouter()
 
-@router.post("/{empresa_id}")
+@router.post("/{empresa_id}", status_code=202)
 def cargar_banco(
     empresa_id: UUID,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
     usuario = Depends(get_current_user)
 ):
-    return procesar_banco_json(db, empresa_id, file)
+    """
+    Guarda el archivo y lo encola; el avance se consulta en /etl/jobs/{job_id}.
+    """
+    return encolar_carga(procesar_banco_json, empresa_id, file, "BANCO")
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from uuid import UUID
+
+from app.database.connection import get_db
+from app.core.security import get_current_user
+from app.services.cargas_service import listar_errores_carga
+
+router = APIRouter()
+
+@router.get("/{carga_id}/errores")
+def errores_carga(
+    carga_id: UUID,
+    despues_de_fila: int | None = Query(None, ge=0),
+    por_pagina: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    usuario = Depends(get_current_user)
+):
+    """
+    Errores de una carga ordenados por fila, por páginas: la siguiente
+    se pide con despues_de_fila = siguiente_despues_de_fila de la actual.
+    """
+    return listar_errores_carga(db, carga_id, despues_de_fila, por_pagina)
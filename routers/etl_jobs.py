@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.database.connection import get_db
+from app.core.security import get_current_user
+from app.core.etl_jobs import obtener_estado_job
+
+router = APIRouter()
+
+@router.get("/{job_id}")
+def estado_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    usuario = Depends(get_current_user)
+):
+    """
+    Estado del job: en_cola | procesando | terminado | fallido,
+    progreso (leidos, insertados, errores) y el CargaLog final.
+    """
+    return obtener_estado_job(db, job_id)
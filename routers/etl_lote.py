@@ -0,0 +1,49 @@
+import json
+import uuid
+from collections import Counter
+
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
+
+from app.core.security import get_current_user
+from app.core.etl_jobs import guardar_upload, encolar_lote
+from app.core.etl_batch import ejecutar_lote, validar_manifiesto
+
+router = APIRouter()
+
+@router.post("/", status_code=202)
+def cargar_lote(
+    manifiesto: str = Form(...),
+    files: list[UploadFile] = File(...),
+    usuario = Depends(get_current_user)
+):
+    """
+    manifiesto = JSON [{"empresa_id", "fuente": SIIGO|DIAN|BANCO, "archivo": nombre del archivo subido}]
+
+    Las cargas se reparten en un pool de procesos (en orden por empresa);
+    el avance y el resumen se consultan en /etl/jobs/{job_id}.
+    """
+    try:
+        entradas = json.loads(manifiesto)
+        validar_manifiesto(entradas)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Manifiesto inválido: {e}")
+
+    # El manifiesto nombra los archivos: dos con el mismo nombre serían ambiguos
+    repetidos = sorted(nombre for nombre, n in Counter(f.filename for f in files).items() if n > 1)
+    if repetidos:
+        raise HTTPException(status_code=400, detail=f"Archivos con nombre repetido: {repetidos}")
+
+    archivos = {f.filename: f for f in files}
+    faltantes = [e["archivo"] for e in entradas if e["archivo"] not in archivos]
+    if faltantes:
+        raise HTTPException(status_code=400, detail=f"Archivos no adjuntos: {faltantes}")
+
+    prefijo = str(uuid.uuid4())
+    rutas = {nombre: guardar_upload(f, f"{prefijo}_{i}") for i, (nombre, f) in enumerate(archivos.items())}
+
+    manifiesto_disco = [
+        dict(e, archivo=rutas[e["archivo"]], archivo_nombre=e["archivo"])
+        for e in entradas
+    ]
+
+    return encolar_lote(ejecutar_lote, manifiesto_disco, list(rutas.values()))
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends
+
+from app.database.connection import async_engine, engine, read_engine
+from app.database.pool_conexiones import estado_pool
+from app.database.replica import lecturas_replica
+from app.core.security import get_current_user_async
+
+router = APIRouter()
+
+
+@router.get("/pool")
+async def estado_pools(usuario = Depends(get_current_user_async)):
+    """
+    Conexiones en uso, inactivas y en overflow de cada engine, con el
+    número de checkouts, timeouts y el tiempo de espera (total, promedio,
+    máximo e histograma) desde que arrancó el proceso.
+
+    Es async y autentica con el engine async: sigue respondiendo aunque
+    el pool sync esté agotado.
+    """
+    estado = {
+        "sync": estado_pool(engine.pool),
+        "async": estado_pool(async_engine.pool),
+    }
+    if read_engine is not None:
+        estado["sync_replica"] = estado_pool(read_engine.pool)
+    return estado
+
+
+@router.get("/replica")
+async def estado_replica(usuario = Depends(get_current_user_async)):
+    """
+    Lecturas de reportes servidas por la réplica y las que cayeron en la
+    primaria, por rezago (versión de datos atrasada) o por error.
+    """
+    return lecturas_replica.resumen()
@@ -1,27 +1,73 @@
 # app/routers/reportes.py
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
 
-from app.database.connection import get_db
-from app.core.security import get_current_user
+from app.core.config import settings
+from app.database.replica import get_async_read_db, sesion_lectura, sesion_lectura_async
+from app.core.security import get_current_user_async, get_current_user_read_async
+from app.core.report_cache import cache_reportes
+from app.core.report_export import FORMATOS, transmitir_movimientos
+from app.services.tendencia_service import tendencia_mensual_async
+from app.services.report_service import obtener_reporte_detallado_async
+from app.services.report_filtered_service import generar_reporte_filtrado_async
 from app.core.report_engine import (
-    obtener_movimientos,
-    obtener_movimientos_unificados
+    codificar_cursor,
+    consulta_movimientos,
+    consulta_unificada,
+    obtener_movimientos_unificados_async,
+    recorrer_movimientos_async,
+    resumir_movimientos_async
 )
 
 
-router = APIRouter()
+router = APIRouter(prefix="/reportes", tags=["Reportes"])
+
+# Los endpoints de lectura son async sobre get_async_read_db (asyncpg):
+# mientras una consulta espera a la base el worker atiende otras peticiones
+
+
+# ===============================================================
+# Respuesta de movimientos: página JSON o streaming NDJSON
+# ===============================================================
+async def _ndjson(stmt, empresa_id):
+    # Sesión propia: el stream sigue leyendo después de que el endpoint retorna
+    db = await sesion_lectura_async(empresa_id)
+    try:
+        async for fila in recorrer_movimientos_async(db, stmt):
+            yield json.dumps(jsonable_encoder(dict(fila._mapping))) + "\n"
+    finally:
+        await db.close()
+
+
+async def _responder_movimientos(db: AsyncSession, stmt, empresa_id, limite, formato: str, response: Response):
+    """
+    formato=json   → lista; si la página está llena, el header
+                     X-Siguiente-Cursor trae el cursor de la siguiente.
+    formato=ndjson → una fila JSON por línea, leída por lotes.
+    """
+    if formato == "ndjson":
+        return StreamingResponse(_ndjson(stmt, empresa_id), media_type="application/x-ndjson")
+
+    filas = (await db.execute(stmt)).all() if stmt is not None else []
+    if limite is not None and len(filas) == limite:
+        response.headers["X-Siguiente-Cursor"] = codificar_cursor(filas[-1])
+    return filas
 
 
 # ===============================================================
 # Endpoint genérico para movimientos por fuente
 # ===============================================================
 @router.get("/movimientos/{fuente}")
-def listar_por_fuente(
+async def listar_por_fuente(
     fuente: str,
     empresa_id: str,
+    response: Response,
     periodo: str | None = None,
     fecha_inicio: date | None = None,
     fecha_fin: date | None = None,
@@ -29,33 +75,45 @@ def listar_por_fuente(
     categoria: str | None = None,
     abreviatura: str | None = None,
     documento: str | None = None,
-    db: Session = Depends(get_db),
-    usuario=Depends(get_current_user),
+    limite: int | None = Query(None, ge=1, le=settings.REPORTES_PAGINA_MAX),
+    cursor: str | None = None,
+    formato: str = Query("json", pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_async_read_db),
+    usuario=Depends(get_current_user_read_async),
 ):
     """
     fuente = SIIGO | DIAN | BANCO
+
+    Paginación por llave: limite + cursor (header X-Siguiente-Cursor).
+    formato=ndjson transmite todas las filas sin armar la lista en memoria.
     """
+    try:
+        stmt = consulta_movimientos(
+            [fuente.upper()],
+            empresa_id,
+            limite=limite,
+            cursor=cursor,
+            periodo=periodo,
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin,
+            tipo_reporte=tipo_reporte,
+            categoria=categoria,
+            abreviatura=abreviatura,
+            documento=documento
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    return obtener_movimientos(
-        db=db,
-        fuente=fuente.upper(),
-        empresa_id=empresa_id,
-        periodo=periodo,
-        fecha_inicio=fecha_inicio,
-        fecha_fin=fecha_fin,
-        tipo_reporte=tipo_reporte,
-        categoria=categoria,
-        abreviatura=abreviatura,
-        documento=documento
-    )
+    return await _responder_movimientos(db, stmt, empresa_id, limite, formato, response)
 
 
 # ===============================================================
 # Movimientos unificados (SIIGO + DIAN + BANCO)
 # ===============================================================
 @router.get("/movimientos-unificados")
-def movimientos_unificados(
+async def movimientos_unificados(
     empresa_id: str,
+    response: Response,
     periodo: str | None = None,
     fecha_inicio: date | None = None,
     fecha_fin: date | None = None,
@@ -66,22 +124,104 @@ def movimientos_unificados(
     incluir_siigo: bool = True,
     incluir_dian: bool = True,
     incluir_banco: bool = True,
-    db: Session = Depends(get_db),
-    usuario=Depends(get_current_user)
+    limite: int | None = Query(None, ge=1, le=settings.REPORTES_PAGINA_MAX),
+    desplazamiento: int = Query(0, ge=0),
+    cursor: str | None = None,
+    formato: str = Query("json", pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_async_read_db),
+    usuario=Depends(get_current_user_read_async)
 ):
-    return obtener_movimientos_unificados(
-        db=db,
-        empresa_id=empresa_id,
-        incluir_siigo=incluir_siigo,
-        incluir_dian=incluir_dian,
-        incluir_banco=incluir_banco,
-        periodo=periodo,
-        fecha_inicio=fecha_inicio,
-        fecha_fin=fecha_fin,
-        tipo_reporte=tipo_reporte,
-        categoria=categoria,
-        abreviatura=abreviatura,
-        documento=documento
+    """
+    Movimientos de las fuentes elegidas en una sola consulta (UNION ALL),
+    ordenados por (fecha, id).
+
+    Paginación por llave: limite + cursor (header X-Siguiente-Cursor);
+    limite + desplazamiento sigue disponible. formato=ndjson transmite
+    todas las filas sin armar la lista en memoria.
+    """
+    if cursor and desplazamiento:
+        raise HTTPException(status_code=400, detail="Use cursor o desplazamiento, no ambos.")
+
+    try:
+        stmt = consulta_unificada(
+            empresa_id,
+            incluir_siigo=incluir_siigo,
+            incluir_dian=incluir_dian,
+            incluir_banco=incluir_banco,
+            limite=limite,
+            desplazamiento=desplazamiento,
+            cursor=cursor,
+            periodo=periodo,
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin,
+            tipo_reporte=tipo_reporte,
+            categoria=categoria,
+            abreviatura=abreviatura,
+            documento=documento
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return await _responder_movimientos(db, stmt, empresa_id, limite, formato, response)
+
+
+# ===============================================================
+# Exportación columnar (Parquet / Arrow IPC) de movimientos unificados
+# ===============================================================
+def _exportar(stmt, empresa_id, formato: str):
+    # Sesión propia, igual que _ndjson. pyarrow escribe de forma
+    # síncrona: StreamingResponse recorre este generador en un hilo
+    db = sesion_lectura(empresa_id)
+    try:
+        yield from transmitir_movimientos(db, stmt, formato)
+    finally:
+        db.close()
+
+
+@router.get("/movimientos-exportar")
+async def exportar_movimientos(
+    empresa_id: str,
+    periodo: str | None = None,
+    fecha_inicio: date | None = None,
+    fecha_fin: date | None = None,
+    tipo_reporte: str | None = None,
+    categoria: str | None = None,
+    abreviatura: str | None = None,
+    documento: str | None = None,
+    incluir_siigo: bool = True,
+    incluir_dian: bool = True,
+    incluir_banco: bool = True,
+    formato: str = Query("parquet", pattern="^(parquet|arrow)$"),
+    usuario=Depends(get_current_user_async)
+):
+    """
+    Los mismos movimientos (y filtros) de /movimientos-unificados en un
+    archivo Parquet o un stream Arrow IPC, escrito por lotes desde un
+    cursor del servidor.
+    """
+    try:
+        stmt = consulta_unificada(
+            empresa_id,
+            incluir_siigo=incluir_siigo,
+            incluir_dian=incluir_dian,
+            incluir_banco=incluir_banco,
+            periodo=periodo,
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin,
+            tipo_reporte=tipo_reporte,
+            categoria=categoria,
+            abreviatura=abreviatura,
+            documento=documento
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    media_type, extension = FORMATOS[formato]
+    nombre = f"movimientos_{empresa_id}_{periodo or 'todos'}.{extension}"
+    return StreamingResponse(
+        _exportar(stmt, empresa_id, formato),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{nombre}"'}
     )
 
 
@@ -89,14 +229,14 @@ def movimientos_unificados(
 # Ingresos basados en categoría o tipo_reporte
 # ===============================================================
 @router.get("/ingresos")
-def reporte_ingresos(
+async def reporte_ingresos(
     empresa_id: str,
     periodo: str | None = None,
-    db: Session = Depends(get_db),
-    usuario=Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    usuario=Depends(get_current_user_read_async)
 ):
-    return obtener_movimientos_unificados(
-        db=db,
+    return await obtener_movimientos_unificados_async(
+        db,
         empresa_id=empresa_id,
         periodo=periodo,
         tipo_reporte="INGRESOS"
@@ -107,14 +247,14 @@ def reporte_ingresos(
 # Egresos basados en categoría o tipo_reporte
 # ===============================================================
 @router.get("/egresos")
-def reporte_egresos(
+async def reporte_egresos(
     empresa_id: str,
     periodo: str | None = None,
-    db: Session = Depends(get_db),
-    usuario=Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    usuario=Depends(get_current_user_read_async)
 ):
-    return obtener_movimientos_unificados(
-        db=db,
+    return await obtener_movimientos_unificados_async(
+        db,
         empresa_id=empresa_id,
         periodo=periodo,
         tipo_reporte="EGRESOS"
@@ -125,80 +265,105 @@ def reporte_egresos(
 # Resumen general: suma de ingresos y egresos
 # ===============================================================
 @router.get("/resumen-general")
-def resumen_general(
+async def resumen_general(
     empresa_id: str,
     periodo: str,
-    db: Session = Depends(get_db),
-    usuario=Depends(get_current_user)
+    desglose: str | None = Query(None, pattern="^(fuente|categoria)$"),
+    crudo: bool = False,
+    db: AsyncSession = Depends(get_async_read_db),
+    usuario=Depends(get_current_user_read_async)
 ):
-    datos = obtener_movimientos_unificados(
-        db=db,
-        empresa_id=empresa_id,
-        periodo=periodo
-    )
-
-    ingresos = sum(d.valor for d in datos if d.tipo_reporte.upper() == "INGRESOS")
-    egresos = sum(d.valor for d in datos if d.tipo_reporte.upper() == "EGRESOS")
-
-    return {
-        "periodo": periodo,
-        "ingresos": ingresos,
-        "egresos": egresos,
-        "resultado": ingresos - egresos
-    }
-
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database.connection import get_db
-from app.services.report_service import obtener_reporte_matriz
-
-router = APIRouter(prefix="/reportes", tags=["Reportes"])
-
-@router.get("/matriz")
-def matriz_conciliacion(db: Session = Depends(get_db)):
-    return obtener_reporte_matriz(db)
+    """
+    Ingresos, egresos y resultado del periodo, sumados en la base.
+    desglose = fuente | categoria agrega los totales por grupo.
+    Se lee del resumen mensual; crudo=true recalcula desde los movimientos.
+    """
+    try:
+        resumen = await resumir_movimientos_async(
+            db,
+            empresa_id,
+            agrupar_por=desglose,
+            usar_resumen=False if crudo else None,
+            periodo=periodo
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database.connection import get_db
-from app.services.report_service import obtener_reporte_detallado
+    return {"periodo": periodo, **resumen}
 
-router = APIRouter(prefix="/reportes", tags=["Reportes"])
 
+# ===============================================================
+# Tendencia: indicadores mes a mes en un rango de periodos
+# ===============================================================
+@router.get("/tendencia")
+async def tendencia(
+    empresa_id: str,
+    periodo_inicio: str,
+    periodo_fin: str,
+    incluir_siigo: bool = True,
+    incluir_dian: bool = True,
+    incluir_banco: bool = True,
+    crudo: bool = False,
+    db: AsyncSession = Depends(get_async_read_db),
+    usuario=Depends(get_current_user_read_async)
+):
+    """
+    Ingresos, egresos, PUB / CON / PNI, avance, rezago y calidad por mes.
+    Ingresos, egresos y PUB se leen del resumen mensual (crudo=true agrupa
+    las tablas de movimientos por date_trunc('month')); CON y PNI siguen
+    las definiciones del reporte detallado y el global. Los periodos
+    aceptan YYYY-M y se normalizan a YYYY-MM.
+    """
+    try:
+        return await tendencia_mensual_async(
+            db,
+            empresa_id,
+            periodo_inicio,
+            periodo_fin,
+            incluir_siigo=incluir_siigo,
+            incluir_dian=incluir_dian,
+            incluir_banco=incluir_banco,
+            usar_resumen=False if crudo else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/detallado")
-def reporte_detallado(empresa_id: str, periodo: str, db: Session = Depends(get_db)):
-    return obtener_reporte_detallado(db, empresa_id, periodo)
 
-@router.get("/global")
-def reporte_global_api(periodo: str, db: Session = Depends(get_db)):
+# ===============================================================
+# Estado del cache de reportes
+# ===============================================================
+@router.get("/cache")
+async def estado_cache(usuario=Depends(get_current_user_async)):
     """
-    Reporte Global Multiempresa:
-    PUB, CON, PNC, PNI, avance, rezago, calidad, totales.
+    Entradas, aciertos y fallos del cache de reportes de este proceso.
+    Las cargas del ETL invalidan por versión de datos, no hace falta
+    limpiarlo a mano.
     """
-    from app.services.report_global_service import reporte_global
-    return reporte_global(periodo, db)
+    return cache_reportes.estadisticas()
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from app.database.connection import get_db
-from app.services.report_filtered_service import generar_reporte_filtrado
 
-router = APIRouter(prefix="/reportes", tags=["Reportes"])
+# ===============================================================
+# Matriz de conciliación: PUB / CON / PNI por categoría
+# ===============================================================
+@router.get("/matriz")
+async def matriz_conciliacion(db: AsyncSession = Depends(get_async_read_db), usuario=Depends(get_current_user_read_async)):
+    """Matriz sin filtros (todas las empresas y fechas)."""
+    return await generar_reporte_filtrado_async(db=db)
 
 
 @router.get("/matriz-filtrada")
-def reporte_matriz_filtrada(
+async def reporte_matriz_filtrada(
     empresa_id: str = Query(None),
-    fecha_inicio: str = Query(None),
-    fecha_fin: str = Query(None),
-    db: Session = Depends(get_db)
+    fecha_inicio: date = Query(None),
+    fecha_fin: date = Query(None),
+    db: AsyncSession = Depends(get_async_read_db),
+    usuario=Depends(get_current_user_read_async)
 ):
     """
     Devuelve PUB / CON / PNI por categoría,
     filtrado por empresa y fechas.
     """
-    data = generar_reporte_filtrado(
+    data = await generar_reporte_filtrado_async(
         db=db,
         empresa_id=empresa_id,
         fecha_inicio=fecha_inicio,
@@ -214,3 +379,26 @@ def reporte_matriz_filtrada(
         },
         "data": data
     }
+
+
+# ===============================================================
+# Reporte detallado y reporte global multiempresa
+# ===============================================================
+@router.get("/detallado")
+async def reporte_detallado(
+    empresa_id: str,
+    periodo: str,
+    db: AsyncSession = Depends(get_async_read_db),
+    usuario=Depends(get_current_user_read_async)
+):
+    return await obtener_reporte_detallado_async(db, empresa_id, periodo)
+
+
+@router.get("/global")
+async def reporte_global_api(periodo: str, db: AsyncSession = Depends(get_async_read_db), usuario=Depends(get_current_user_read_async)):
+    """
+    Reporte Global Multiempresa:
+    PUB, CON, PNC, PNI, avance, rezago, calidad, totales.
+    """
+    from app.services.report_global_service import reporte_global_async
+    return await reporte_global_async(periodo, db)
@@ -0,0 +1,65 @@
+import os
+import random
+import sys
+import uuid
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# connection.py arma los engines al importarse (sin conectar); las pruebas
+# que necesitan base de datos usan su propio SQLite en memoria
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg2://localhost/pruebas")
+
+import app  # noqa: E402
+
+# core/ y routers/ están en la raíz del repo y se importan como app.core / app.routers
+app.__path__ = list(app.__path__) + [RAIZ]
+
+
+import pytest  # noqa: E402
+from sqlalchemy import Column, MetaData, Table, Uuid, create_engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.models.movimientos_banco import MovimientoBANCO  # noqa: E402
+from app.models.movimientos_dian import MovimientoDIAN  # noqa: E402
+from app.models.movimientos_siigo import MovimientoSIIGO  # noqa: E402
+
+
+# ===============================================================
+# SQLite en memoria con las tres tablas de movimientos pobladas:
+# 15 filas por fuente de una empresa (db.info["empresa_id"]), pocas
+# fechas distintas (empates que desempata el id) y DIAN con filas sin fecha
+# ===============================================================
+@pytest.fixture
+def db_movimientos():
+    engine = create_engine("sqlite://")
+    # Solo las tablas de movimientos; empresas mínima para las llaves foráneas
+    metadata = MetaData()
+    Table("empresas", metadata, Column("id", Uuid, primary_key=True))
+    for modelo in (MovimientoSIIGO, MovimientoDIAN, MovimientoBANCO):
+        modelo.__table__.to_metadata(metadata)
+    metadata.create_all(engine)
+
+    rnd = random.Random(11)
+    empresa_id = uuid.uuid4()
+    fechas = [date(2024, 3, 1) + timedelta(days=d) for d in range(4)]
+    comunes = dict(empresa_id=empresa_id, abreviatura_general="X", categoria_general="X", tipo_reporte="INGRESOS")
+
+    with Session(engine) as db:
+        db.execute(metadata.tables["movimientos_siigo"].insert(), [
+            dict(comunes, comprobante="RC", secuencia=str(i), fecha_elaboracion=rnd.choice(fechas), valor=i)
+            for i in range(15)
+        ])
+        db.execute(metadata.tables["movimientos_dian"].insert(), [
+            dict(comunes, grupo="EMITIDO", tipo_documento="FACTURA", cufe_cude=f"c{i}",
+                 fecha_emision=rnd.choice(fechas + [None]), total=i, iva=0, total_bruto=i)
+            for i in range(15)
+        ])
+        db.execute(metadata.tables["movimientos_banco"].insert(), [
+            dict(comunes, fecha=rnd.choice(fechas), descripcion=f"mov {i}", valor=i, json_fuente={})
+            for i in range(15)
+        ])
+        db.commit()
+        db.info["empresa_id"] = empresa_id
+        yield db
@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from app.core.aho_corasick import AutomataConceptos
+
+
+def _lineal(conceptos, texto):
+    # Recorrido original del diccionario NBK
+    for concepto in conceptos:
+        if concepto in texto:
+            return concepto
+    return None
+
+
+def _palabra(rnd, alfabeto, minimo, maximo):
+    return "".join(rnd.choice(alfabeto) for _ in range(rnd.randint(minimo, maximo)))
+
+
+@pytest.mark.parametrize("semilla", range(20))
+def test_igual_al_recorrido_lineal(semilla):
+    rnd = random.Random(semilla)
+    # Alfabeto corto: muchos conceptos que se solapan o son prefijos/sufijos de otros
+    alfabeto = "abc "
+    conceptos = [_palabra(rnd, alfabeto, 1, 5) for _ in range(rnd.randint(1, 30))]
+    automata = AutomataConceptos(conceptos)
+
+    for _ in range(200):
+        texto = _palabra(rnd, alfabeto, 0, 40)
+        assert automata.buscar(texto) == _lineal(conceptos, texto), (conceptos, texto)
+
+
+def test_gana_el_primero_del_diccionario_no_el_primero_del_texto():
+    automata = AutomataConceptos(["COMISION", "IVA", "GMF"])
+
+    assert automata.buscar("IVA SOBRE COMISION") == "COMISION"
+    assert automata.buscar("GMF 4X1000 IVA") == "IVA"
+    assert automata.buscar("PAGO PROVEEDOR") is None
+
+
+def test_diccionario_vacio_y_concepto_vacio():
+    assert AutomataConceptos([]).buscar("COMISION") is None
+    assert AutomataConceptos(["", "COMISION"]).buscar("COMISION") == ""
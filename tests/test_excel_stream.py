@@ -0,0 +1,50 @@
+import io
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from app.core.excel_stream import leer_excel_por_lotes
+
+
+def _libro(filas):
+    libro = Workbook()
+    hoja = libro.active
+    for fila in filas:
+        hoja.append(fila)
+    archivo = io.BytesIO()
+    libro.save(archivo)
+    archivo.seek(0)
+    return archivo
+
+
+FILAS = [
+    # Encabezado con una celda vacía y un nombre repetido
+    ["Comprobante", "Fecha elaboración", "Débito", None, "Débito", "Descripción"],
+    ["RC 1", datetime(2024, 1, 5), 100, 0.25, 3.0, "pago"],
+    ["EGR", "2024-02-01", 1500.5, None, 0, ""],
+    [None, None, None, None, None, None],  # en blanco entre datos: se conserva
+    ["NB", datetime(2024, 3, 31, 14, 30), -7, True, 12345678901, "con, coma"],
+    ["RC 1", None, 1e-3, None, None, None, "columna de más"],
+    ["EGR"],  # fila corta
+    [None, None, None],  # en blanco al final: se descartan
+    [None],
+]
+
+
+@pytest.mark.parametrize("tamano_lote", [1, 2, 3, 100])
+def test_igual_a_read_excel_dtype_str(tamano_lote):
+    esperado = pd.read_excel(_libro(FILAS), dtype=str)
+
+    lotes = list(leer_excel_por_lotes(_libro(FILAS), tamano_lote=tamano_lote))
+
+    assert all(len(lote) <= tamano_lote for lote in lotes)
+    obtenido = pd.concat(lotes)
+    assert list(obtenido.columns) == list(esperado.columns)
+    assert list(obtenido.index) == list(esperado.index)
+    pd.testing.assert_frame_equal(obtenido.astype(object), esperado.astype(object))
+
+
+def test_archivo_solo_con_encabezado():
+    assert list(leer_excel_por_lotes(_libro([["Comprobante", "Débito"]]))) == []
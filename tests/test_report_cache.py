@@ -0,0 +1,30 @@
+from app.core.report_cache import CacheReportes, tamano_aproximado
+
+
+def test_desaloja_por_tamano_aunque_haya_entradas_libres():
+    cache = CacheReportes(maximo=100, maximo_bytes=1000)
+
+    for i in range(5):
+        cache.guardar(i, [i], tamano=300)
+
+    assert cache.estadisticas()["entradas"] == 3
+    assert cache.estadisticas()["bytes_aprox"] == 900
+    assert cache.obtener(0) == (False, None)
+    assert cache.obtener(4) == (True, [4])
+
+
+def test_no_guarda_un_resultado_mas_grande_que_el_cache():
+    cache = CacheReportes(maximo=100, maximo_bytes=1000)
+    cache.guardar("chico", 1, tamano=10)
+    cache.guardar("grande", 2, tamano=5000)
+
+    assert cache.obtener("grande") == (False, None)
+    assert cache.obtener("chico") == (True, 1)
+    assert cache.estadisticas()["omitidos_por_tamano"] == 1
+
+
+def test_tamano_crece_con_las_filas():
+    filas = [("SIIGO", "2024-01-05", 100.5, "O-RCJ")] * 10
+
+    assert tamano_aproximado(filas * 100) > 50 * tamano_aproximado(filas)
+    assert tamano_aproximado({"meses": filas}) > tamano_aproximado(filas)
@@ -0,0 +1,64 @@
+import io
+import math
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from app.core.report_engine import consulta_unificada
+from app.core.report_export import ESQUEMA, escribir_movimientos, transmitir_movimientos
+
+
+def _esperado(db, stmt):
+    return [
+        {
+            "fecha": f.fecha,
+            "descripcion": f.descripcion,
+            "valor": float(f.valor),
+            "categoria": f.categoria,
+            "abreviatura": f.abreviatura,
+            "tipo_reporte": f.tipo_reporte,
+            "fuente": f.fuente,
+            "id": str(f.id),
+        }
+        for f in db.execute(stmt).all()
+    ]
+
+
+@pytest.mark.parametrize("tamano_lote", [4, 1000])
+def test_parquet_por_lotes_conserva_las_filas(db_movimientos, tamano_lote):
+    db = db_movimientos
+    stmt = consulta_unificada(db.info["empresa_id"])
+    esperado = _esperado(db, stmt)
+
+    partes = list(transmitir_movimientos(db, stmt, "parquet", tamano_lote))
+
+    archivo = pq.ParquetFile(io.BytesIO(b"".join(partes)))
+    # Un row group por lote; cada lote sale del generador apenas se escribe
+    assert archivo.metadata.num_row_groups == math.ceil(len(esperado) / tamano_lote)
+    assert len(partes) == archivo.metadata.num_row_groups + 1
+    tabla = archivo.read()
+    assert tabla.schema.equals(ESQUEMA)
+    assert tabla.to_pylist() == esperado
+
+
+def test_arrow_ipc_conserva_las_filas(db_movimientos):
+    db = db_movimientos
+    stmt = consulta_unificada(db.info["empresa_id"])
+    esperado = _esperado(db, stmt)
+
+    datos = b"".join(transmitir_movimientos(db, stmt, "arrow", 10))
+
+    lector = pa.ipc.open_stream(datos)
+    lotes = list(lector)
+    assert [lote.num_rows for lote in lotes] == [10, 10, 10, 10, 5]
+    assert pa.Table.from_batches(lotes).to_pylist() == esperado
+
+
+def test_escribir_a_archivo(db_movimientos, tmp_path):
+    db = db_movimientos
+    stmt = consulta_unificada(db.info["empresa_id"], incluir_dian=False)
+    destino = tmp_path / "movimientos.parquet"
+
+    assert escribir_movimientos(db, stmt, str(destino)) == 30
+    assert pq.read_table(destino).num_rows == 30
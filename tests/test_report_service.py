@@ -0,0 +1,114 @@
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.services.report_service import CATEGORIAS, obtener_siigo_clasificado
+
+
+COLUMNAS = (
+    "empresa_id", "categoria_general", "abreviatura_general", "codigo_contable",
+    "cuenta_contable", "identificacion_tercero", "nombre_tercero", "comprobante",
+    "secuencia", "fecha_elaboracion", "descripcion_general", "detalle",
+    "centro_costo", "debito", "credito", "activo",
+)
+
+EMPRESA = str(uuid.uuid4())
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conexion:
+        conexion.execute(text(f"CREATE TABLE movimientos_siigo ({', '.join(COLUMNAS)})"))
+    with Session(engine) as sesion:
+        yield sesion
+
+
+def _insertar(db, filas):
+    db.execute(
+        text(f"INSERT INTO movimientos_siigo VALUES ({', '.join(':' + c for c in COLUMNAS)})"),
+        [
+            {
+                **{c: None for c in COLUMNAS},
+                "empresa_id": EMPRESA,
+                "comprobante": "RC",
+                "fecha_elaboracion": "2024-03-15",
+                "activo": True,
+                **fila,
+            }
+            for fila in filas
+        ]
+    )
+
+
+def _clasificar(db):
+    return obtener_siigo_clasificado(db, EMPRESA, "2024-03-01", "2024-03-31")
+
+
+def _referencia(filas):
+    """Reglas de las dos consultas originales (CON y PNI por separado)."""
+    con = {cat: [] for cat in CATEGORIAS}
+    pni = {cat: [] for cat in CATEGORIAS}
+    for f in filas:
+        cat, valor = f["categoria_general"], f["debito"] - f["credito"]
+        if cat not in con:
+            continue
+        if not (cat == "O-RCJ" and valor <= 0) and not (cat == "O-EGR" and valor >= 0):
+            con[cat].append(f["secuencia"])
+        cuenta = f["codigo_contable"]
+        if cuenta is None or not cuenta.startswith(("1110", "1120")):
+            continue
+        if (cat == "O-RCJ" and valor > 0) or (cat == "O-EGR" and valor < 0) or cat == "O-NBK":
+            continue
+        pni[cat].append(f["secuencia"])
+    return con, pni
+
+
+def _secuencias(por_categoria):
+    return {cat: sorted(f["secuencia"] for f in filas) for cat, filas in por_categoria.items()}
+
+
+def test_sin_codigo_contable_no_es_pni(db):
+    _insertar(db, [
+        {"secuencia": "1", "categoria_general": "O-RCJ", "codigo_contable": None, "debito": 0, "credito": 50},
+        {"secuencia": "2", "categoria_general": "E-DE", "codigo_contable": None, "debito": 10, "credito": 0},
+        {"secuencia": "3", "categoria_general": "O-RCJ", "codigo_contable": "111005", "debito": 0, "credito": 50},
+    ])
+
+    contabilizados, pni = _clasificar(db)
+
+    assert [f["secuencia"] for f in contabilizados["E-DE"]] == ["2"]
+    assert contabilizados["O-RCJ"] == []
+    assert [f["secuencia"] for f in pni["O-RCJ"]] == ["3"]
+    assert pni["E-DE"] == []
+
+
+def test_igual_a_las_reglas_originales(db):
+    cuentas = [None, "111005", "112010", "130505", "1110"]
+    categorias = CATEGORIAS + ["OTRA"]
+    filas = []
+    for i in range(300):
+        filas.append({
+            "secuencia": f"{i:04d}",
+            "categoria_general": categorias[i % len(categorias)],
+            "codigo_contable": cuentas[(i // len(categorias)) % len(cuentas)],
+            "debito": (i % 3) * 10,
+            "credito": (i % 5) * 5,
+        })
+    _insertar(db, filas)
+    # fuera del rango y desactivadas no cuentan
+    _insertar(db, [
+        {"secuencia": "x1", "categoria_general": "E-DE", "debito": 1, "credito": 0,
+         "fecha_elaboracion": (date(2024, 3, 31) + timedelta(days=1)).isoformat()},
+        {"secuencia": "x2", "categoria_general": "E-DE", "debito": 1, "credito": 0, "activo": False},
+    ])
+
+    contabilizados, pni = _clasificar(db)
+    con_esperado, pni_esperado = _referencia(filas)
+
+    assert _secuencias(contabilizados) == {cat: sorted(s) for cat, s in con_esperado.items()}
+    assert _secuencias(pni) == {cat: sorted(s) for cat, s in pni_esperado.items()}
+    assert all("es_con" not in f and "es_pni" not in f for filas in contabilizados.values() for f in filas)
@@ -0,0 +1,20 @@
+from app.routers import reportes
+
+
+def test_un_solo_router_con_todos_los_endpoints():
+    rutas = {ruta.path for ruta in reportes.router.routes}
+
+    assert rutas == {
+        "/reportes/movimientos/{fuente}",
+        "/reportes/movimientos-unificados",
+        "/reportes/movimientos-exportar",
+        "/reportes/ingresos",
+        "/reportes/egresos",
+        "/reportes/resumen-general",
+        "/reportes/tendencia",
+        "/reportes/cache",
+        "/reportes/matriz",
+        "/reportes/matriz-filtrada",
+        "/reportes/detallado",
+        "/reportes/global",
+    }